@@ -0,0 +1,69 @@
+"""
+Measure the time spent importing the integration.
+
+Home Assistant imports the api modules when it loads the integration, before
+any entry is set up. The edilkamin library, with pycognito and boto3 behind
+it, is only imported on the first sign-in, so it must not show up in the
+modules imported here.
+
+Run from the repository root, with Home Assistant installed:
+
+    python benchmarks/bench_import.py
+"""
+from pathlib import Path
+import re
+import subprocess
+import sys
+
+ROOT = Path(__file__).parent.parent
+MODULES = (
+    "custom_components.edilkaminV2.api.edilkamin_async_api",
+    "custom_components.edilkaminV2.coordinator",
+)
+# Loaded by Home Assistant itself, not counted in the cost of the integration.
+PRELOADED = ("homeassistant.core", "homeassistant.helpers.update_coordinator")
+LAZY = ("edilkamin", "pycognito", "boto3")
+
+IMPORT_TIME = re.compile(r"import time:\s+(\d+) \|\s+\d+ \|\s*(\S+)")
+
+
+def import_times(statement: str) -> dict[str, int]:
+    """Return the self import time, in us, of each module `statement` loads."""
+    stderr = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", statement],
+        cwd=ROOT,
+        capture_output=True,
+        check=True,
+        text=True,
+    ).stderr
+    times = {}
+    for line in stderr.splitlines():
+        match = IMPORT_TIME.match(line)
+        if match is not None:
+            times[match.group(2)] = int(match.group(1))
+    return times
+
+
+def main() -> None:
+    """Run the benchmark."""
+    preload = "; ".join(f"import {module}" for module in PRELOADED)
+    preloaded = import_times(preload)
+    for module in MODULES:
+        times = {
+            name: value
+            for name, value in import_times(f"{preload}; import {module}").items()
+            if name not in preloaded
+        }
+        print(
+            f"{module}: {sum(times.values()) / 1000:.1f} ms, {len(times)} modules"
+        )
+        eager = sorted(name for name in times if name.split(".")[0] in LAZY)
+        if eager:
+            print(f"  imported eagerly: {', '.join(eager)}")
+
+    times = import_times("import edilkamin")
+    print(f"edilkamin, on first use: {sum(times.values()) / 1000:.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,168 @@
+"""
+Compare the per-poll cost of the coordinator getters.
+
+The getters used to walk the nested device_info dict with chained .get()
+calls on every read, they now read the fields of a snapshot decoded once
+per poll. A poll costs one decode, then each read of the fields costs the
+"snapshot" line instead of the "dict walk" one.
+
+The coordinator still keeps the polled device_info, to compare the next
+poll with it, so the snapshot is memory kept on top of it.
+
+Run from the repository root:
+
+    python benchmarks/bench_snapshot.py
+"""
+import copy
+import importlib.util
+from pathlib import Path
+import sys
+import timeit
+import tracemalloc
+
+# snapshot.py does not depend on Home Assistant, load it without the package.
+SNAPSHOT_PATH = (
+    Path(__file__).parent.parent / "custom_components" / "edilkaminV2" / "snapshot.py"
+)
+spec = importlib.util.spec_from_file_location("snapshot", SNAPSHOT_PATH)
+snapshot = importlib.util.module_from_spec(spec)
+sys.modules[spec.name] = snapshot
+spec.loader.exec_module(snapshot)
+
+DEVICE_INFO = {
+    "status": {
+        "commands": {"power": True},
+        "temperatures": {"enviroment": 20.5, "board": 31.0, "exhaust": 120.0},
+        "fans": {"fan_1_speed": 3, "fan_2_speed": 2, "fan_3_speed": 0},
+        "flags": {
+            "is_pellet_in_reserve": False,
+            "is_airkare_active": False,
+            "is_relax_active": True,
+        },
+        "pump": {"flags2": {"fan_1_active": True, "fan_2_active": False}},
+        "pellet": {"autonomy_time": 7200},
+        "state": {"actual_power": 3, "operational_phase": 2},
+    },
+    "nvm": {
+        "user_parameters": {
+            "enviroment_1_temperature": 21.0,
+            "fan_1_ventilation": 3,
+            "fan_2_ventilation": 2,
+            "manual_power": 3,
+            "is_auto": False,
+            "is_standby_active": False,
+            "standby_waiting_time": 600,
+        },
+        "installer_parameters": {"fans_number": 2},
+        "chrono": {"is_active": False},
+        "total_counters": {"power_ons": 412},
+        "alarms_log": {
+            "index": 3,
+            "alarms": [{"type": i, "timestamp": 1700000000 + i} for i in range(10)],
+        },
+    },
+}
+
+
+def read_dict(info: dict) -> list:
+    """Read the fields the entities use in a poll, the way the getters did."""
+    status = lambda: info.get("status")  # noqa: E731
+    nvm = lambda: info.get("nvm")  # noqa: E731
+    return [
+        status().get("temperatures").get("enviroment"),
+        nvm().get("user_parameters").get("enviroment_1_temperature"),
+        status().get("fans").get("fan_1_speed"),
+        nvm().get("user_parameters").get("fan_1_ventilation"),
+        status().get("pump").get("flags2").get("fan_1_active"),
+        status().get("fans").get("fan_2_speed"),
+        nvm().get("user_parameters").get("fan_2_ventilation"),
+        status().get("pump").get("flags2").get("fan_2_active"),
+        nvm().get("alarms_log").get("index"),
+        status().get("state").get("actual_power"),
+        nvm().get("user_parameters").get("manual_power"),
+        nvm().get("user_parameters").get("manual_power"),
+        status().get("commands").get("power"),
+        status().get("commands").get("power"),
+        status().get("flags").get("is_pellet_in_reserve"),
+        status().get("flags").get("is_airkare_active"),
+        status().get("flags").get("is_relax_active"),
+        nvm().get("chrono").get("is_active"),
+        status().get("state").get("operational_phase"),
+        status().get("pellet").get("autonomy_time"),
+        nvm().get("user_parameters").get("is_standby_active"),
+        nvm().get("user_parameters").get("standby_waiting_time"),
+        nvm().get("total_counters").get("power_ons"),
+        nvm().get("user_parameters").get("is_auto"),
+    ]
+
+
+def read_snapshot(data) -> list:
+    """Read the same fields from the snapshot of the poll."""
+    return [
+        data.temperature,
+        data.target_temperature,
+        data.fan_1_speed,
+        data.fan_1_setpoint,
+        data.fan_1_active,
+        data.fan_2_speed,
+        data.fan_2_setpoint,
+        data.fan_2_active,
+        data.nb_alarms,
+        data.actual_power,
+        data.power_setpoint,
+        data.power_setpoint,
+        data.power,
+        data.power,
+        data.pellet_in_reserve,
+        data.airkare,
+        data.relax,
+        data.chrono_mode,
+        data.operational_phase,
+        data.autonomy_time,
+        data.standby_mode,
+        data.standby_waiting_time,
+        data.power_ons,
+        data.auto,
+    ]
+
+
+def retained(factory) -> int:
+    """Return the bytes still allocated by the object `factory` builds."""
+    tracemalloc.start()
+    before = tracemalloc.take_snapshot()
+    kept = factory()  # noqa: F841
+    after = tracemalloc.take_snapshot()
+    tracemalloc.stop()
+    return sum(stat.size_diff for stat in after.compare_to(before, "filename"))
+
+
+def main() -> None:
+    """Run the benchmark."""
+    decode = snapshot.EdilkaminSnapshot.from_device_info
+    data = decode(DEVICE_INFO)
+    assert read_dict(DEVICE_INFO) == read_snapshot(data)
+
+    # The entities built from the description tables read their field with
+    # an accessor compiled at setup.
+    accessors = [
+        snapshot.compile_accessor(field) for field in snapshot.EdilkaminSnapshot._fields
+    ]
+
+    number = 100_000
+    for name, func in (
+        ("dict walk", lambda: read_dict(DEVICE_INFO)),
+        ("decode", lambda: decode(DEVICE_INFO)),
+        ("snapshot", lambda: read_snapshot(data)),
+        ("accessors", lambda: [accessor(data) for accessor in accessors]),
+    ):
+        seconds = min(timeit.repeat(func, number=number, repeat=5))
+        print(f"{name:>10}: {seconds / number * 1e6:.2f} us")
+
+    print(
+        f"{'memory':>10}: {retained(lambda: copy.deepcopy(DEVICE_INFO))} bytes "
+        "for the device_info kept before, "
+        f"{retained(lambda: decode(DEVICE_INFO))} more bytes for the snapshot"
+    )
+
+if __name__ == "__main__":
+    main()
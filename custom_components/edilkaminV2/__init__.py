@@ -4,11 +4,38 @@ from __future__ import annotations
 import logging
 from homeassistant.config_entries import ConfigEntry
 from homeassistant.const import Platform
-from homeassistant.core import HomeAssistant
+from homeassistant.core import HomeAssistant, SupportsResponse
 from homeassistant.helpers import device_registry as dr
-
-
-from .const import DOMAIN, MAC_ADDRESS, PASSWORD, USERNAME
+from homeassistant.helpers.storage import Store
+
+
+from .const import (
+    CONF_COMMAND_DELAY,
+    CONF_STATE_MAX_AGE,
+    CONF_TRANSPORT,
+    CONF_UNAVAILABLE_AGE,
+    CONF_UNAVAILABLE_FAILURES,
+    DEFAULT_COMMAND_DELAY,
+    DEFAULT_SCAN_INTERVALS,
+    DEFAULT_STATE_MAX_AGE,
+    DEFAULT_UNAVAILABLE_AGE,
+    DEFAULT_UNAVAILABLE_FAILURES,
+    DEFAULT_TRANSPORT,
+    DOMAIN,
+    MAC_ADDRESS,
+    PASSWORD,
+    STORAGE_KEY,
+    STORAGE_VERSION,
+    USERNAME,
+)
+from .account import async_get_account, async_release_account
+from .alarm_history import (
+    QUERY_ALARMS_SCHEMA,
+    SERVICE_QUERY_ALARMS,
+    async_get_alarm_history,
+    async_handle_query_alarms,
+    async_release_alarm_history,
+)
 from .coordinator import EdilkaminCoordinator
 from custom_components.edilkaminv2.api.edilkamin_async_api import (
     EdilkaminAsyncApi,
@@ -28,37 +55,124 @@ async def async_setup_entry(hass: HomeAssistant, entry: ConfigEntry) -> bool:
     username = entry.data[USERNAME]
     password = entry.data[PASSWORD]
 
-    coordinator = EdilkaminCoordinator(hass, username, password, mac_address)
-
-    # First refresh
-    await coordinator.async_refresh()
-
-    hass.data.setdefault(DOMAIN, {})
-    hass.data[DOMAIN][entry.entry_id] = EdilkaminAsyncApi(  
+    # The stoves of an account share its session, so they sign in once. The
+    # first entry of the account picks the transport.
+    account = async_get_account(
+        hass,
+        username,
+        password,
+        entry.options.get(CONF_TRANSPORT, DEFAULT_TRANSPORT),
+    )
+    # A single client per entry, shared by the coordinator and the platforms.
+    api = EdilkaminAsyncApi(
         mac_address=mac_address,
         username=username,
         password=password,
-        hass=hass
+        hass=hass,
+        transport=entry.options.get(CONF_TRANSPORT, DEFAULT_TRANSPORT),
+        command_delay=entry.options.get(CONF_COMMAND_DELAY, DEFAULT_COMMAND_DELAY),
+        session=account.session,
         ##session=async_get_clientsession(hass),
         ##refresh_token=refresh_token,
         ##client_id=client_id,
     )
+    coordinator = EdilkaminCoordinator(
+        hass,
+        api,
+        scan_intervals={
+            option: entry.options[option]
+            for option in DEFAULT_SCAN_INTERVALS
+            if option in entry.options
+        },
+        account=account,
+        state_max_age=entry.options.get(CONF_STATE_MAX_AGE, DEFAULT_STATE_MAX_AGE),
+        store=_get_store(hass, entry),
+        alarm_history=async_get_alarm_history(hass),
+        unavailable_failures=entry.options.get(
+            CONF_UNAVAILABLE_FAILURES, DEFAULT_UNAVAILABLE_FAILURES
+        ),
+        unavailable_age=entry.options.get(
+            CONF_UNAVAILABLE_AGE, DEFAULT_UNAVAILABLE_AGE
+        ),
+    )
+    account.async_add_coordinator(coordinator)
 
-    hass.data[DOMAIN]["coordinator"] = coordinator
-    register_device(hass, entry, mac_address)
-    await hass.config_entries.async_forward_entry_setups(entry, PLATFORMS)
+    try:
+        await _async_start_coordinator(hass, entry, coordinator)
+    except Exception:
+        # Home Assistant does not unload an entry whose setup failed.
+        await _async_release(hass, coordinator)
+        raise
+
+    entry.async_on_unload(entry.add_update_listener(async_reload_entry))
     return True
 
 
+async def _async_start_coordinator(
+    hass: HomeAssistant, entry: ConfigEntry, coordinator: EdilkaminCoordinator
+) -> None:
+    """Run the first refresh of the coordinator, and set up the platforms."""
+    # Start from the data of the last run, and poll the cloud in the
+    # background, so a slow cloud does not delay the startup.
+    if await coordinator.async_load_stored_data():
+        entry.async_create_background_task(
+            hass, coordinator.async_refresh(), "edilkamin first refresh"
+        )
+    else:
+        await coordinator.async_refresh()
+
+    # Each entry has its own coordinator, so several stoves poll side by side.
+    entry.runtime_data = coordinator
+    register_device(hass, entry, coordinator.get_mac_address())
+    # The alarm history is shared by the stoves, so is its service.
+    if not hass.services.has_service(DOMAIN, SERVICE_QUERY_ALARMS):
+        hass.services.async_register(
+            DOMAIN,
+            SERVICE_QUERY_ALARMS,
+            async_handle_query_alarms,
+            schema=QUERY_ALARMS_SCHEMA,
+            supports_response=SupportsResponse.ONLY,
+        )
+    await hass.config_entries.async_forward_entry_setups(entry, PLATFORMS)
+
+
 async def async_unload_entry(hass: HomeAssistant, entry: ConfigEntry) -> bool:
     """Unload a config entry."""
     unload_ok = await hass.config_entries.async_unload_platforms(entry, PLATFORMS)
     if unload_ok:
-        hass.data[DOMAIN].pop(entry.entry_id)
+        await _async_release(hass, entry.runtime_data)
 
     return unload_ok
 
 
+async def _async_release(
+    hass: HomeAssistant, coordinator: EdilkaminCoordinator
+) -> None:
+    """Release the api of a stove, and its share of the account and alarm history."""
+    # The queued commands are sent before the account stops its threads.
+    await coordinator.api.async_shutdown()
+    async_release_account(hass, coordinator)
+    if await async_release_alarm_history(hass) and hass.services.has_service(
+        DOMAIN, SERVICE_QUERY_ALARMS
+    ):
+        hass.services.async_remove(DOMAIN, SERVICE_QUERY_ALARMS)
+
+
+async def async_remove_entry(hass: HomeAssistant, entry: ConfigEntry) -> None:
+    """Remove the data stored for a config entry."""
+    await _get_store(hass, entry).async_remove()
+
+
+def _get_store(hass: HomeAssistant, entry: ConfigEntry) -> Store:
+    """Return the store of the last polled data of a config entry."""
+    return Store(hass, STORAGE_VERSION, STORAGE_KEY.format(entry_id=entry.entry_id))
+
+
+async def async_reload_entry(hass: HomeAssistant, entry: ConfigEntry) -> None:
+    """Reload the config entry when its options changed."""
+    await hass.config_entries.async_reload(entry.entry_id)
+
+
 def register_device(hass: HomeAssistant, config_entry, mac_address):
     """Register a device in the Home Assistant device registry."""
     device_registry = dr.async_get(hass)
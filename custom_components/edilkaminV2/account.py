@@ -0,0 +1,132 @@
+"""Edilkamin accounts."""
+
+from __future__ import annotations
+
+import asyncio
+import logging
+from typing import TYPE_CHECKING
+
+from homeassistant.core import HomeAssistant, callback
+
+from .api.session import EdilkaminSession
+from .const import DOMAIN
+
+if TYPE_CHECKING:
+    from .coordinator import EdilkaminCoordinator
+
+_LOGGER = logging.getLogger(__name__)
+
+ACCOUNTS = "accounts"
+
+
+class EdilkaminAccount:
+    """
+    Stoves of an Edilkamin account.
+
+    The stoves share one session, so one token and one connection pool, and
+    are polled together: the poll of a stove also fetches the other stoves
+    that are due, and hands them their data.
+    """
+
+    def __init__(
+        self, hass: HomeAssistant, username: str, session: EdilkaminSession
+    ) -> None:
+        """Initialize the class."""
+        self._hass = hass
+        self.username = username
+        self.session = session
+        self._coordinators: dict[str, EdilkaminCoordinator] = {}
+        self._cycle: asyncio.Task | None = None
+        self._cycle_macs: set[str] = set()
+        self._waiting: set[str] = set()
+
+    @callback
+    def async_add_coordinator(self, coordinator: EdilkaminCoordinator) -> None:
+        """Add the coordinator of a stove to the account."""
+        self._coordinators[coordinator.get_mac_address()] = coordinator
+
+    @callback
+    def async_remove_coordinator(self, coordinator: EdilkaminCoordinator) -> bool:
+        """Remove the coordinator of a stove, return True if none is left."""
+        self._coordinators.pop(coordinator.get_mac_address(), None)
+        return not self._coordinators
+
+    async def async_poll(self, coordinator: EdilkaminCoordinator) -> dict:
+        """Get the device information of a stove, within a poll cycle."""
+        mac_address = coordinator.get_mac_address()
+        self._waiting.add(mac_address)
+        try:
+            if self._cycle is None or self._cycle.done():
+                self._start_cycle(mac_address)
+            elif mac_address not in self._cycle_macs:
+                # The cycle in flight was started without this stove.
+                return await coordinator.update_device_information()
+            results = await asyncio.shield(self._cycle)
+        finally:
+            self._waiting.discard(mac_address)
+
+        result = results[mac_address]
+        if isinstance(result, BaseException):
+            raise result
+        return result
+
+    @callback
+    def _start_cycle(self, mac_address: str) -> None:
+        """Start a poll cycle of the stove and of the other stoves that are due."""
+        coordinators = [
+            coordinator
+            for mac, coordinator in self._coordinators.items()
+            if mac == mac_address or coordinator.poll_due
+        ]
+        self._cycle_macs = {
+            coordinator.get_mac_address() for coordinator in coordinators
+        }
+        self._cycle = self._hass.async_create_task(
+            self._async_cycle(coordinators), "edilkamin account poll"
+        )
+
+    async def _async_cycle(self, coordinators: list[EdilkaminCoordinator]) -> dict:
+        """Fetch the stoves concurrently, and hand the data to their coordinator."""
+        results = await asyncio.gather(
+            *(coordinator.update_device_information() for coordinator in coordinators),
+            return_exceptions=True,
+        )
+        results = {
+            coordinator.get_mac_address(): result
+            for coordinator, result in zip(coordinators, results)
+        }
+        _LOGGER.debug("Polled %s stoves of %s", len(results), self.username)
+
+        for coordinator in coordinators:
+            result = results[coordinator.get_mac_address()]
+            if (
+                coordinator.get_mac_address() in self._waiting
+                or isinstance(result, BaseException)
+            ):
+                continue
+            coordinator.async_set_account_info(result)
+        return results
+
+
+@callback
+def async_get_account(
+    hass: HomeAssistant, username: str, password: str, transport: str
+) -> EdilkaminAccount:
+    """Get the account of this username, creating it for its first stove."""
+    accounts = hass.data.setdefault(DOMAIN, {}).setdefault(ACCOUNTS, {})
+    if username not in accounts:
+        accounts[username] = EdilkaminAccount(
+            hass, username, EdilkaminSession(hass, username, password, transport)
+        )
+    return accounts[username]
+
+
+@callback
+def async_release_account(
+    hass: HomeAssistant, coordinator: EdilkaminCoordinator
+) -> None:
+    """Remove a stove from its account, and drop the account left empty."""
+    account = coordinator.account
+    if account.async_remove_coordinator(coordinator):
+        hass.data[DOMAIN][ACCOUNTS].pop(account.username, None)
+        account.session.async_shutdown()
@@ -0,0 +1,207 @@
+"""History of the alarms of the Edilkamin stoves."""
+
+from __future__ import annotations
+
+import asyncio
+from datetime import datetime
+import logging
+import sqlite3
+
+import voluptuous as vol
+from homeassistant.core import HomeAssistant, ServiceCall, ServiceResponse, callback
+from homeassistant.helpers import config_validation as cv
+from homeassistant.helpers.storage import STORAGE_DIR
+from homeassistant.util import dt as dt_util
+
+from .api.executor import EdilkaminExecutor
+from .api.transport import format_mac
+from .const import DOMAIN, MAC_ADDRESS
+
+_LOGGER = logging.getLogger(__name__)
+
+ALARM_HISTORY = "alarm_history"
+ALARM_HISTORY_FILE = DOMAIN + "_alarms.db"
+
+# One row per alarm of a stove, keyed by its index in the alarm log of the
+# stove and its time, so an alarm seen by several polls is only stored once,
+# and the indexes reused after a reset of the board are not. The rows are
+# never updated nor deleted.
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS alarms (
+    mac_address TEXT NOT NULL,
+    log_index INTEGER NOT NULL,
+    type INTEGER NOT NULL,
+    timestamp INTEGER NOT NULL,
+    PRIMARY KEY (mac_address, log_index, timestamp)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS alarms_by_type ON alarms (type, timestamp);
+CREATE INDEX IF NOT EXISTS alarms_by_time ON alarms (timestamp);
+"""
+
+SERVICE_QUERY_ALARMS = "query_alarms"
+QUERY_ALARMS_SCHEMA = vol.Schema(
+    {
+        vol.Optional("type"): vol.Coerce(int),
+        vol.Optional("since"): cv.datetime,
+        vol.Optional("until"): cv.datetime,
+        vol.Optional(MAC_ADDRESS): cv.string,
+        vol.Optional("limit", default=100): vol.All(
+            vol.Coerce(int), vol.Range(min=1, max=10000)
+        ),
+    }
+)
+
+
+class AlarmHistory:
+    """
+    Append-only history of the alarms seen in the polls of the stoves.
+
+    The alarm log of a stove only keeps its last alarms, the history keeps
+    all of them in a SQLite database indexed by type and by time. The
+    database is only used from a single thread of its own executor.
+    """
+
+    def __init__(self, hass: HomeAssistant, path: str) -> None:
+        """Initialize the class."""
+        self._hass = hass
+        self._path = path
+        self._executor = EdilkaminExecutor(max_workers=1)
+        self._connection: sqlite3.Connection | None = None
+        # Writes started by async_add, awaited before closing the database.
+        self._pending: set[asyncio.Task] = set()
+        self._closed = False
+        self.users = 0
+
+    @callback
+    def async_add(self, mac_address: str, entries: list[tuple[int, dict]]) -> None:
+        """Store the (index, alarm) entries of a stove, in the background."""
+        if self._closed:
+            _LOGGER.debug("Alarm history closed, alarms %s not stored", entries)
+            return
+        task = self._hass.async_create_background_task(
+            self.async_store(mac_address, entries), "edilkamin alarm history"
+        )
+        self._pending.add(task)
+        task.add_done_callback(self._pending.discard)
+
+    async def async_store(
+        self, mac_address: str, entries: list[tuple[int, dict]]
+    ) -> None:
+        """Store the (index, alarm) entries of a stove."""
+        rows = [
+            (format_mac(mac_address), index, alarm["type"], alarm["timestamp"])
+            for index, alarm in entries
+        ]
+        await self._executor.async_run(self._insert, rows)
+
+    async def async_query(
+        self,
+        alarm_type: int | None = None,
+        since: datetime | None = None,
+        until: datetime | None = None,
+        mac_address: str | None = None,
+        limit: int = 100,
+    ) -> list[dict]:
+        """Return the matching alarms, the most recent first."""
+        conditions = []
+        parameters: list = []
+        for condition, value in (
+            ("type = ?", alarm_type),
+            ("timestamp >= ?", None if since is None else int(since.timestamp())),
+            ("timestamp < ?", None if until is None else int(until.timestamp())),
+            ("mac_address = ?", mac_address and format_mac(mac_address)),
+        ):
+            if value is not None:
+                conditions.append(condition)
+                parameters.append(value)
+        query = "SELECT mac_address, log_index, type, timestamp FROM alarms"
+        if conditions:
+            query += " WHERE " + " AND ".join(conditions)
+        query += " ORDER BY timestamp DESC LIMIT ?"
+        parameters.append(limit)
+
+        rows = await self._executor.async_run(self._select, query, parameters)
+        return [
+            {
+                "mac_address": mac,
+                "index": index,
+                "type": alarm_type,
+                "timestamp": dt_util.utc_from_timestamp(timestamp).isoformat(),
+            }
+            for mac, index, alarm_type, timestamp in rows
+        ]
+
+    async def async_close(self) -> None:
+        """Close the database once the pending writes are done."""
+        self._closed = True
+        if self._pending:
+            await asyncio.wait(self._pending)
+        await self._executor.async_run(self._close)
+        self._executor.shutdown()
+
+    def _connect(self) -> sqlite3.Connection:
+        """Open the database, from the executor."""
+        if self._connection is None:
+            self._connection = sqlite3.connect(self._path)
+            self._connection.executescript(SCHEMA)
+        return self._connection
+
+    def _insert(self, rows: list[tuple]) -> None:
+        """Store rows, the ones already stored are ignored."""
+        try:
+            with self._connect() as connection:
+                connection.executemany(
+                    "INSERT OR IGNORE INTO alarms VALUES (?, ?, ?, ?)", rows
+                )
+        except sqlite3.Error as err:
+            _LOGGER.error("Error storing the alarms %s: %s", rows, err)
+
+    def _select(self, query: str, parameters: list) -> list[tuple]:
+        """Run a query, from the executor."""
+        return self._connect().execute(query, parameters).fetchall()
+
+    def _close(self) -> None:
+        """Close the database, from the executor."""
+        if self._connection is not None:
+            self._connection.close()
+            self._connection = None
+
+
+@callback
+def async_get_alarm_history(hass: HomeAssistant) -> AlarmHistory:
+    """Get the alarm history, opening it for the first stove."""
+    domain_data = hass.data.setdefault(DOMAIN, {})
+    if ALARM_HISTORY not in domain_data:
+        domain_data[ALARM_HISTORY] = AlarmHistory(
+            hass, hass.config.path(STORAGE_DIR, ALARM_HISTORY_FILE)
+        )
+    history = domain_data[ALARM_HISTORY]
+    history.users += 1
+    return history
+
+
+async def async_release_alarm_history(hass: HomeAssistant) -> bool:
+    """Release the alarm history of a stove, return True if it was closed."""
+    history = hass.data[DOMAIN][ALARM_HISTORY]
+    history.users -= 1
+    if history.users:
+        return False
+    hass.data[DOMAIN].pop(ALARM_HISTORY)
+    await history.async_close()
+    return True
+
+
+async def async_handle_query_alarms(call: ServiceCall) -> ServiceResponse:
+    """Answer the query_alarms service from the alarm history."""
+    history: AlarmHistory = call.hass.data[DOMAIN][ALARM_HISTORY]
+    since = call.data.get("since")
+    until = call.data.get("until")
+    return {
+        "alarms": await history.async_query(
+            alarm_type=call.data.get("type"),
+            since=None if since is None else dt_util.as_utc(since),
+            until=None if until is None else dt_util.as_utc(until),
+            mac_address=call.data.get(MAC_ADDRESS),
+            limit=call.data["limit"],
+        )
+    }
@@ -0,0 +1,74 @@
+"""Alarms of an Edilkamin stove."""
+
+from __future__ import annotations
+
+from collections import deque
+import time
+import typing
+
+# Number of formatted alarms kept in the attributes of the alarms sensor.
+ALARM_HISTORY = 50
+
+
+def alarm_entries(alarms_log: dict, since: int = 0) -> list[tuple[int, dict]]:
+    """
+    Return the (index, alarm) entries of an alarms_log, oldest first.
+
+    `index` counts the alarms logged since the stove was installed, and
+    `alarms` is a circular buffer: alarm i is in slot i modulo its size. Only
+    the entries from `since` are read, the ones already overwritten are lost.
+    """
+    index = alarms_log.get("index") or 0
+    alarms: typing.Sequence = alarms_log.get("alarms") or ()
+    if not alarms:
+        return []
+    start = max(since, index - len(alarms), 0)
+    return [(i, alarms[i % len(alarms)]) for i in range(start, index)]
+
+
+def format_alarm(alarm: dict) -> dict:
+    """Return an alarm the way the alarms sensor shows it."""
+    return {
+        "type": alarm["type"],
+        "timestamp": time.strftime(
+            "%d-%m-%Y %H:%M:%S", time.localtime(alarm["timestamp"])
+        ),
+    }
+
+
+class AlarmLog:
+    """
+    Alarms of a stove, decoded incrementally from the polls.
+
+    Only the entries added since the last poll are decoded, and the
+    attributes of the sensor are rebuilt only when the log index moved.
+    """
+
+    def __init__(self, maxlen: int = ALARM_HISTORY) -> None:
+        """Initialize the class."""
+        self.index: int | None = None
+        # True when the last update read the log from the start.
+        self.restarted = False
+        self._alarms: deque[dict] = deque(maxlen=maxlen)
+        self.attributes: dict[str, list[dict]] = {"errors": []}
+
+    def update(self, alarms_log: dict) -> list[tuple[int, dict]]:
+        """
+        Read the alarms added to `alarms_log`, and return them.
+
+        The first update reads the whole log, and sets `restarted`: its
+        alarms were raised before it, they are not new. A log whose index
+        went back, after a reset of the board, is read again from the start.
+        """
+        index = alarms_log.get("index")
+        if index is None or index == self.index:
+            return []
+
+        self.restarted = self.index is None or index < self.index
+        if self.restarted:
+            self._alarms.clear()
+        entries = alarm_entries(alarms_log, 0 if self.restarted else self.index)
+        self._alarms.extend(format_alarm(alarm) for _i, alarm in entries)
+        self.index = index
+        self.attributes = {"errors": list(self._alarms)}
+        return entries
@@ -0,0 +1,113 @@
+"""Edilkamin circuit breaker."""
+
+from __future__ import annotations
+
+import logging
+import random
+import time
+
+_LOGGER = logging.getLogger(__name__)
+
+STATE_CLOSED = "closed"
+STATE_OPEN = "open"
+STATE_HALF_OPEN = "half_open"
+
+ERROR_AUTH = "auth"
+ERROR_TRANSIENT = "transient"
+
+# Consecutive transient errors opening the circuit. The api already signed in
+# again before reporting an auth error, so a single one opens it.
+FAILURE_THRESHOLD = 3
+# First pause, in seconds, after transient and after auth errors. It doubles
+# at each failed probe, up to MAX_BACKOFF.
+TRANSIENT_BACKOFF = 30
+AUTH_BACKOFF = 300
+MAX_BACKOFF = 1800
+# Time, in seconds, after which a probe that never reported is given up.
+PROBE_TIMEOUT = 60
+
+
+class CircuitBreaker:
+    """
+    Pause the requests of an account while the Edilkamin cloud fails.
+
+    After repeated errors the circuit opens and the requests are refused
+    during an exponential backoff with jitter. A single probe request is
+    then let through: the circuit closes if it succeeds, and opens again
+    for a longer pause if it fails.
+    """
+
+    def __init__(
+        self,
+        failure_threshold: int = FAILURE_THRESHOLD,
+        transient_backoff: float = TRANSIENT_BACKOFF,
+        auth_backoff: float = AUTH_BACKOFF,
+        max_backoff: float = MAX_BACKOFF,
+    ) -> None:
+        """Initialize the class."""
+        self._failure_threshold = failure_threshold
+        self._backoff = {ERROR_TRANSIENT: transient_backoff, ERROR_AUTH: auth_backoff}
+        self._max_backoff = max_backoff
+        self.state = STATE_CLOSED
+        self.failures = 0
+        self.last_error: str | None = None
+        # Openings since the circuit was last closed, the exponent of the pause.
+        self._openings = 0
+        self._retry_at = 0.0
+
+    @property
+    def retry_in(self) -> float:
+        """Return the seconds left before the probe, 0 if the circuit is not open."""
+        if self.state != STATE_OPEN:
+            return 0.0
+        return max(self._retry_at - time.monotonic(), 0.0)
+
+    def allow_request(self) -> bool:
+        """Return True if a request can be sent, it is the probe when half open."""
+        now = time.monotonic()
+        if self.state == STATE_CLOSED:
+            return True
+        if now < self._retry_at:
+            return False
+        # The pause is over, or the probe in flight timed out.
+        _LOGGER.debug("Probing the Edilkamin cloud")
+        self.state = STATE_HALF_OPEN
+        self._retry_at = now + PROBE_TIMEOUT
+        return True
+
+    def record_success(self) -> None:
+        """Close the circuit."""
+        if self.state != STATE_CLOSED:
+            _LOGGER.info("Edilkamin cloud reachable again")
+        self.state = STATE_CLOSED
+        self.failures = 0
+        self.last_error = None
+        self._openings = 0
+
+    def record_failure(self, auth_error: bool) -> None:
+        """Count a failed request, and open the circuit if needed."""
+        self.failures += 1
+        self.last_error = ERROR_AUTH if auth_error else ERROR_TRANSIENT
+        if (
+            auth_error
+            or self.state == STATE_HALF_OPEN
+            or self.failures >= self._failure_threshold
+        ):
+            self._open()
+
+    def _open(self) -> None:
+        """Refuse the requests during the next pause."""
+        delay = min(
+            self._backoff[self.last_error] * 2**self._openings, self._max_backoff
+        )
+        # Keep half of the pause and draw the rest, so the stoves and the
+        # Home Assistant instances do not all come back at the same time.
+        delay = delay / 2 + random.uniform(0, delay / 2)
+        self._openings += 1
+        self.state = STATE_OPEN
+        self._retry_at = time.monotonic() + delay
+        _LOGGER.warning(
+            "Edilkamin cloud failing (%s error), next attempt in %.0f s",
+            self.last_error,
+            delay,
+        )
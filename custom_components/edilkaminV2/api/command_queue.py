@@ -0,0 +1,85 @@
+"""Edilkamin command queue."""
+
+from __future__ import annotations
+
+import asyncio
+import logging
+import typing
+
+from homeassistant.core import CALLBACK_TYPE, HomeAssistant, callback
+from homeassistant.helpers.event import async_call_later
+
+_LOGGER = logging.getLogger(__name__)
+
+
+class CommandQueue:
+    """
+    Coalesce the commands sent to a device.
+
+    Only the last value queued for a command name is kept, and the pending
+    commands are sent once no new command was queued for `delay` seconds.
+    """
+
+    def __init__(
+        self,
+        hass: HomeAssistant,
+        send: typing.Callable[[list[typing.Dict]], typing.Awaitable],
+        delay: float,
+    ) -> None:
+        """Initialize the class."""
+        self._hass = hass
+        self._send = send
+        self._delay = delay
+        self._pending: dict[str, typing.Dict] = {}
+        self._unsub_flush: CALLBACK_TYPE | None = None
+        self._flush_task: asyncio.Task | None = None
+
+    @callback
+    def async_enqueue(self, payload: typing.Dict) -> None:
+        """Queue a command, replacing the pending one with the same name."""
+        self._pending.pop(payload["name"], None)
+        self._pending[payload["name"]] = payload
+        self._cancel_flush()
+        self._unsub_flush = async_call_later(
+            self._hass, self._delay, self._handle_flush
+        )
+
+    @callback
+    def async_discard(self, name: str) -> None:
+        """Drop the pending command with this name, a newer one is being sent."""
+        self._pending.pop(name, None)
+
+    async def async_shutdown(self) -> None:
+        """Send the pending commands now, and wait until they are all sent."""
+        self._cancel_flush()
+        if self._flush_task is not None:
+            await self._flush_task
+        await self.async_flush()
+
+    async def async_flush(self) -> None:
+        """Send the pending commands in one batch, in the order they were last queued."""
+        self._cancel_flush()
+        if not self._pending:
+            return
+
+        payloads = list(self._pending.values())
+        self._pending.clear()
+        try:
+            await self._send(payloads)
+        except Exception as err:  # noqa: BLE001
+            _LOGGER.error("Error sending commands %s: %s", payloads, err)
+
+    @callback
+    def _cancel_flush(self) -> None:
+        """Cancel the scheduled flush."""
+        if self._unsub_flush is not None:
+            self._unsub_flush()
+            self._unsub_flush = None
+
+    @callback
+    def _handle_flush(self, _now) -> None:
+        """Send the pending commands in the background."""
+        self._unsub_flush = None
+        self._flush_task = self._hass.async_create_background_task(
+            self.async_flush(), "edilkamin command flush"
+        )
@@ -1,28 +1,86 @@
 """Edilkamin async api."""
 
+import asyncio
 import logging
+import time
 
 import typing
 
 
-import edilkamin
-from homeassistant.core import HomeAssistant
+from homeassistant.core import CALLBACK_TYPE, HomeAssistant, callback
+
+from ..alarms import alarm_entries
+from ..const import DEFAULT_COMMAND_DELAY, DEFAULT_TRANSPORT
+from .command_queue import CommandQueue
+from .session import EdilkaminSession
+from .transport import sign_in
 
 
 _LOGGER = logging.getLogger(__name__)
 
+# Age, in seconds, under which the getters are served from the last snapshot.
+INFO_CACHE_TTL = 5
+
+COMMAND_SENT = "sent"
+COMMAND_FAILED = "failed"
+COMMAND_SKIPPED = "skipped"
+
+
+class CommandResult(typing.NamedTuple):
+    """Outcome of a command of a batch."""
+
+    payload: typing.Dict
+    status: str
+    result: str | None = None
+    error: Exception | None = None
+
 
 class EdilkaminAsyncApi:
     """
     Class to interact with the Edilkamin API.
     """
 
-    def __init__(self, mac_address, username: str, password:str, hass: HomeAssistant) -> None:#
-        """Initialize the class."""
+    def __init__(
+        self,
+        mac_address,
+        username: str,
+        password: str,
+        hass: HomeAssistant,
+        transport: str = DEFAULT_TRANSPORT,
+        command_delay: float = DEFAULT_COMMAND_DELAY,
+        session: EdilkaminSession | None = None,
+    ) -> None:
+        """
+        Initialize the class.
+
+        When `session` is given, the token and the transport are shared with
+        the other stoves of the account, otherwise the api has its own.
+        """
         self._hass = hass
         self._mac_address = mac_address
         self._username = username
         self._password = password
+        self._owns_session = session is None
+        if session is None:
+            session = EdilkaminSession(hass, username, password, transport)
+        self._session = session
+        self._token_manager = session.token_manager
+        self._transport = session.transport
+        self._command_queue = CommandQueue(
+            hass, self._async_flush_commands, command_delay
+        )
+
+        self._command_listeners: list[
+            typing.Callable[[list[typing.Dict]], None]
+        ] = []
+        self._failed_command_listeners: list[
+            typing.Callable[[list[typing.Dict]], None]
+        ] = []
+
+        self._info: typing.Dict | None = None
+        self._info_time = 0.0
+        self._info_task: asyncio.Task | None = None
+        self._info_generation = 0
 
 
     def get_mac_address(self):
@@ -32,8 +90,8 @@ class EdilkaminAsyncApi:
 
     async def authenticate(self) -> bool:#
         try:
-            await self._hass.async_add_executor_job(
-                edilkamin.sign_in, self._username, self._password
+            await self._session.executor.async_run(
+                sign_in, self._username, self._password
             )
             return True
         except Exception:
@@ -44,9 +102,11 @@ class EdilkaminAsyncApi:
         result = (await self.get_info()).get("status").get("temperatures").get("enviroment")
         return result
 
-    async def set_temperature(self, value):
+    async def set_temperature(self, value, coalesce: bool = False):
         """Modify the temperature."""
-        await self.execute_command({"name": "enviroment_1_temperature", "value": value})
+        await self.send_command(
+            {"name": "enviroment_1_temperature", "value": value}, coalesce
+        )
 
     async def get_power_status(self):
         """Get the power status."""
@@ -126,11 +186,11 @@ class EdilkaminAsyncApi:
     
     async def get_fan_1_speed(self):
         """Get the speed of fan 1."""
-        return int(await self.get_info()).get("status").get("fans").get("fan_1_speed")
+        return int((await self.get_info()).get("status").get("fans").get("fan_1_speed"))
 
-    async def set_fan_1_speed(self, value):
+    async def set_fan_1_speed(self, value, coalesce: bool = False):
         """Set the speed of fan 1."""
-        await self.execute_command({"name": "fan_1_speed", "value": int(value)})
+        await self.send_command({"name": "fan_1_speed", "value": int(value)}, coalesce)
 
     async def get_fan_2_is_active(self):
         """Get fan 2 is active."""
@@ -144,13 +204,13 @@ class EdilkaminAsyncApi:
 
     async def get_fan_2_speed(self):
         """Get the speed of fan 2."""
-        return int(await self.get_info()).get("status").get("fans").get("fan_2_speed")
+        return int((await self.get_info()).get("status").get("fans").get("fan_2_speed"))
 
-    async def set_fan_2_speed(self, value):
+    async def set_fan_2_speed(self, value, coalesce: bool = False):
         """Set the speed of fan 2."""
         _LOGGER.debug("Set speed for fan 2 to %s", value)
         ##await self.execute_put_request("fan_2_speed", int(value))
-        await self.execute_command({"name": "fan_2_speed", "value": int(value)})
+        await self.send_command({"name": "fan_2_speed", "value": int(value)}, coalesce)
 
     async def check(self):
         """Call check config."""
@@ -164,40 +224,42 @@ class EdilkaminAsyncApi:
         """Get the power status."""
         return (await self.get_info()).get("status").get("state").get("actual_power")
     
-    async def set_power_level(self, value):
+    async def set_power_level(self, value, coalesce: bool = False):
         """Set the power level."""
         _LOGGER.debug("Set power level to %s", value)
-        await self.execute_command({"name": "power_level", "value": value})#todo verifier
+        await self.send_command({"name": "power_level", "value": value}, coalesce)#todo verifier
 
     async def get_alarms(self):
-        """Get the target temperature."""
+        """Get the alarms still in the log, oldest first."""
         alarms_info = (await self.get_info()).get("nvm").get("alarms_log")
-        index = alarms_info.get("index")
-        alarms = []
-
-        for i in range(index):
-            alarms.append(alarms_info.get("alarms")[i])
-
-        return alarms
+        return [alarm for _index, alarm in alarm_entries(alarms_info)]
 
     async def get_nb_alarms(self):
         """Get the target temperature."""
         return (await self.get_info()).get("nvm").get("alarms_log").get("index")
 
-    async def enable_standby_mode(self):
-        """Set the standby mode."""
-        if not await self.is_auto():
-            raise NotInRightState("Standby mode is only available from auto mode.")
+    async def enable_standby_mode(self, is_auto: bool | None = None):
+        """
+        Set the standby mode.
 
+        `is_auto` is the auto mode already known by the caller, the device
+        is only fetched when it is None.
+        """
+        await self._check_standby_available(is_auto)
         await self.execute_command({"name": "standby_mode", "value": True})
 
-    async def disable_standby_mode(self):
-        """Set the standby mode."""
-        if not await self.is_auto():
-            raise NotInRightState("Standby mode is only available from auto mode.")
-
+    async def disable_standby_mode(self, is_auto: bool | None = None):
+        """Unset the standby mode, see enable_standby_mode."""
+        await self._check_standby_available(is_auto)
         await self.execute_command({"name": "standby_mode", "value": False})
 
+    async def _check_standby_available(self, is_auto: bool | None) -> None:
+        """Raise NotInRightState if the device is not in auto mode."""
+        if is_auto is None:
+            is_auto = await self.is_auto()
+        if not is_auto:
+            raise NotInRightState("Standby mode is only available from auto mode.")
+
     async def is_auto(self):
         """Check if the device is in auto mode."""
         return (await self.get_info()).get("nvm").get("user_parameters").get("is_auto")
@@ -215,36 +277,234 @@ class EdilkaminAsyncApi:
         await self.execute_command({"name": "power_level", "value": value})
 
     async def get_token(self):
-        return await self._hass.async_add_executor_job(edilkamin.sign_in, self._username, self._password)
+        """Get a valid token, signing in only when the cached one expired."""
+        return await self._token_manager.async_get_token()
 
-    async def get_info(self):
+    async def async_shutdown(self) -> None:
+        """Send the queued commands, then release the resources held by the api."""
+        await self._command_queue.async_shutdown()
+        if self._owns_session:
+            self._session.async_shutdown()
+
+    async def get_info(self, use_cache: bool = True):
         """
         Get the device information.
+
+        A snapshot younger than INFO_CACHE_TTL is returned from the cache,
+        unless `use_cache` is False. Concurrent callers share the same
+        in-flight fetch.
         """
-        token = await self.get_token()
-        return await self._hass.async_add_executor_job(
-            edilkamin.device_info,
-            token,
-            self._mac_address
-        )
+        if (
+            use_cache
+            and self._info is not None
+            and time.monotonic() - self._info_time < INFO_CACHE_TTL
+        ):
+            return self._info
+
+        if self._info_task is None or self._info_task.done():
+            self._info_task = self._hass.async_create_task(
+                self._async_fetch_info(), "edilkamin device info"
+            )
+        return await asyncio.shield(self._info_task)
+
+    @callback
+    def invalidate_info(self) -> None:
+        """Drop the cached snapshot, and ignore the fetch in flight."""
+        self._info = None
+        self._info_task = None
+        self._info_generation += 1
+
+    @callback
+    def async_add_command_listener(
+        self, listener: typing.Callable[[list[typing.Dict]], None]
+    ) -> CALLBACK_TYPE:
+        """Listen for the commands accepted by the cloud, a batch at a time."""
+        self._command_listeners.append(listener)
+
+        @callback
+        def remove_listener() -> None:
+            self._command_listeners.remove(listener)
+
+        return remove_listener
+
+    @callback
+    def async_add_failed_command_listener(
+        self, listener: typing.Callable[[list[typing.Dict]], None]
+    ) -> CALLBACK_TYPE:
+        """Listen for the queued commands the cloud did not accept, a batch at a time."""
+        self._failed_command_listeners.append(listener)
+
+        @callback
+        def remove_listener() -> None:
+            self._failed_command_listeners.remove(listener)
+
+        return remove_listener
+
+    async def send_command(self, payload: typing.Dict, coalesce: bool = False):
+        """
+        Send the command now, or queue it when `coalesce` is True.
 
+        Queued commands are coalesced per name, only the last value is sent
+        once the queue stayed idle for the configured delay.
+        """
+        if coalesce:
+            self._command_queue.async_enqueue(payload)
+            return None
+        return await self.execute_command(payload)
 
     async def execute_command(self, payload: typing.Dict) -> str:
         """
         Execute the command.
         """
-        token = await self.get_token()
+        # The command sent now supersedes a queued one with the same name.
+        self._command_queue.async_discard(payload["name"])
+        return await self._async_execute_command(payload)
+
+    async def execute_commands(
+        self, payloads: list[typing.Dict]
+    ) -> list[CommandResult]:
+        """
+        Execute a batch of commands, in order, with the same token.
+
+        The batch stops at the first failed command, the next ones are
+        reported as skipped. The listeners are notified once, with the
+        commands the cloud accepted.
+        """
+        for payload in payloads:
+            self._command_queue.async_discard(payload["name"])
+        return await self._async_execute_commands(payloads, stop_on_error=True)
+
+    async def _async_execute_command(self, payload: typing.Dict) -> str:
+        """Send the command and drop the snapshot it makes outdated."""
         _LOGGER.debug("Execute command with payload = %s", payload)
-        return await self._hass.async_add_executor_job(
-            edilkamin.mqtt_command,
-            token,
-            self._mac_address,
-            payload
-        )
+        try:
+            result = await self._async_call(
+                self._transport.mqtt_command, self._mac_address, payload
+            )
+        finally:
+            self.invalidate_info()
 
+        self._notify_command_listeners([payload])
+        return result
 
+    async def _async_flush_commands(
+        self, payloads: list[typing.Dict]
+    ) -> list[CommandResult]:
+        """
+        Send the commands coalesced by the queue, they do not depend on each other.
 
+        Nobody waits for the queued commands, the failed ones are reported
+        to the failed command listeners.
+        """
+        try:
+            results = await self._async_execute_commands(payloads, stop_on_error=False)
+        except Exception:
+            self._notify_failed_command_listeners(payloads)
+            raise
+
+        failed = [result.payload for result in results if result.status != COMMAND_SENT]
+        if failed:
+            self._notify_failed_command_listeners(failed)
+        return results
+
+    async def _async_execute_commands(
+        self, payloads: list[typing.Dict], stop_on_error: bool
+    ) -> list[CommandResult]:
+        """Send the commands and drop the snapshot they make outdated."""
+        results: list[CommandResult] = []
+        try:
+            token = await self.get_token()
+            for payload in payloads:
+                if stop_on_error and any(
+                    result.status != COMMAND_SENT for result in results
+                ):
+                    results.append(CommandResult(payload, COMMAND_SKIPPED))
+                    continue
+
+                _LOGGER.debug("Execute command with payload = %s", payload)
+                try:
+                    result, token = await self._async_call_with_token(
+                        token, self._transport.mqtt_command, self._mac_address, payload
+                    )
+                except Exception as err:  # noqa: BLE001
+                    _LOGGER.error("Error sending command %s: %s", payload, err)
+                    results.append(CommandResult(payload, COMMAND_FAILED, error=err))
+                else:
+                    results.append(CommandResult(payload, COMMAND_SENT, result))
+        finally:
+            self.invalidate_info()
+
+        sent = [result.payload for result in results if result.status == COMMAND_SENT]
+        if sent:
+            self._notify_command_listeners(sent)
+        return results
+
+    @callback
+    def _notify_command_listeners(self, payloads: list[typing.Dict]) -> None:
+        """Notify the listeners of the commands accepted by the cloud."""
+        for listener in list(self._command_listeners):
+            listener(payloads)
+
+    @callback
+    def _notify_failed_command_listeners(self, payloads: list[typing.Dict]) -> None:
+        """Notify the listeners of the queued commands that failed."""
+        for listener in list(self._failed_command_listeners):
+            listener(payloads)
+
+    async def _async_fetch_info(self) -> typing.Dict:
+        """Fetch the device information and cache it."""
+        generation = self._info_generation
+        info = await self._async_call(self._transport.device_info, self._mac_address)
+        # A command sent meanwhile makes this snapshot outdated.
+        if generation == self._info_generation:
+            self._info = info
+            self._info_time = time.monotonic()
+        return info
+
+    @property
+    def session(self) -> EdilkaminSession:
+        """Get the session, shared with the other stoves of the account."""
+        return self._session
+
+    @property
+    def sign_ins_last_hour(self) -> int:
+        """Get the number of sign-ins done during the last hour."""
+        return self._token_manager.sign_ins_last_hour
+
+    async def _async_call(self, method, *args):
+        """
+        Call a transport method with a valid token.
 
+        If the cloud rejects the token, sign in again and retry once.
+        """
+        result, _token = await self._async_call_with_token(
+            await self.get_token(), method, *args
+        )
+        return result
+
+    async def _async_call_with_token(self, token: str, method, *args):
+        """Call a transport method with `token`, return the result and the token used."""
+        try:
+            return await method(token, *args), token
+        except Exception as err:
+            if not is_auth_error(err):
+                raise
+            _LOGGER.debug("Token rejected by the Edilkamin cloud: %s", err)
+            self._token_manager.invalidate(token)
+
+        token = await self.get_token()
+        return await method(token, *args), token
+
+
+def is_auth_error(err: Exception) -> bool:
+    """Return True if the error means the credentials or token were rejected."""
+    if type(err).__name__ == "NotAuthorizedException":
+        return True
+    # requests.HTTPError carries the response, aiohttp.ClientResponseError
+    # carries the status itself.
+    response = getattr(err, "response", None)
+    status = getattr(response, "status_code", getattr(err, "status", None))
+    return status in (401, 403)
 
 
 class HttpException(Exception):
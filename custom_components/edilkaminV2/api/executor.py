@@ -0,0 +1,65 @@
+"""Edilkamin executor."""
+
+from __future__ import annotations
+
+import asyncio
+from concurrent.futures import Future, ThreadPoolExecutor
+import logging
+import typing
+
+_LOGGER = logging.getLogger(__name__)
+
+# Number of threads of an account, the calls beyond it wait for a free one.
+MAX_WORKERS = 2
+
+_T = typing.TypeVar("_T")
+
+
+class EdilkaminExecutor:
+    """
+    Run the blocking Edilkamin calls of an account in their own threads.
+
+    The pool is bounded, so calls left running after their caller gave up,
+    for instance on a timeout while the cloud is slow, pile up here instead
+    of taking the threads of the Home Assistant executor from the other
+    integrations.
+    """
+
+    def __init__(self, max_workers: int = MAX_WORKERS) -> None:
+        """Initialize the class."""
+        self._pool = ThreadPoolExecutor(max_workers, thread_name_prefix="edilkamin")
+        self._running: set[Future] = set()
+        self._orphans: set[Future] = set()
+        self.orphaned_total = 0
+
+    @property
+    def in_flight(self) -> int:
+        """Return the number of calls running or waiting for a thread."""
+        return len(self._running) + self.orphaned
+
+    @property
+    def orphaned(self) -> int:
+        """Return the number of calls still running after their caller gave up."""
+        self._orphans = {future for future in self._orphans if not future.done()}
+        return len(self._orphans)
+
+    async def async_run(self, func: typing.Callable[..., _T], *args) -> _T:
+        """Run `func` in the pool and return its result."""
+        future = self._pool.submit(func, *args)
+        self._running.add(future)
+        try:
+            return await asyncio.wrap_future(future)
+        except asyncio.CancelledError:
+            # A call still waiting for a thread is dropped with its caller,
+            # a running one cannot be interrupted and finishes on its own.
+            if not future.cancelled():
+                _LOGGER.debug("Edilkamin call %s orphaned", func.__name__)
+                self._orphans.add(future)
+                self.orphaned_total += 1
+            raise
+        finally:
+            self._running.discard(future)
+
+    def shutdown(self) -> None:
+        """Drop the waiting calls, the running ones finish in the background."""
+        self._pool.shutdown(wait=False, cancel_futures=True)
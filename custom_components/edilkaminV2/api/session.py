@@ -0,0 +1,39 @@
+"""Edilkamin session."""
+
+from __future__ import annotations
+
+from homeassistant.core import HomeAssistant, callback
+
+from ..const import DEFAULT_TRANSPORT
+from .circuit_breaker import CircuitBreaker
+from .executor import EdilkaminExecutor
+from .token_manager import TokenManager
+from .transport import create_transport
+
+
+class EdilkaminSession:
+    """
+    Token, transport, executor and circuit breaker of an Edilkamin account.
+
+    The stoves of the same account share the session, so they sign in once,
+    reuse the same connection pool and threads, and back off together.
+    """
+
+    def __init__(
+        self,
+        hass: HomeAssistant,
+        username: str,
+        password: str,
+        transport: str = DEFAULT_TRANSPORT,
+    ) -> None:
+        """Initialize the class."""
+        self.breaker = CircuitBreaker()
+        self.executor = EdilkaminExecutor()
+        self.token_manager = TokenManager(hass, username, password, self.executor)
+        self.transport = create_transport(hass, transport, self.executor)
+
+    @callback
+    def async_shutdown(self) -> None:
+        """Release the resources held by the session."""
+        self.token_manager.async_shutdown()
+        self.executor.shutdown()
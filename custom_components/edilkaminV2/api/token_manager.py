@@ -0,0 +1,160 @@
+"""Edilkamin token manager."""
+
+from __future__ import annotations
+
+import asyncio
+import base64
+from collections import deque
+import json
+import logging
+import time
+
+from homeassistant.core import CALLBACK_TYPE, HomeAssistant, callback
+from homeassistant.helpers.event import async_call_later
+
+from .executor import EdilkaminExecutor
+from .transport import sign_in
+
+_LOGGER = logging.getLogger(__name__)
+
+# A token is no longer handed out this many seconds before it expires.
+TOKEN_EXPIRY_MARGIN = 300
+# The background refresh runs this many seconds before the margin is reached.
+TOKEN_REFRESH_AHEAD = 60
+# Lifetime assumed when the expiry cannot be read from the token.
+TOKEN_DEFAULT_LIFETIME = 3600
+# Window used to count the recent sign-ins.
+SIGN_IN_WINDOW = 3600
+
+
+def decode_token_expiry(token: str) -> float | None:
+    """Return the `exp` claim of a JWT, without verifying its signature."""
+    try:
+        payload = token.split(".")[1]
+        payload += "=" * (-len(payload) % 4)
+        return float(json.loads(base64.urlsafe_b64decode(payload))["exp"])
+    except (AttributeError, IndexError, KeyError, TypeError, ValueError):
+        return None
+
+
+class TokenManager:
+    """
+    Keep an Edilkamin access token and sign in only when it is needed.
+    """
+
+    def __init__(
+        self,
+        hass: HomeAssistant,
+        username: str,
+        password: str,
+        executor: EdilkaminExecutor,
+    ) -> None:
+        """Initialize the class."""
+        self._hass = hass
+        self._username = username
+        self._password = password
+        self._executor = executor
+
+        self._token: str | None = None
+        self._expires_at = 0.0
+        self._sign_in_task: asyncio.Task | None = None
+        self._unsub_refresh: CALLBACK_TYPE | None = None
+        self._sign_ins: deque[float] = deque()
+        self.sign_in_count = 0
+
+    @property
+    def token_valid(self) -> bool:
+        """Return True if the cached token can still be used."""
+        return (
+            self._token is not None
+            and time.time() < self._expires_at - TOKEN_EXPIRY_MARGIN
+        )
+
+    @property
+    def expires_at(self) -> float:
+        """Return the expiry timestamp of the cached token."""
+        return self._expires_at
+
+    @property
+    def sign_ins_last_hour(self) -> int:
+        """Return the number of sign-ins done during the last hour."""
+        limit = time.monotonic() - SIGN_IN_WINDOW
+        while self._sign_ins and self._sign_ins[0] < limit:
+            self._sign_ins.popleft()
+        return len(self._sign_ins)
+
+    async def async_get_token(self) -> str:
+        """Return a valid token, signing in only if the cached one expired."""
+        if self.token_valid:
+            return self._token
+        return await self.async_sign_in()
+
+    async def async_sign_in(self) -> str:
+        """Sign in, sharing a single in-flight sign-in between all callers."""
+        if self._sign_in_task is None or self._sign_in_task.done():
+            self._sign_in_task = self._hass.async_create_task(
+                self._async_sign_in(), "edilkamin sign in"
+            )
+        # Shield the shared task so a cancelled caller does not cancel it
+        # for the others.
+        return await asyncio.shield(self._sign_in_task)
+
+    @callback
+    def invalidate(self, token: str | None = None) -> None:
+        """
+        Forget the cached token, the next call will sign in again.
+
+        When `token` is given, the cache is only dropped if it still holds
+        that token, so a token refreshed meanwhile by another caller is kept.
+        """
+        if token is not None and token != self._token:
+            return
+        self._token = None
+        self._expires_at = 0.0
+
+    @callback
+    def async_shutdown(self) -> None:
+        """Cancel the scheduled background refresh."""
+        if self._unsub_refresh is not None:
+            self._unsub_refresh()
+            self._unsub_refresh = None
+
+    async def _async_sign_in(self) -> str:
+        """Sign in and schedule the next refresh."""
+        _LOGGER.debug("Sign in to the Edilkamin cloud")
+        self._sign_ins.append(time.monotonic())
+        self.sign_in_count += 1
+        token = await self._executor.async_run(
+            sign_in, self._username, self._password
+        )
+        expires_at = decode_token_expiry(token)
+        if expires_at is None:
+            expires_at = time.time() + TOKEN_DEFAULT_LIFETIME
+        self._token = token
+        self._expires_at = expires_at
+        self._schedule_refresh()
+        return token
+
+    @callback
+    def _schedule_refresh(self) -> None:
+        """Schedule a sign-in shortly before the token stops being handed out."""
+        self.async_shutdown()
+        delay = self._expires_at - TOKEN_EXPIRY_MARGIN - TOKEN_REFRESH_AHEAD
+        self._unsub_refresh = async_call_later(
+            self._hass, max(delay - time.time(), 0), self._handle_refresh
+        )
+
+    @callback
+    def _handle_refresh(self, _now) -> None:
+        """Refresh the token in the background."""
+        self._unsub_refresh = None
+        self._hass.async_create_background_task(
+            self._async_background_refresh(), "edilkamin token refresh"
+        )
+
+    async def _async_background_refresh(self) -> None:
+        """Sign in ahead of expiry, callers fall back to an on-demand sign-in."""
+        try:
+            await self.async_sign_in()
+        except Exception as err:  # noqa: BLE001
+            _LOGGER.debug("Background token refresh failed: %s", err)
@@ -0,0 +1,166 @@
+"""Edilkamin transports."""
+
+from __future__ import annotations
+
+import typing
+
+import aiohttp
+from homeassistant.core import HomeAssistant
+from homeassistant.helpers.aiohttp_client import async_get_clientsession
+
+from ..const import API_URL, TRANSPORT_AIOHTTP
+from .executor import EdilkaminExecutor
+
+# Deadline, in seconds, of a single request to the Edilkamin cloud.
+REQUEST_TIMEOUT = 10
+
+
+def format_mac(mac: str) -> str:
+    """Format a MAC address the way the Edilkamin cloud expects it."""
+    return mac.replace(":", "").lower()
+
+
+def get_headers(token: str) -> typing.Dict:
+    """Get the headers of an authenticated request."""
+    return {"Authorization": f"Bearer {token}"}
+
+
+def sign_in(username: str, password: str, timeout: float = REQUEST_TIMEOUT) -> str:
+    """Sign in to the Edilkamin cloud, from the executor."""
+    # edilkamin pulls pycognito and boto3, import them on first use rather
+    # than when Home Assistant loads the integration.
+    # pylint: disable=import-outside-toplevel
+    from botocore.config import Config
+    from edilkamin import constants
+    from pycognito import Cognito
+
+    # Same as edilkamin.sign_in, with deadlines on the sockets of boto3.
+    cognito = Cognito(
+        constants.USER_POOL_ID,
+        constants.CLIENT_ID,
+        username=username,
+        botocore_config=Config(
+            connect_timeout=timeout, read_timeout=timeout, retries={"max_attempts": 0}
+        ),
+    )
+    cognito.authenticate(password)
+    return cognito.get_user()._metadata["access_token"]
+
+
+def _device_info(
+    base_url: str, token: str, mac_address: str, timeout: float
+) -> typing.Dict:
+    """Get the device information, from the executor."""
+    import requests  # pylint: disable=import-outside-toplevel
+
+    # Same as edilkamin.device_info, which does not set a timeout.
+    response = requests.get(
+        f"{base_url}device/{format_mac(mac_address)}/info",
+        headers=get_headers(token),
+        timeout=timeout,
+    )
+    response.raise_for_status()
+    return response.json()
+
+
+def _mqtt_command(
+    base_url: str, token: str, mac_address: str, payload: typing.Dict, timeout: float
+) -> str:
+    """Send a MQTT command to the device, from the executor."""
+    import requests  # pylint: disable=import-outside-toplevel
+
+    # Same as edilkamin.mqtt_command, which does not set a timeout.
+    response = requests.put(
+        f"{base_url}mqtt/command",
+        headers=get_headers(token),
+        json={"mac_address": format_mac(mac_address), **payload},
+        timeout=timeout,
+    )
+    response.raise_for_status()
+    return response.json()
+
+
+class ExecutorTransport:
+    """
+    Call the blocking Edilkamin cloud requests from the executor of the account.
+    """
+
+    def __init__(
+        self,
+        executor: EdilkaminExecutor,
+        base_url: str = API_URL,
+        timeout: float = REQUEST_TIMEOUT,
+    ) -> None:
+        """Initialize the class."""
+        self._executor = executor
+        self._base_url = base_url
+        self._timeout = timeout
+
+    async def device_info(self, token: str, mac_address: str) -> typing.Dict:
+        """Get the device information."""
+        return await self._executor.async_run(
+            _device_info, self._base_url, token, mac_address, self._timeout
+        )
+
+    async def mqtt_command(
+        self, token: str, mac_address: str, payload: typing.Dict
+    ) -> str:
+        """Send a MQTT command to the device."""
+        return await self._executor.async_run(
+            _mqtt_command,
+            self._base_url,
+            token,
+            mac_address,
+            payload,
+            self._timeout,
+        )
+
+
+class AiohttpTransport:
+    """
+    Call the Edilkamin cloud with an aiohttp session.
+
+    The session keeps its connections alive, so the polls and commands of a
+    stove reuse the same TLS connection instead of opening a new one.
+    """
+
+    def __init__(
+        self,
+        session: aiohttp.ClientSession,
+        base_url: str = API_URL,
+        timeout: float = REQUEST_TIMEOUT,
+    ) -> None:
+        """Initialize the class."""
+        self._session = session
+        self._base_url = base_url
+        self._timeout = aiohttp.ClientTimeout(total=timeout)
+
+    async def device_info(self, token: str, mac_address: str) -> typing.Dict:
+        """Get the device information."""
+        async with self._session.get(
+            f"{self._base_url}device/{format_mac(mac_address)}/info",
+            headers=get_headers(token),
+            timeout=self._timeout,
+        ) as response:
+            response.raise_for_status()
+            return await response.json(content_type=None)
+
+    async def mqtt_command(
+        self, token: str, mac_address: str, payload: typing.Dict
+    ) -> str:
+        """Send a MQTT command to the device."""
+        async with self._session.put(
+            f"{self._base_url}mqtt/command",
+            headers=get_headers(token),
+            json={"mac_address": format_mac(mac_address), **payload},
+            timeout=self._timeout,
+        ) as response:
+            response.raise_for_status()
+            return await response.json(content_type=None)
+
+
+def create_transport(hass: HomeAssistant, mode: str, executor: EdilkaminExecutor):
+    """Create the transport selected in the options."""
+    if mode == TRANSPORT_AIOHTTP:
+        return AiohttpTransport(async_get_clientsession(hass))
+    return ExecutorTransport(executor)
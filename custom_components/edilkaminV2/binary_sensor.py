@@ -1,84 +1,119 @@
 """Platform for sensor integration."""
 from __future__ import annotations
 
+from dataclasses import dataclass
+from datetime import datetime
 import logging
+import time
 from homeassistant.components.binary_sensor import (
     BinarySensorEntity,
+    BinarySensorEntityDescription,
     BinarySensorDeviceClass,
 )
-from homeassistant.helpers.aiohttp_client import async_get_clientsession
+from homeassistant.core import callback
+from homeassistant.helpers import entity_platform
+from homeassistant.util import dt as dt_util
 
-from .const import DOMAIN
-from custom_components.edilkaminv2.api.edilkamin_async_api import EdilkaminAsyncApi
-from homeassistant.helpers.update_coordinator import CoordinatorEntity
+from .const import CONF_CHECK_INTERVAL, DEFAULT_CHECK_INTERVAL
+from .entity import EdilkaminEntity
+from .snapshot import compile_accessor
 
 _LOGGER = logging.getLogger(__name__)
 
+SERVICE_CHECK = "check"
+
+
+@dataclass(frozen=True, kw_only=True)
+class EdilkaminBinarySensorEntityDescription(BinarySensorEntityDescription):
+    """Describe an Edilkamin binary sensor read from the snapshot."""
+
+    field: str
+
+
+# The key of a description is the suffix of the unique_id of its sensor.
+BINARY_SENSOR_TYPES: tuple[EdilkaminBinarySensorEntityDescription, ...] = (
+    EdilkaminBinarySensorEntityDescription(
+        key="tank_binary_sensor",
+        name="Tank",
+        icon="mdi:storage-tank",
+        device_class=BinarySensorDeviceClass.PROBLEM,
+        field="pellet_in_reserve",
+    ),
+)
+
 
 async def async_setup_entry(hass, config_entry, async_add_devices):
     """Add sensors for passed config_entry in HA."""
-    coordinator = hass.data[DOMAIN]["coordinator"]
-    async_api = hass.data[DOMAIN][config_entry.entry_id]
+    coordinator = config_entry.runtime_data
+    check_interval = config_entry.options.get(
+        CONF_CHECK_INTERVAL, DEFAULT_CHECK_INTERVAL
+    )
 
     async_add_devices(
         [
-            EdilkaminTankBinarySensor(coordinator),
-            EdilkaminCheckBinarySensor(async_api),
+            *(
+                EdilkaminBinarySensor(coordinator, description)
+                for description in BINARY_SENSOR_TYPES
+            ),
+            EdilkaminCheckBinarySensor(coordinator, check_interval),
         ]
     )
 
+    platform = entity_platform.async_get_current_platform()
+    platform.async_register_entity_service(SERVICE_CHECK, None, "async_check")
+
 
-class EdilkaminTankBinarySensor(CoordinatorEntity, BinarySensorEntity):
+class EdilkaminBinarySensor(EdilkaminEntity, BinarySensorEntity):
     """Representation of a Sensor."""
 
-    def __init__(self, coordinator) -> None:
+    entity_description: EdilkaminBinarySensorEntityDescription
+
+    def __init__(
+        self, coordinator, description: EdilkaminBinarySensorEntityDescription
+    ) -> None:
         """Initialize the sensor."""
         super().__init__(coordinator)
-        self._state = None
+        self.entity_description = description
         self._mac_address = self.coordinator.get_mac_address()
-        self._attr_icon = "mdi:storage-tank"
+        self._value = compile_accessor(description.field)
+        self._snapshot_fields = frozenset({description.field})
 
-        self._attr_name = "Tank"
+        self._attr_unique_id = f"{self._mac_address}_{description.key}"
         self._attr_device_info = {"identifiers": {("edilkaminv2", self._mac_address)}}
 
-    @property
-    def is_on(self):
-        """Return True if the binary sensor is on."""
-        return self._state
-
-    @property
-    def device_class(self):
-        """Return the class of the binary sensor."""
-        return BinarySensorDeviceClass.PROBLEM
-
-    @property
-    def unique_id(self):
-        """Return a unique_id for this entity."""
-        return f"{self._mac_address}_tank_binary_sensor"
-
-    def _handle_coordinator_update(self) -> None:
+    def _async_update_attrs(self) -> None:
         """Fetch new state data for the sensor."""
-        self._state = self.coordinator.get_status_tank()
-        self.async_write_ha_state()
+        self._attr_is_on = self._value(self.coordinator.data)
 
 
-class EdilkaminCheckBinarySensor(BinarySensorEntity):
-    """Representation of a Sensor."""
+class EdilkaminCheckBinarySensor(EdilkaminEntity, BinarySensorEntity):
+    """
+    Representation of a Sensor.
 
-    def __init__(self, api: EdilkaminAsyncApi)-> None:
+    The problem is derived from the outcome of the polls and of the commands,
+    a check command is only sent to the stove through the check service, at
+    most once per check interval unless the last one failed. A failed check
+    is cleared by the next successful poll.
+    """
+
+    def __init__(self, coordinator, check_interval: int) -> None:
         """Initialize the sensor."""
-        self._state = None
-        self._api = api
-        self._mac_address = self._api.get_mac_address()
+        super().__init__(coordinator)
+        self._check_interval = check_interval
+        self._last_check: float | None = None
+        self._check_failed = False
+        # Time of the failed check, for the next successful poll to clear it.
+        self._check_failed_at: datetime | None = None
+        self._mac_address = self.coordinator.get_mac_address()
 
         self._attr_name = "Check configuration"
         self._attr_device_info = {"identifiers": {("edilkaminv2", self._mac_address)}}
         self._attr_icon = "mdi:check-circle"
 
     @property
-    def is_on(self):
-        """Return True if the binary sensor is on."""
-        return self._state
+    def available(self) -> bool:
+        """Return True, a failed poll is a problem reported by the sensor."""
+        return True
 
     @property
     def device_class(self):
@@ -90,16 +125,61 @@ class EdilkaminCheckBinarySensor(BinarySensorEntity):
         """Return a unique_id for this entity."""
         return f"{self._mac_address}_check_binary_sensor"
 
-    async def async_update(self) -> None:
-        """Fetch new state data for the sensor."""
-        try:
-            await self._api.check()
-            self._state = False
-            self.async_write_ha_state()
-        except Exception as err:
-            _LOGGER.error("Exception type: %s", err)
-            _LOGGER.error("Exception message: %s", err)
-            self._state = True
-            _LOGGER.error(str(err))
+    def _is_problem(self) -> bool:
+        """Return True if the last poll, command or check failed."""
+        return (
+            not self.coordinator.last_update_success
+            or self.coordinator.command_failed
+            or self._check_failed
+        )
+
+    async def async_added_to_hass(self) -> None:
+        """Read the outcome of the first poll."""
+        await super().async_added_to_hass()
+        self._attr_is_on = self._is_problem()
+        # The polls reporting the same data do not notify the entities.
+        self.async_on_remove(
+            self.coordinator.async_add_poll_listener(self._handle_coordinator_update)
+        )
+
+    @callback
+    def _handle_coordinator_update(self) -> None:
+        """Write the state when the problem appeared or disappeared."""
+        last_poll = self.coordinator.last_successful_poll
+        if (
+            self._check_failed
+            and last_poll is not None
+            and last_poll > self._check_failed_at
+        ):
+            self._check_failed = False
+        is_problem = self._is_problem()
+        if is_problem != self._attr_is_on:
+            self._attr_is_on = is_problem
             self.async_write_ha_state()
-            
+
+    async def async_check(self) -> None:
+        """Send a check command to the stove, unless one was sent recently."""
+        now = time.monotonic()
+        if (
+            not self._check_failed
+            and self._last_check is not None
+            and now - self._last_check < self._check_interval
+        ):
+            _LOGGER.debug(
+                "Check skipped, the last one was sent %.0f seconds ago",
+                now - self._last_check,
+            )
+            return
+
+        self._last_check = now
+        try:
+            await self.coordinator.api.check()
+            self._check_failed = False
+        except Exception as err:  # noqa: BLE001
+            _LOGGER.error("Check of the stove failed: %s", err)
+            self._check_failed = True
+        checked_at = dt_util.utcnow()
+        self._check_failed_at = checked_at if self._check_failed else None
+        self._attr_is_on = self._is_problem()
+        self._attr_extra_state_attributes = {"last_check": checked_at}
+        self.async_write_ha_state()
@@ -9,13 +9,14 @@ from homeassistant.components.climate import (
 )
 from homeassistant.const import UnitOfTemperature, ATTR_TEMPERATURE
 
-from .const import DOMAIN
+from .entity import EdilkaminEntity
 from custom_components.edilkaminv2.api.edilkamin_async_api import (
+    COMMAND_SENT,
     EdilkaminAsyncApi,
     HttpException,
 )
 from homeassistant.core import HomeAssistant
-from homeassistant.helpers.update_coordinator import CoordinatorEntity
+from homeassistant.exceptions import HomeAssistantError
 
 _LOGGER = logging.getLogger(__name__)
 
@@ -40,15 +41,27 @@ PRESET_MODE_TO_POWER = {
 
 async def async_setup_entry(hass: HomeAssistant, config_entry, async_add_devices):
     """Add sensors for passed config_entry in HA."""
-    coordinator = hass.data[DOMAIN]["coordinator"]
-    async_api = hass.data[DOMAIN][config_entry.entry_id]
+    coordinator = config_entry.runtime_data
+    async_api = coordinator.api
 
     async_add_devices([EdilkaminClimateEntity(async_api, coordinator)])
 
 
-class EdilkaminClimateEntity(CoordinatorEntity, ClimateEntity):
+class EdilkaminClimateEntity(EdilkaminEntity, ClimateEntity):
     """Representation of a Climate."""
 
+    _snapshot_fields = frozenset(
+        {
+            "temperature",
+            "target_temperature",
+            "power_setpoint",
+            "fan_1_setpoint",
+            "fan_2_setpoint",
+            "power",
+            "auto",
+        }
+    )
+
     def __init__(self, api: EdilkaminAsyncApi, coordinator) -> None:
         """Initialize the climate."""
         super().__init__(coordinator)
@@ -145,39 +158,54 @@ class EdilkaminClimateEntity(CoordinatorEntity, ClimateEntity):
     async def async_set_preset_mode(self, preset_mode) -> None:
         """Set the preset mode of the power"""
         if preset_mode == PRESET_AUTO:
-            await self.api.enable_auto_mode()
+            await self._async_execute_commands([{"name": "auto_mode", "value": True}])
         else:
-            await self.api.disable_auto_mode()
-            await self.api.set_manual_power_level(PRESET_MODE_TO_POWER[preset_mode])
-        await self.coordinator.async_refresh()
+            await self._async_execute_commands(
+                [
+                    {"name": "auto_mode", "value": False},
+                    {"name": "power_level", "value": PRESET_MODE_TO_POWER[preset_mode]},
+                ]
+            )
+
+    async def _async_execute_commands(self, payloads: list[dict]) -> None:
+        """Send the commands in one batch, and raise if one of them failed."""
+        for result in await self.api.execute_commands(payloads):
+            if result.status != COMMAND_SENT:
+                raise HomeAssistantError(
+                    f"Command {result.payload['name']} {result.status}: {result.error}"
+                )
 
     async def async_set_fan_mode(self, fan_mode):
         """Set new target fan mode."""
-        # self._attr_fan1_speed = str(fan_mode)
-        
-        await self.api.set_fan_1_speed(int(fan_mode))
-        await self.coordinator.async_refresh()
+        # Sent once the queue is idle, keep the requested mode meanwhile. The
+        # coordinator has the entity read the polled mode again if it fails.
+        self._attr_fan1_speed = str(fan_mode)
+        await self.api.set_fan_1_speed(int(fan_mode), coalesce=True)
+        self.async_write_ha_state()
     
     async def async_set_fan2_mode(self, fan_mode):
         """Set new target fan mode."""
-        await self.api.set_fan_2_speed(int(fan_mode))
-        await self.coordinator.async_refresh()
+        self._attr_fan2_speed = str(fan_mode)
+        await self.api.set_fan_2_speed(int(fan_mode), coalesce=True)
+        self.async_write_ha_state()
 
     async def async_set_temperature(self, **kwargs):
         """Set new target temperature."""
         if kwargs.get(ATTR_TEMPERATURE) is not None:
             target_tmp = kwargs.get(ATTR_TEMPERATURE)
-            await self.api.set_temperature(target_tmp)
-        await self.coordinator.async_refresh()
+            self._attr_target_temperature = target_tmp
+            await self.api.set_temperature(target_tmp, coalesce=True)
+        self.async_write_ha_state()
 
 
 
-    def _handle_coordinator_update(self) -> None:   
+    def _async_update_attrs(self) -> None:
         """Fetch new state data for the sensor."""
         self._attr_current_temperature  = self.coordinator.get_temperature()
         self._attr_target_temperature  = self.coordinator.get_target_temperature()
         self._attr_preset_mode = str(self.coordinator.get_power_actual_setpoint())
         self._attr_fan1_speed = str(self.coordinator.get_fan_1_actual_setpoint())
+        self._attr_fan2_speed = str(self.coordinator.get_fan_2_actual_setpoint())
         
         power = self.coordinator.get_power_status()
         if power is True:
@@ -191,7 +219,6 @@ class EdilkaminClimateEntity(CoordinatorEntity, ClimateEntity):
             manual_power = self.coordinator.get_manual_power()
             self._attr_preset_mode = PRESET_MODES[manual_power]
 
-        self.async_write_ha_state()  
 
     # async def async_update(self) -> None:
     #     """Fetch new state data for the sensor."""
@@ -218,14 +245,11 @@ class EdilkaminClimateEntity(CoordinatorEntity, ClimateEntity):
         if hvac_mode not in CLIMATE_HVAC_MODE_MANAGED:
             raise ValueError(f"Unsupported HVAC mode: {hvac_mode}")
 
-        if hvac_mode == HVACMode.OFF:
-            await self.api.disable_power()
-
-        if hvac_mode == HVACMode.HEAT :
-            await self.api.enable_power()
+        await self._async_execute_commands(
+            [{"name": "power", "value": 1 if hvac_mode == HVACMode.HEAT else 0}]
+        )
 
         # _LOGGER.info("Setting operation mode to %s", hvac_mode)
-        await self.coordinator.async_refresh()
 
     async def async_turn_on(self):
         """Turn on."""
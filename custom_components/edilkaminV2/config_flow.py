@@ -6,6 +6,7 @@ import macaddress
 import voluptuous as vol
 
 from homeassistant import config_entries
+from homeassistant.core import callback
 from homeassistant.exceptions import HomeAssistantError
 ##from homeassistant.helpers.aiohttp_client import async_get_clientsession
 from custom_components.edilkaminv2.api.edilkamin_async_api import (
@@ -14,7 +15,27 @@ from custom_components.edilkaminv2.api.edilkamin_async_api import (
 )
 
 
-from .const import DOMAIN, MAC_ADDRESS, USERNAME, PASSWORD#
+from .const import (
+    CONF_CHECK_INTERVAL,
+    CONF_COMMAND_DELAY,
+    CONF_STATE_MAX_AGE,
+    CONF_UNAVAILABLE_AGE,
+    CONF_UNAVAILABLE_FAILURES,
+    CONF_TRANSPORT,
+    DEFAULT_CHECK_INTERVAL,
+    DEFAULT_COMMAND_DELAY,
+    DEFAULT_SCAN_INTERVALS,
+    DEFAULT_STATE_MAX_AGE,
+    DEFAULT_UNAVAILABLE_AGE,
+    DEFAULT_UNAVAILABLE_FAILURES,
+    DEFAULT_TRANSPORT,
+    DOMAIN,
+    MAC_ADDRESS,
+    PASSWORD,
+    TRANSPORT_AIOHTTP,
+    TRANSPORT_EXECUTOR,
+    USERNAME,
+)
 
 _LOGGER = logging.getLogger(__name__)
 
@@ -35,6 +56,11 @@ class ConfigFlow(config_entries.ConfigFlow, domain=DOMAIN):
     
     VERSION = 2
 
+    @staticmethod
+    @callback
+    def async_get_options_flow(config_entry):
+        """Get the options flow for this handler."""
+        return OptionsFlow()
 
     async def async_step_user(self, user_input):
         """Handle the initial step."""
@@ -78,6 +104,9 @@ class ConfigFlow(config_entries.ConfigFlow, domain=DOMAIN):
                     errors["base"] = "invalid_auth"
                 else:
                     errors["base"] = "unknown"
+            finally:
+                # Stop the threads of the session used for the check.
+                await api.async_shutdown()
 
 
         return self.async_show_form(
@@ -85,6 +114,54 @@ class ConfigFlow(config_entries.ConfigFlow, domain=DOMAIN):
         )
 
 
+class OptionsFlow(config_entries.OptionsFlow):
+    """Handle the options of Edilkamin."""
+
+    async def async_step_init(self, user_input=None):
+        """Manage the options."""
+        if user_input is not None:
+            return self.async_create_entry(data=user_input)
+
+        options = self.config_entry.options
+        scan_intervals = {
+            vol.Required(option, default=options.get(option, default)): vol.All(
+                vol.Coerce(int), vol.Range(min=5, max=3600)
+            )
+            for option, default in DEFAULT_SCAN_INTERVALS.items()
+        }
+        schema = vol.Schema(
+            {
+                vol.Required(
+                    CONF_TRANSPORT,
+                    default=options.get(CONF_TRANSPORT, DEFAULT_TRANSPORT),
+                ): vol.In([TRANSPORT_EXECUTOR, TRANSPORT_AIOHTTP]),
+                vol.Required(
+                    CONF_COMMAND_DELAY,
+                    default=options.get(CONF_COMMAND_DELAY, DEFAULT_COMMAND_DELAY),
+                ): vol.All(vol.Coerce(float), vol.Range(min=0, max=10)),
+                **scan_intervals,
+                vol.Required(
+                    CONF_CHECK_INTERVAL,
+                    default=options.get(CONF_CHECK_INTERVAL, DEFAULT_CHECK_INTERVAL),
+                ): vol.All(vol.Coerce(int), vol.Range(min=60, max=86400)),
+                vol.Required(
+                    CONF_STATE_MAX_AGE,
+                    default=options.get(CONF_STATE_MAX_AGE, DEFAULT_STATE_MAX_AGE),
+                ): vol.All(vol.Coerce(int), vol.Range(min=0, max=3600)),
+                vol.Required(
+                    CONF_UNAVAILABLE_FAILURES,
+                    default=options.get(
+                        CONF_UNAVAILABLE_FAILURES, DEFAULT_UNAVAILABLE_FAILURES
+                    ),
+                ): vol.All(vol.Coerce(int), vol.Range(min=1, max=100)),
+                vol.Required(
+                    CONF_UNAVAILABLE_AGE,
+                    default=options.get(CONF_UNAVAILABLE_AGE, DEFAULT_UNAVAILABLE_AGE),
+                ): vol.All(vol.Coerce(int), vol.Range(min=0, max=86400)),
+            }
+        )
+        return self.async_show_form(step_id="init", data_schema=schema)
+
 
 class InvalidMacAddress(HomeAssistantError):
     """Error to indicate there is invalid mac address."""
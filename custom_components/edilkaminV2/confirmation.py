@@ -0,0 +1,180 @@
+"""Confirmation of the commands sent to an Edilkamin stove."""
+
+from __future__ import annotations
+
+import logging
+import time
+import typing
+
+from homeassistant.core import CALLBACK_TYPE, HomeAssistant, callback
+from homeassistant.helpers.event import async_call_later
+
+from .const import COMMAND_STATE_PATHS
+
+_LOGGER = logging.getLogger(__name__)
+
+# Interval, in seconds, between the polls checking the pending commands.
+CONFIRM_INTERVAL = 3
+# Time, in seconds, the cloud has to report a command before it is failed.
+CONFIRM_TIMEOUT = 30
+
+STATUS_PENDING = "pending"
+STATUS_CONFIRMED = "confirmed"
+STATUS_FAILED = "failed"
+
+
+def get_path(info: dict, path: tuple):
+    """Return the entry of `info` at `path`, or None."""
+    for key in path:
+        if not isinstance(info, dict):
+            return None
+        info = info.get(key)
+    return info
+
+
+def replace_path(info: dict, path: tuple, value) -> dict:
+    """Return a copy of `info` with the entry at `path` replaced by `value`."""
+    key = path[0]
+    updated = dict(info)
+    if len(path) == 1:
+        updated[key] = value
+    else:
+        updated[key] = replace_path(info.get(key) or {}, path[1:], value)
+    return updated
+
+
+class CommandConfirmation:
+    """
+    Wait for the cloud to report the commands sent to a device.
+
+    While a command is pending, its value is laid over the polled data, and
+    the device is polled every CONFIRM_INTERVAL seconds until the cloud
+    reports the value or CONFIRM_TIMEOUT is reached. A failed command is
+    reported until the next successful poll.
+    """
+
+    def __init__(
+        self,
+        hass: HomeAssistant,
+        poll: typing.Callable[[], typing.Awaitable[None]],
+    ) -> None:
+        """Initialize the class."""
+        self._hass = hass
+        self._poll = poll
+        self._pending: dict[str, tuple[tuple, typing.Any, float]] = {}
+        self._unsub_poll: CALLBACK_TYPE | None = None
+        self.status: dict[str, str] = {}
+
+    @property
+    def pending(self) -> bool:
+        """Return True if a command waits for its confirmation."""
+        return bool(self._pending)
+
+    @callback
+    def async_track(self, payload: dict) -> bool:
+        """Track a command accepted by the cloud, return False if untracked."""
+        target = COMMAND_STATE_PATHS.get(payload["name"])
+        if target is None:
+            return False
+
+        path, convert = target
+        self._pending[payload["name"]] = (
+            path,
+            convert(payload["value"]),
+            time.monotonic() + CONFIRM_TIMEOUT,
+        )
+        self.status[payload["name"]] = STATUS_PENDING
+        self._schedule_poll()
+        return True
+
+    @callback
+    def async_fail(self, payload: dict) -> None:
+        """Mark a command the cloud did not accept as failed."""
+        if payload["name"] in COMMAND_STATE_PATHS:
+            self.status[payload["name"]] = STATUS_FAILED
+
+    @callback
+    def async_clear_failed(self) -> bool:
+        """
+        Forget the failed commands, once a poll shows the state of the cloud.
+
+        Return True if a command was failed.
+        """
+        failed = [
+            name for name, status in self.status.items() if status == STATUS_FAILED
+        ]
+        for name in failed:
+            del self.status[name]
+        return bool(failed)
+
+    @callback
+    def async_check(self, info: dict) -> bool:
+        """
+        Check the polled data against the pending commands.
+
+        Return True if a command was confirmed or failed.
+        """
+        now = time.monotonic()
+        changed = False
+        for name, (path, value, deadline) in list(self._pending.items()):
+            if get_path(info, path) == value:
+                _LOGGER.debug("Command %s confirmed", name)
+                self.status[name] = STATUS_CONFIRMED
+            elif now >= deadline:
+                _LOGGER.warning(
+                    "Command %s=%s was not confirmed by the cloud", name, value
+                )
+                self.status[name] = STATUS_FAILED
+            else:
+                continue
+            del self._pending[name]
+            changed = True
+
+        if not self._pending:
+            self._cancel_poll()
+        return changed
+
+    @callback
+    def async_overlay(self, info: dict) -> dict:
+        """Return `info` with the values of the pending commands applied."""
+        for path, value, _deadline in self._pending.values():
+            info = replace_path(info, path, value)
+        return info
+
+    @callback
+    def async_shutdown(self) -> None:
+        """Stop polling for the pending commands."""
+        self._cancel_poll()
+        self._pending.clear()
+
+    @callback
+    def _schedule_poll(self) -> None:
+        """Schedule the next confirmation poll, unless one is scheduled."""
+        if self._unsub_poll is None:
+            self._unsub_poll = async_call_later(
+                self._hass, CONFIRM_INTERVAL, self._handle_poll
+            )
+
+    @callback
+    def _cancel_poll(self) -> None:
+        """Cancel the scheduled confirmation poll."""
+        if self._unsub_poll is not None:
+            self._unsub_poll()
+            self._unsub_poll = None
+
+    @callback
+    def _handle_poll(self, _now) -> None:
+        """Poll the device in the background."""
+        self._unsub_poll = None
+        self._hass.async_create_background_task(
+            self._async_poll(), "edilkamin command confirmation"
+        )
+
+    async def _async_poll(self) -> None:
+        """Poll the device, and schedule another poll while commands are pending."""
+        try:
+            await self._poll()
+        except Exception as err:  # noqa: BLE001
+            _LOGGER.debug("Confirmation poll failed: %s", err)
+        if self._pending:
+            self._schedule_poll()
@@ -6,4 +6,92 @@ MAC_ADDRESS = "mac_address"
 ##REFRESH_TOKEN = "refresh_token"
 ##CLIENT_ID = "client_id"
 USERNAME = "username"#
-PASSWORD = "password"#
\ No newline at end of file
+PASSWORD = "password"#
+API_URL = "https://fxtj7xkgc6.execute-api.eu-central-1.amazonaws.com/prod/"
+
+# Last polled device_info of each config entry, loaded at startup.
+STORAGE_VERSION = 1
+STORAGE_KEY = DOMAIN + ".{entry_id}"
+# Minimum time, in seconds, between two writes of the stored device_info.
+STORAGE_SAVE_DELAY = 60
+
+CONF_TRANSPORT = "transport"
+TRANSPORT_EXECUTOR = "executor"
+TRANSPORT_AIOHTTP = "aiohttp"
+DEFAULT_TRANSPORT = TRANSPORT_EXECUTOR
+
+CONF_COMMAND_DELAY = "command_delay"
+DEFAULT_COMMAND_DELAY = 1.0
+
+# Minimum time, in seconds, between two check commands sent to the stove.
+CONF_CHECK_INTERVAL = "check_interval"
+DEFAULT_CHECK_INTERVAL = 3600
+
+# Maximum age, in seconds, of the polled state used to validate a command,
+# an older state is fetched again.
+CONF_STATE_MAX_AGE = "state_max_age"
+DEFAULT_STATE_MAX_AGE = 60
+
+# After failed polls, the entities keep the last polled state until this many
+# polls failed in a row, or until the state is older than this many seconds.
+CONF_UNAVAILABLE_FAILURES = "unavailable_failures"
+DEFAULT_UNAVAILABLE_FAILURES = 3
+CONF_UNAVAILABLE_AGE = "unavailable_age"
+DEFAULT_UNAVAILABLE_AGE = 600
+
+# Event fired for each alarm logged by a stove.
+EVENT_ALARM = DOMAIN + "_alarm"
+
+# device_info entry changed by each command, and the type the cloud reports.
+COMMAND_STATE_PATHS = {
+    "power": (("status", "commands", "power"), bool),
+    "airkare_function": (("status", "flags", "is_airkare_active"), bool),
+    "relax_mode": (("status", "flags", "is_relax_active"), bool),
+    "chrono_mode": (("nvm", "chrono", "is_active"), bool),
+    "standby_mode": (("nvm", "user_parameters", "is_standby_active"), bool),
+    "auto_mode": (("nvm", "user_parameters", "is_auto"), bool),
+    "power_level": (("nvm", "user_parameters", "manual_power"), int),
+    "fan_1_speed": (("nvm", "user_parameters", "fan_1_ventilation"), int),
+    "fan_2_speed": (("nvm", "user_parameters", "fan_2_ventilation"), int),
+    "enviroment_1_temperature": (
+        ("nvm", "user_parameters", "enviroment_1_temperature"),
+        float,
+    ),
+}
+
+OPERATIONAL_STATES = {
+    0: "Off",
+    1: "Ignition",
+    2: "On",
+    3: "Shutdown",
+    4: "Cooling",
+    5: "Alarm",
+    6: "Final cleaning",
+    7: "Unknown",
+}
+
+CONF_SCAN_INTERVAL_OFF = "scan_interval_off"
+CONF_SCAN_INTERVAL_IGNITION = "scan_interval_ignition"
+CONF_SCAN_INTERVAL_ON = "scan_interval_on"
+CONF_SCAN_INTERVAL_SHUTDOWN = "scan_interval_shutdown"
+CONF_SCAN_INTERVAL_COOLING = "scan_interval_cooling"
+
+# Polling interval, in seconds, of each operational phase.
+DEFAULT_SCAN_INTERVALS = {
+    CONF_SCAN_INTERVAL_OFF: 300,
+    CONF_SCAN_INTERVAL_IGNITION: 5,
+    CONF_SCAN_INTERVAL_ON: 15,
+    CONF_SCAN_INTERVAL_SHUTDOWN: 5,
+    CONF_SCAN_INTERVAL_COOLING: 10,
+}
+
+# Option giving the polling interval of each operational phase, the other
+# phases are polled like the "On" phase.
+PHASE_SCAN_INTERVALS = {
+    0: CONF_SCAN_INTERVAL_OFF,
+    1: CONF_SCAN_INTERVAL_IGNITION,
+    2: CONF_SCAN_INTERVAL_ON,
+    3: CONF_SCAN_INTERVAL_SHUTDOWN,
+    4: CONF_SCAN_INTERVAL_COOLING,
+    6: CONF_SCAN_INTERVAL_SHUTDOWN,
+}
@@ -1,14 +1,47 @@
-from datetime import timedelta
+from __future__ import annotations
+
+from datetime import datetime, timedelta
 import logging
+import time
+from typing import TYPE_CHECKING
 
 import async_timeout
-from custom_components.edilkaminv2.api.edilkamin_async_api import EdilkaminAsyncApi
+from custom_components.edilkaminv2.api.circuit_breaker import CircuitBreaker
+from custom_components.edilkaminv2.api.edilkamin_async_api import (
+    EdilkaminAsyncApi,
+    is_auth_error,
+)
 
-import edilkamin
+from homeassistant.core import CALLBACK_TYPE, callback
+from homeassistant.helpers.event import async_call_later
+from homeassistant.helpers.storage import Store
 from homeassistant.helpers.update_coordinator import DataUpdateCoordinator, UpdateFailed
+from homeassistant.util import dt as dt_util
+
+from .alarm_history import AlarmHistory
+from .alarms import AlarmLog, alarm_entries
+from .confirmation import STATUS_FAILED, CommandConfirmation, get_path
+from .const import (
+    COMMAND_STATE_PATHS,
+    CONF_SCAN_INTERVAL_ON,
+    DEFAULT_SCAN_INTERVALS,
+    DEFAULT_STATE_MAX_AGE,
+    DEFAULT_UNAVAILABLE_AGE,
+    DEFAULT_UNAVAILABLE_FAILURES,
+    EVENT_ALARM,
+    PHASE_SCAN_INTERVALS,
+    STORAGE_SAVE_DELAY,
+)
+from .snapshot import EdilkaminSnapshot
+
+if TYPE_CHECKING:
+    from .account import EdilkaminAccount
 
 _LOGGER = logging.getLogger(__name__)
 
+# Time, in seconds, the device is polled at the fastest interval after a command.
+COMMAND_FAST_POLL_PERIOD = 120
+
 
 class EdilkaminCoordinator(DataUpdateCoordinator):
     """My custom coordinator."""
@@ -16,56 +49,431 @@ class EdilkaminCoordinator(DataUpdateCoordinator):
     def __init__(
         self,
         hass,
-        username: str,
-        password: str,
-        mac_address: str,
+        api: EdilkaminAsyncApi,
+        scan_intervals: dict[str, int] | None = None,
+        account: EdilkaminAccount | None = None,
+        state_max_age: float = DEFAULT_STATE_MAX_AGE,
+        store: Store | None = None,
+        unavailable_failures: int = DEFAULT_UNAVAILABLE_FAILURES,
+        unavailable_age: float = DEFAULT_UNAVAILABLE_AGE,
+        alarm_history: AlarmHistory | None = None,
     ) -> None:
         """Initialize the coordinator."""
+        self._scan_intervals = {**DEFAULT_SCAN_INTERVALS, **(scan_intervals or {})}
         super().__init__(
             hass,
             _LOGGER,
-            name="Edilkamin coordinator",
-            update_interval=timedelta(seconds=15),
+            name=f"Edilkamin coordinator {api.get_mac_address()}",
+            update_interval=timedelta(
+                seconds=self._scan_intervals[CONF_SCAN_INTERVAL_ON]
+            ),
+            # Only notify the entities when the snapshot changed.
+            always_update=False,
         )
-        self._username = username
-        self._password = password
-        self._mac_address = mac_address
+        self._last_command = None
+        self._last_poll = None
+        self._state_max_age = state_max_age
+        self._store = store
+        # True while the data comes from the store, until the first live poll.
+        self.stale = False
+        self._stale_cleared = False
+        self._breaker = api.session.breaker
+        # Polls failed in a row, the last polled data is shown until too many
+        # failed or it got too old.
+        self.failed_polls = 0
+        self._unavailable_failures = unavailable_failures
+        self._unavailable_age = unavailable_age
+        self._unsub_grace: CALLBACK_TYPE | None = None
+        # Called after every poll, even the ones not notifying the entities.
+        self._poll_listeners: list[CALLBACK_TYPE] = []
+        # Breaker state and availability the entities were last notified of.
+        self._status = self._get_status()
+        # Success and data before the refresh running.
+        self._refresh_start: tuple[bool, EdilkaminSnapshot | None] = (True, None)
+        self._mac_address = api.get_mac_address()
+        self.account = account
 
-        self._token = None
+        # Data reported by the cloud, the same data with the pending commands
+        # applied, and its snapshot, which is the one shown by the entities.
+        self._cloud_info = {}
         self._device_info = {}
-        self._edilkamin_wrapper = EdilkaminAsyncApi(
-            mac_address=mac_address, username=username, password=password, hass=hass
+        self._snapshot = EdilkaminSnapshot()
+        self.alarm_log = AlarmLog()
+        self._alarm_history = alarm_history
+        # Fields changed by the last update, for the entities to skip theirs.
+        self.changed_fields: frozenset[str] = frozenset()
+        self.last_successful_poll: datetime | None = None
+        # Polls identical to the previous one, and polls that changed the data.
+        self.unchanged_polls = 0
+        self.changed_polls = 0
+        self._edilkamin_wrapper = api
+        self._confirmation = CommandConfirmation(hass, self._async_confirm_commands)
+        self._unsub_command_listener = api.async_add_command_listener(
+            self.async_apply_commands
+        )
+        self._unsub_failed_command_listener = api.async_add_failed_command_listener(
+            self.async_fail_commands
+        )
+
+    @property
+    def api(self) -> EdilkaminAsyncApi:
+        """Return the api shared with the entities of the config entry."""
+        return self._edilkamin_wrapper
+
+    @property
+    def command_status(self) -> dict[str, str]:
+        """Return the confirmation status of the last command of each name."""
+        return self._confirmation.status
+
+    @property
+    def command_failed(self) -> bool:
+        """Return True if a command failed since the last successful poll."""
+        return STATUS_FAILED in self._confirmation.status.values()
+
+    @property
+    def breaker(self) -> CircuitBreaker:
+        """Return the circuit breaker of the account."""
+        return self._breaker
+
+    @property
+    def data_age(self) -> float | None:
+        """Return the seconds since the last successful poll, None before the first."""
+        if self._last_poll is None:
+            return None
+        return time.monotonic() - self._last_poll
+
+    @property
+    def data_available(self) -> bool:
+        """Return True while the entities show the data, even after failed polls."""
+        if self.last_update_success:
+            return True
+        age = self.data_age
+        return (
+            age is not None
+            and self.failed_polls < self._unavailable_failures
+            and age < self._unavailable_age
         )
 
-    async def refresh_token(self) -> str:
-        """Login to refresh the token."""
-        return await self.hass.async_add_executor_job(
-            edilkamin.sign_in, self._username, self._password
+    @property
+    def poll_due(self) -> bool:
+        """Return True if half of the polling interval elapsed since the last poll."""
+        return (
+            self._last_poll is None
+            or time.monotonic() - self._last_poll
+            >= self.update_interval.total_seconds() / 2
         )
 
-    async def update_device_information(self) -> None:
-        """Get the latest data and update the relevant Entity attributes."""
-        self._token = await self.refresh_token()
-        return await self.hass.async_add_executor_job(
-            edilkamin.device_info, self._token, self._mac_address
+    def get_fresh_snapshot(self) -> EdilkaminSnapshot | None:
+        """Return the snapshot, or None if it is older than the max state age."""
+        if (
+            self._last_poll is None
+            or time.monotonic() - self._last_poll > self._state_max_age
+        ):
+            return None
+        return self._snapshot
+
+    @callback
+    def _async_refresh_finished(self) -> None:
+        """
+        Notify the entities of the first poll, even if the data is the stored one.
+
+        Also notify them when the circuit breaker changed state or the
+        entities became unavailable, the failed updates following a first one
+        do not notify them. They are not notified when the refresh notifies
+        them anyway, so once per poll.
+        """
+        status = self._get_status()
+        if (
+            self._stale_cleared or status != self._status
+        ) and not self._refresh_notifies():
+            self.async_update_listeners()
+        self._stale_cleared = False
+        self._status = status
+        self._async_poll_finished()
+
+    def _refresh_notifies(self) -> bool:
+        """Return True if the refresh ending notifies the entities on its own."""
+        previous_success, previous_data = self._refresh_start
+        if not self.last_update_success and not previous_success:
+            return False
+        return (
+            self.last_update_success != previous_success or self.data != previous_data
         )
 
+    @callback
+    def async_set_updated_data(self, data: EdilkaminSnapshot) -> None:
+        """Set the data and notify the entities, of the end of the stale data too."""
+        self._stale_cleared = False
+        super().async_set_updated_data(data)
+        self._status = self._get_status()
+
+    @callback
+    def async_add_poll_listener(self, update_callback: CALLBACK_TYPE) -> CALLBACK_TYPE:
+        """Listen for the end of every poll, return the function removing it."""
+        self._poll_listeners.append(update_callback)
+
+        @callback
+        def remove_listener() -> None:
+            self._poll_listeners.remove(update_callback)
+
+        return remove_listener
+
+    @callback
+    def _async_poll_finished(self) -> None:
+        """Call the poll listeners."""
+        for update_callback in list(self._poll_listeners):
+            update_callback()
+
+    def _get_status(self) -> tuple[str, bool]:
+        """Return the status the entities are notified of when it changes."""
+        return (self._breaker.state, self.data_available)
+
+    @callback
+    def _async_notify_status(self) -> None:
+        """Notify the entities if the status changed since the last update."""
+        status = self._get_status()
+        if status != self._status:
+            self._status = status
+            self.async_update_listeners()
+
+    async def async_load_stored_data(self) -> bool:
+        """Load the device_info stored by the last run, return True if found."""
+        if self._store is None or not (stored := await self._store.async_load()):
+            return False
+
+        self._cloud_info = stored["device_info"]
+        # The alarms logged until the last run are not new.
+        self._async_process_alarms()
+        self.data = self._async_overlay_commands()
+        self.stale = True
+        return True
+
+    async def update_device_information(self) -> None:
+        """
+        Get the latest data and update the relevant Entity attributes.
+
+        The token is reused across polls, the api signs in again only when
+        it expired or was rejected by the cloud.
+        """
+        return await self._edilkamin_wrapper.get_info(use_cache=False)
+
     async def _async_update_data(self):
         """Fetch data from the API."""
+        # Compared by the refresh, to notify the entities of the changes.
+        self._refresh_start = (self.last_update_success, self.data)
+        if not self._breaker.allow_request():
+            self._async_poll_failed()
+            raise UpdateFailed(
+                "Edilkamin cloud paused after errors, next attempt in "
+                f"{self._breaker.retry_in:.0f} s"
+            )
+
         try:
             # Note: asyncio.TimeoutError and aiohttp.ClientError are already
             # handled by the data update coordinator.
             async with async_timeout.timeout(10):
-                self._device_info = await self.update_device_information()
-                _LOGGER.debug("Data updated successfully")
-                _LOGGER.debug(self._device_info)
-                return self._device_info
-        except Exception:
-            raise UpdateFailed("Error communicating with API")
+                if self.account is not None:
+                    info = await self.account.async_poll(self)
+                else:
+                    info = await self.update_device_information()
+        except Exception as err:
+            self._breaker.record_failure(is_auth_error(err))
+            self._async_poll_failed()
+            raise UpdateFailed("Error communicating with API") from err
+
+        self._breaker.record_success()
+        _LOGGER.debug("Data updated successfully")
+        return self._process_device_info(info)
+
+    @callback
+    def _async_poll_failed(self) -> None:
+        """Count a failed poll, and schedule the end of the grace period."""
+        self.failed_polls += 1
+        self.changed_fields = frozenset()
+        self.update_interval = self._get_update_interval()
+        if self._unsub_grace is None and (age := self.data_age) is not None:
+            # The entities become unavailable when the data gets too old,
+            # even if no poll runs meanwhile.
+            self._unsub_grace = async_call_later(
+                self.hass,
+                max(self._unavailable_age - age, 0),
+                self._async_grace_expired,
+            )
+
+    @callback
+    def _async_grace_expired(self, _now) -> None:
+        """Make the entities unavailable once the data got too old."""
+        self._unsub_grace = None
+        self._async_notify_status()
+
+    @callback
+    def async_set_account_info(self, info: dict) -> None:
+        """Update the data with a poll done for another stove of the account."""
+        self._breaker.record_success()
+        self.async_set_updated_data(self._process_device_info(info))
+        self._async_poll_finished()
+
+    @callback
+    def _process_device_info(self, info: dict) -> EdilkaminSnapshot:
+        """Store a poll of the device, and return the data shown by the entities."""
+        self._last_poll = time.monotonic()
+        self.last_successful_poll = dt_util.utcnow()
+        self.failed_polls = 0
+        self._async_cancel_grace()
+        self._stale_cleared = self.stale
+        self.stale = False
+        # The entities show the polled state again, the failed commands were
+        # reported until now.
+        self._confirmation.async_clear_failed()
+        if info == self._cloud_info and not self._confirmation.pending:
+            # The stove reported the same data, keep the snapshot and let the
+            # entities skip the update.
+            self.unchanged_polls += 1
+            self.changed_fields = frozenset()
+            self.update_interval = self._get_update_interval()
+            return self._snapshot
+
+        self.changed_polls += 1
+        self._cloud_info = info
+        self._async_process_alarms()
+        if self._store is not None:
+            self._store.async_delay_save(self._data_to_store, STORAGE_SAVE_DELAY)
+        # A poll showing the pending commands confirms them.
+        self._confirmation.async_check(self._cloud_info)
+        self.update_interval = self._get_update_interval()
+        _LOGGER.debug(self._cloud_info)
+        return self._async_overlay_commands()
+
+    @callback
+    def _async_process_alarms(self) -> None:
+        """Store the alarms logged since the last poll, and fire an event for each."""
+        alarms_log = get_path(self._cloud_info, ("nvm", "alarms_log")) or {}
+        entries = self.alarm_log.update(alarms_log)
+        if entries and self._alarm_history is not None:
+            self._alarm_history.async_add(self._mac_address, entries)
+        if self.alarm_log.restarted:
+            return
+        for index, alarm in entries:
+            _LOGGER.info("Stove %s raised alarm %s", self._mac_address, alarm)
+            self.hass.bus.async_fire(
+                EVENT_ALARM,
+                {
+                    "mac_address": self._mac_address,
+                    "index": index,
+                    "type": alarm["type"],
+                    "timestamp": dt_util.utc_from_timestamp(
+                        alarm["timestamp"]
+                    ).isoformat(),
+                },
+            )
 
-    def get_token(self) -> str:
-        """Return the current token."""
-        return self._token
+    @callback
+    def _async_cancel_grace(self) -> None:
+        """Cancel the scheduled end of the grace period."""
+        if self._unsub_grace is not None:
+            self._unsub_grace()
+            self._unsub_grace = None
+
+    @callback
+    def _data_to_store(self) -> dict:
+        """Return the data written to the store."""
+        return {"device_info": self._cloud_info}
+
+    @callback
+    def _async_overlay_commands(self) -> EdilkaminSnapshot:
+        """Apply the pending commands to the polled data, and decode it."""
+        self._device_info = self._confirmation.async_overlay(self._cloud_info)
+        previous = self._snapshot
+        self._snapshot = EdilkaminSnapshot.from_device_info(self._device_info)
+        self.changed_fields = self._snapshot.changed_fields(previous)
+        return self._snapshot
+
+    @callback
+    def async_apply_commands(self, payloads: list[dict]) -> None:
+        """
+        Apply a batch of accepted commands to the data, without waiting for a poll.
+
+        The cloud takes a few seconds to report the change, a command stays
+        applied until a poll confirms it or its confirmation times out.
+        """
+        if not any(payload["name"] in COMMAND_STATE_PATHS for payload in payloads):
+            # A check does not change the stove, no need to poll it fast.
+            return
+        self._last_command = time.monotonic()
+        self.update_interval = self._get_update_interval()
+        if not self._cloud_info:
+            return
+        tracked = [self._confirmation.async_track(payload) for payload in payloads]
+        if not any(tracked):
+            return
+
+        self.async_set_updated_data(self._async_overlay_commands())
+
+    @callback
+    def async_fail_commands(self, payloads: list[dict]) -> None:
+        """
+        Report the queued commands the cloud did not accept.
+
+        The entities showed the queued values meanwhile, they all read the
+        data again, which still has the values polled before the commands.
+        """
+        for payload in payloads:
+            self._confirmation.async_fail(payload)
+        self.changed_fields = frozenset(EdilkaminSnapshot._fields)
+        self.async_update_listeners()
+
+    def _get_update_interval(self) -> timedelta:
+        """
+        Get the polling interval matching the state of the stove.
+
+        The stove is polled fast during the transitions and right after a
+        command, and slowly while it is off. While the circuit breaker is
+        open, the next poll waits for the end of the pause.
+        """
+        if (
+            self._last_command is not None
+            and time.monotonic() - self._last_command < COMMAND_FAST_POLL_PERIOD
+        ):
+            seconds = min(self._scan_intervals.values())
+        else:
+            phase = get_path(
+                self._cloud_info, ("status", "state", "operational_phase")
+            )
+            option = PHASE_SCAN_INTERVALS.get(phase, CONF_SCAN_INTERVAL_ON)
+            seconds = self._scan_intervals[option]
+        return timedelta(seconds=max(seconds, self._breaker.retry_in))
+
+    async def _async_confirm_commands(self) -> None:
+        """
+        Poll the device to confirm the pending commands.
+
+        The poll is processed like the regular ones, so the alarms it shows
+        are raised and the next regular poll compares against it.
+        """
+        try:
+            info = await self.update_device_information()
+        except Exception as err:  # noqa: BLE001
+            _LOGGER.debug("Error polling the pending commands: %s", err)
+            # Still fail the commands whose confirmation timed out.
+            if self._confirmation.async_check({}):
+                self.async_set_updated_data(self._async_overlay_commands())
+            return
+
+        self._breaker.record_success()
+        self.async_set_updated_data(self._process_device_info(info))
+        self._async_poll_finished()
+
+    async def async_shutdown(self) -> None:
+        """Cancel any scheduled call, and ignore new runs."""
+        await super().async_shutdown()
+        self._unsub_command_listener()
+        self._unsub_failed_command_listener()
+        self._confirmation.async_shutdown()
+        self._async_cancel_grace()
+
+    def get_sign_ins_last_hour(self) -> int:
+        """Return the number of sign-ins done during the last hour."""
+        return self._edilkamin_wrapper.sign_ins_last_hour
 
     def get_mac_address(self) -> str:
         """Return the MAC address."""
@@ -73,122 +481,101 @@ class EdilkaminCoordinator(DataUpdateCoordinator):
 
     def get_temperature(self) -> str:
         """Get the temperature."""
-        return self._device_info.get("status").get("temperatures").get("enviroment")
+        return self._snapshot.temperature
 
     def get_fan_1_speed(self) -> str:
         """Get the fan speed."""
-        return (
-            self._device_info.get("status")
-            .get("fans")
-            .get("fan_1_speed")
-        )
+        return self._snapshot.fan_1_speed
+
     def get_fan_1_actual_setpoint(self):
         """Get fan 1 setpoint."""
-        return self._device_info.get("nvm").get("user_parameters").get("fan_1_ventilation")
-    
+        return self._snapshot.fan_1_setpoint
+
     def get_fan_1_is_active(self):
         """Get fan 1 is active."""
-        
-        return self._device_info.get("status").get("pump").get("flags2").get("fan_1_active")
-    
+        return self._snapshot.fan_1_active
+
     def get_fan_2_speed(self) -> str:
         """Get the fan speed."""
-        return (
-            self._device_info.get("status")
-            .get("fans")
-            .get("fan_2_speed")
-        )
-    
+        return self._snapshot.fan_2_speed
+
     def get_fan_2_actual_setpoint(self):
         """Get fan 2 setpoint."""
-        return self._device_info.get("nvm").get("user_parameters").get("fan_2_ventilation")
-    
+        return self._snapshot.fan_2_setpoint
+
     def get_fan_2_is_active(self):
-        """Get fan 1 is active."""
-        return self._device_info.get("status").get("pump").get("flags2").get("fan_2_active")
-    
+        """Get fan 2 is active."""
+        return self._snapshot.fan_2_active
+
     def get_nb_fans(self):
         """Get the number of fans."""
-        return (
-            self._device_info.get("nvm").get("installer_parameters").get("fans_number")
-        )
+        return self._snapshot.nb_fans
 
     def get_nb_alarms(self) -> str:
         """Get the number of alarms."""
-        return self._device_info.get("nvm").get("alarms_log").get("index")
+        return self._snapshot.nb_alarms
 
     def get_alarms(self) -> list:
-        """Get the alarms."""
-        alarms_info = self._device_info.get("nvm").get("alarms_log")
-        index = alarms_info.get("index")
-        return [alarms_info.get("alarms")[i] for i in range(index)]
+        """Get the alarms still in the log, oldest first."""
+        alarms_log = get_path(self._device_info, ("nvm", "alarms_log")) or {}
+        return [alarm for _index, alarm in alarm_entries(alarms_log)]
 
     def get_actual_power(self) -> str:
         """Get the actual power."""
-        return self._device_info.get("status").get("state").get("actual_power")
-    
+        return self._snapshot.actual_power
+
     def get_power_actual_setpoint(self):
         """Get power setpoint."""
-        return self._device_info.get("nvm").get("user_parameters").get("manual_power")
+        return self._snapshot.power_setpoint
 
     def get_status_tank(self) -> str:
         """Get the status of the tank."""
-        return self._device_info.get("status").get("flags").get("is_pellet_in_reserve")
+        return self._snapshot.pellet_in_reserve
 
     def get_airkare_status(self) -> str:
         """Get the status of the airkare."""
-        return self._device_info.get("status").get("flags").get("is_airkare_active")
+        return self._snapshot.airkare
 
     def get_power_status(self) -> str:
         """Get the status of the power."""
-        return self._device_info.get("status").get("commands").get("power")
+        return self._snapshot.power
 
     def get_relax_status(self) -> str:
         """Get the status of the relax."""
-        return self._device_info.get("status").get("flags").get("is_relax_active")
+        return self._snapshot.relax
 
     def get_target_temperature(self) -> str:
         """Get the target temperature."""
-        return (
-            self._device_info.get("nvm")
-            .get("user_parameters")
-            .get("enviroment_1_temperature")
-        )
+        return self._snapshot.target_temperature
 
     def get_chrono_mode_status(self) -> str:
         """Get the status of the chrono mode."""
-        return self._device_info.get("nvm").get("chrono").get("is_active")
-    
+        return self._snapshot.chrono_mode
+
     def get_operational_phase(self) -> str:
         """Get the operational phase."""
-        return self._device_info.get("status").get("state").get("operational_phase")
+        return self._snapshot.operational_phase
 
     def get_autonomy_second(self) -> str:
-        """Get the operational phase."""
-        return self._device_info.get("status").get("pellet").get("autonomy_time")
-    
+        """Get the pellet autonomy, in seconds."""
+        return self._snapshot.autonomy_time
+
     def get_standby_mode(self) -> bool:
         """Get standby mode."""
-        return (
-            self._device_info.get("nvm").get("user_parameters").get("is_standby_active")
-        )
+        return self._snapshot.standby_mode
 
     def get_standby_waiting_time(self) -> str:
         """Get standby waiting time."""
-        return (
-            self._device_info.get("nvm")
-            .get("user_parameters")
-            .get("standby_waiting_time")
-        )
+        return self._snapshot.standby_waiting_time
 
     def get_power_ons(self) -> str:
         """Get the number of power ons."""
-        return self._device_info.get("nvm").get("total_counters").get("power_ons")
+        return self._snapshot.power_ons
 
     def is_auto(self):
         """Check if the device is in auto mode."""
-        return self._device_info.get("nvm").get("user_parameters").get("is_auto")
+        return self._snapshot.auto
 
     def get_manual_power(self):
         """Get the manual mode."""
-        return self.get_power_actual_setpoint()
\ No newline at end of file
+        return self._snapshot.power_setpoint
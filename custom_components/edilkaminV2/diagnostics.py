@@ -0,0 +1,49 @@
+"""Diagnostics support for Edilkamin."""
+
+from __future__ import annotations
+
+from typing import Any
+
+from homeassistant.components.diagnostics import async_redact_data
+from homeassistant.config_entries import ConfigEntry
+from homeassistant.core import HomeAssistant
+
+from .const import PASSWORD, USERNAME
+
+TO_REDACT = {PASSWORD, USERNAME}
+
+
+async def async_get_config_entry_diagnostics(
+    hass: HomeAssistant, entry: ConfigEntry
+) -> dict[str, Any]:
+    """Return diagnostics for a config entry."""
+    coordinator = entry.runtime_data
+    executor = coordinator.api.session.executor
+    polls = coordinator.unchanged_polls + coordinator.changed_polls
+    return {
+        "entry": async_redact_data(entry.as_dict(), TO_REDACT),
+        "coordinator": {
+            "last_update_success": coordinator.last_update_success,
+            "last_successful_poll": coordinator.last_successful_poll,
+            "data_age": coordinator.data_age,
+            "failed_polls": coordinator.failed_polls,
+            "data_available": coordinator.data_available,
+            "update_interval": coordinator.update_interval,
+            "unchanged_polls": coordinator.unchanged_polls,
+            "changed_polls": coordinator.changed_polls,
+            "unchanged_poll_rate": coordinator.unchanged_polls / polls if polls else None,
+            "command_status": coordinator.command_status,
+            "sign_ins_last_hour": coordinator.get_sign_ins_last_hour(),
+        },
+        "circuit_breaker": {
+            "state": coordinator.breaker.state,
+            "consecutive_failures": coordinator.breaker.failures,
+            "last_error": coordinator.breaker.last_error,
+            "retry_in": coordinator.breaker.retry_in,
+        },
+        "executor": {
+            "in_flight": executor.in_flight,
+            "orphaned": executor.orphaned,
+            "orphaned_total": executor.orphaned_total,
+        },
+    }
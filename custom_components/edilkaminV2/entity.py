@@ -0,0 +1,80 @@
+"""Base entity of the Edilkamin integration."""
+
+from __future__ import annotations
+
+from homeassistant.core import callback
+from homeassistant.helpers.update_coordinator import CoordinatorEntity
+
+from .coordinator import EdilkaminCoordinator
+
+
+class EdilkaminEntity(CoordinatorEntity[EdilkaminCoordinator]):
+    """
+    Entity updated by the coordinator of a stove.
+
+    The state is only written when one of the snapshot fields the entity
+    declares changed, or when its availability changed. Until the first poll,
+    the state loaded from the last run is marked as assumed. After failed
+    polls, the last polled state is kept during the grace period of the
+    coordinator.
+    """
+
+    # Snapshot fields the state depends on, None to write on every update.
+    _snapshot_fields: frozenset[str] | None = None
+    # Also write the state after every poll, even when the data is the same.
+    _write_on_every_poll = False
+
+    def __init__(self, coordinator: EdilkaminCoordinator) -> None:
+        """Initialize the entity."""
+        super().__init__(coordinator)
+        # Availability and staleness of the last written state.
+        self._last_status: tuple[bool, bool] | None = None
+
+    @property
+    def available(self) -> bool:
+        """Return True while the coordinator shows the last polled state."""
+        return self.coordinator.data_available
+
+    @property
+    def assumed_state(self) -> bool:
+        """Return True while the state comes from the last run, not from a poll."""
+        return self.coordinator.stale
+
+    async def async_added_to_hass(self) -> None:
+        """Read the data already polled, before the first state is written."""
+        await super().async_added_to_hass()
+        self._last_status = (self.available, self.coordinator.stale)
+        if self.coordinator.data is not None:
+            self._async_update_attrs()
+        if self._write_on_every_poll:
+            self.async_on_remove(
+                self.coordinator.async_add_poll_listener(self._handle_poll)
+            )
+
+    @callback
+    def _handle_coordinator_update(self) -> None:
+        """Write the state, if the update changed it."""
+        status = (self.available, self.coordinator.stale)
+        if (
+            status == self._last_status
+            and self._snapshot_fields is not None
+            and self._snapshot_fields.isdisjoint(self.coordinator.changed_fields)
+        ):
+            return
+
+        self._last_status = status
+        if self.coordinator.data is not None:
+            self._async_update_attrs()
+        self.async_write_ha_state()
+
+    @callback
+    def _handle_poll(self) -> None:
+        """Write the state after a poll."""
+        self._last_status = (self.available, self.coordinator.stale)
+        if self.coordinator.data is not None:
+            self._async_update_attrs()
+        self.async_write_ha_state()
+
+    @callback
+    def _async_update_attrs(self) -> None:
+        """Update the attributes from the coordinator data."""
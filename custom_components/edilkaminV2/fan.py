@@ -12,9 +12,8 @@ from homeassistant.util.percentage import (
     ranged_value_to_percentage,
 )
 
-from .const import DOMAIN
+from .entity import EdilkaminEntity
 from custom_components.edilkaminv2.api.edilkamin_async_api import EdilkaminAsyncApi
-from homeassistant.helpers.update_coordinator import CoordinatorEntity
 
 _LOGGER = logging.getLogger(__name__)
 
@@ -25,17 +24,19 @@ SPEED_RANGE_FAN2 = (1, 5)  # off is not included in speeds and instead mapped to
 
 async def async_setup_entry(hass, config_entry, async_add_devices):
     """Add sensors for passed config_entry in HA."""
-    coordinator = hass.data[DOMAIN]["coordinator"]
-    async_api = hass.data[DOMAIN][config_entry.entry_id]
+    coordinator = config_entry.runtime_data
+    async_api = coordinator.api
 
     async_add_devices([EdilkaminPowerLevel(async_api, coordinator)])
     async_add_devices([EdilkaminFan(async_api, coordinator)])
     async_add_devices([EdilkaminFan2(async_api, coordinator)])
 
 
-class EdilkaminFan(CoordinatorEntity, FanEntity):
+class EdilkaminFan(EdilkaminEntity, FanEntity):
     """Representation of a Fan."""
 
+    _snapshot_fields = frozenset({"fan_1_active", "fan_1_setpoint"})
+
     def __init__(self, api: EdilkaminAsyncApi, coordinator) -> None:
         """Initialize the fan."""
         super().__init__(coordinator)
@@ -81,18 +82,16 @@ class EdilkaminFan(CoordinatorEntity, FanEntity):
             percentage_to_ranged_value(SPEED_RANGE, percentage)
         )
 
-        await self.api.set_fan_1_speed(self.current_speed)
+        await self.api.set_fan_1_speed(self.current_speed, coalesce=True)
         self.schedule_update_ha_state()
     
-    def _handle_coordinator_update(self) -> None:   
+    def _async_update_attrs(self) -> None:
         """Fetch new state data for the sensor."""
         
         self.current_state = self.coordinator.get_fan_1_is_active()
         if self.current_state is True:
             self.current_speed = self.coordinator.get_fan_1_actual_setpoint()
 
-        self.async_write_ha_state() 
-
 
     async def async_turn_on(
             self,
@@ -107,9 +106,11 @@ class EdilkaminFan(CoordinatorEntity, FanEntity):
         """Turn off the entity."""
 
 
-class EdilkaminFan2(CoordinatorEntity,FanEntity):
+class EdilkaminFan2(EdilkaminEntity, FanEntity):
     """Representation of a Fan."""
 
+    _snapshot_fields = frozenset({"fan_2_active", "fan_2_setpoint"})
+
 
     def __init__(self, api: EdilkaminAsyncApi, coordinator) -> None:
         """Initialize the fan."""
@@ -166,7 +167,7 @@ class EdilkaminFan2(CoordinatorEntity,FanEntity):
             #self.preset_mode = None
             self.preset_mode = "0"
             
-        await self.api.set_fan_2_speed(self.current_speed)
+        await self.api.set_fan_2_speed(self.current_speed, coalesce=True)
         self.schedule_update_ha_state()
 
     async def async_set_preset_mode(self, preset_mode: str) -> None:
@@ -186,12 +187,12 @@ class EdilkaminFan2(CoordinatorEntity,FanEntity):
             self._percentage = ranged_value_to_percentage(SPEED_RANGE_FAN2, self.current_speed)
         
         
-        await self.api.set_fan_2_speed(self.current_speed)
+        await self.api.set_fan_2_speed(self.current_speed, coalesce=True)
         self.schedule_update_ha_state()
         
 
             
-    def _handle_coordinator_update(self) -> None:   
+    def _async_update_attrs(self) -> None:
         """Fetch new state data for the sensor."""
         
         self.current_state = self.coordinator.get_fan_2_is_active()
@@ -211,7 +212,6 @@ class EdilkaminFan2(CoordinatorEntity,FanEntity):
             #self.is_on = True
         else :
             self.current_state = False
-        self.async_write_ha_state() 
 
 
     async def async_turn_on(
@@ -235,9 +235,11 @@ class EdilkaminFan2(CoordinatorEntity,FanEntity):
         self.schedule_update_ha_state()
 
 
-class EdilkaminPowerLevel(CoordinatorEntity, FanEntity):
+class EdilkaminPowerLevel(EdilkaminEntity, FanEntity):
     """Representation of a Fan."""
 
+    _snapshot_fields = frozenset({"power", "actual_power"})
+
     def __init__(self, api: EdilkaminAsyncApi, coordinator) -> None:
         """Initialize the fan."""
         super().__init__(coordinator)
@@ -279,17 +281,15 @@ class EdilkaminPowerLevel(CoordinatorEntity, FanEntity):
             percentage_to_ranged_value(POWER_RANGE, percentage)
         )
 
-        await self.api.set_power_level(self.current_speed)
+        await self.api.set_power_level(self.current_speed, coalesce=True)
         self.schedule_update_ha_state()
 
-    def _handle_coordinator_update(self) -> None:   
+    def _async_update_attrs(self) -> None:
         """Fetch new state data for the sensor."""
 
         self.current_state = self.coordinator.get_power_status()
         if self.current_state is True:
             self.current_speed = self.coordinator.get_actual_power()
-        self.async_write_ha_state() 
-
 
 
     async def async_turn_on(
@@ -1,369 +1,290 @@
 """Platform for sensor integration."""
 from __future__ import annotations
 
+from collections.abc import Callable
+from dataclasses import dataclass
+from datetime import datetime
 import logging
-import time
 from typing import Any
 
 from homeassistant.components.sensor import (
     SensorDeviceClass,
     SensorEntity,
+    SensorEntityDescription,
     SensorStateClass,
 )
-from homeassistant.config_entries import ConfigEntry
-from homeassistant.const import UnitOfTemperature
-from homeassistant.core import HomeAssistant
-from homeassistant.helpers.entity_platform import AddEntitiesCallback
-from homeassistant.helpers.update_coordinator import CoordinatorEntity
-from .const import DOMAIN
+from homeassistant.const import EntityCategory, UnitOfTemperature
+from .api.circuit_breaker import STATE_CLOSED, STATE_HALF_OPEN, STATE_OPEN
+from .const import OPERATIONAL_STATES
+from .entity import EdilkaminEntity
+from .snapshot import EdilkaminSnapshot, compile_accessor
 
 
 _LOGGER = logging.getLogger(__name__)
 
-OPERATIONAL_STATES = {
-    0: "Off",
-    1: "Ignition",
-    2: "On",
-    3: "Shutdown",
-    4: "Cooling",
-    5: "Alarm",
-    6: "Final cleaning",
-    7: "Unknown",
-}
+
+def _operational_state(phase: int) -> str:
+    """Return the name of an operational phase."""
+    # Error operational code unknown, shows only the code
+    return OPERATIONAL_STATES.get(phase, OPERATIONAL_STATES[7])
+
+
+def _autonomy(autonomy_second: int) -> str:
+    """Convert the pellet autonomy from seconds to minutes."""
+    minutes, sec = divmod(autonomy_second, 60)
+    return f"{minutes}:{sec}"
+
+
+@dataclass(frozen=True, kw_only=True)
+class EdilkaminSensorEntityDescription(SensorEntityDescription):
+    """Describe an Edilkamin sensor read from the snapshot."""
+
+    field: str
+    convert: Callable[[Any], Any] | None = None
+    attributes_fn: Callable[[EdilkaminSnapshot], dict[str, Any]] | None = None
+    attributes_fields: frozenset[str] = frozenset()
+
+
+# The key of a description is the suffix of the unique_id of its sensor.
+SENSOR_TYPES: tuple[EdilkaminSensorEntityDescription, ...] = (
+    EdilkaminSensorEntityDescription(
+        key="temperature",
+        name="Temperature",
+        icon="mdi:thermometer",
+        device_class=SensorDeviceClass.TEMPERATURE,
+        native_unit_of_measurement=UnitOfTemperature.CELSIUS,
+        field="temperature",
+    ),
+    EdilkaminSensorEntityDescription(
+        key="fan1_sensor",
+        name="Fan 1",
+        icon="mdi:fan",
+        device_class=SensorDeviceClass.POWER,
+        field="fan_1_speed",
+    ),
+    EdilkaminSensorEntityDescription(
+        key="fan2_sensor",
+        name="Fan 2",
+        icon="mdi:fan",
+        device_class=SensorDeviceClass.POWER,
+        field="fan_2_speed",
+    ),
+    EdilkaminSensorEntityDescription(
+        key="actual_power",
+        name="Actual power",
+        icon="mdi:flash",
+        device_class=SensorDeviceClass.POWER,
+        field="actual_power",
+    ),
+    EdilkaminSensorEntityDescription(
+        key="operational_phase_sensor",
+        name="Operational phase",
+        icon="mdi:eye",
+        device_class=SensorDeviceClass.ENUM,
+        options=list(OPERATIONAL_STATES.values()),
+        field="operational_phase",
+        convert=_operational_state,
+        attributes_fn=lambda snapshot: {"value": snapshot.operational_phase},
+    ),
+    EdilkaminSensorEntityDescription(
+        key="autonomy",
+        name="Autonomy",
+        icon="mdi:timer",
+        device_class=SensorDeviceClass.DURATION,
+        native_unit_of_measurement="min",
+        field="autonomy_time",
+        convert=_autonomy,
+        attributes_fn=lambda snapshot: {
+            "description": "Time remaining before the stove turns off if no pellets are added"
+        },
+    ),
+    EdilkaminSensorEntityDescription(
+        key="power_ons",
+        name="Power ons",
+        icon="mdi:counter",
+        state_class=SensorStateClass.MEASUREMENT,
+        field="power_ons",
+    ),
+)
+
+# The alarms are read from the alarm log of the coordinator, see
+# EdilkaminAlarmsSensor.
+ALARMS_SENSOR = EdilkaminSensorEntityDescription(
+    key="nb_alarms_sensor",
+    name="Nb alarms",
+    icon="mdi:alert",
+    device_class=SensorDeviceClass.POWER,
+    field="nb_alarms",
+)
 
 
 # https://github.com/home-assistant/example-custom-config/blob/master/custom_components/detailed_hello_world_push/sensor.py
 async def async_setup_entry(hass, config_entry, async_add_devices):
     """Add sensors for passed config_entry in HA."""
 
-    coordinator = hass.data[DOMAIN]["coordinator"]
+    coordinator = config_entry.runtime_data
 
-    
     sensors = [
-        EdilkaminTemperatureSensor(coordinator),
-        EdilkaminFan1Sensor(coordinator),
-        EdilkaminFan2Sensor(coordinator),
-        EdilkaminAlarmSensor(coordinator),
-        EdilkaminActualPowerSensor(coordinator),
-        EdilkaminOperationalSensor(coordinator),
-        EdilkaminAutonomySensor(coordinator),
-        EdilkaminPowerOnsSensor(coordinator),
+        EdilkaminSensor(coordinator, description) for description in SENSOR_TYPES
     ]
-    
-
-    nb_fans = coordinator.get_nb_fans()
-    # if nb_fans > 1:
-        
-    #     sensors.extend(
-    #         EdilkaminFan2Sensor(coordinator) #todo 3 fans ?
-    #     )
-
+    sensors.append(EdilkaminAlarmsSensor(coordinator, ALARMS_SENSOR))
+    sensors.append(EdilkaminSignInsSensor(coordinator))
+    sensors.append(EdilkaminCircuitSensor(coordinator))
+    sensors.append(EdilkaminLastPollSensor(coordinator))
     async_add_devices(sensors)
 
-class EdilkaminTemperatureSensor(CoordinatorEntity, SensorEntity):
-    """Representation of a Sensor."""
-
-    def __init__(self, coordinator) -> None:
-        """Initialize the sensor."""
-        super().__init__(coordinator)
-        self._state = None
-        self._mac_address = self.coordinator.get_mac_address()
-
-        self._attr_name = "Temperature"
-        self._attr_device_info = {"identifiers": {("edilkaminv2", self._mac_address)}}
-        self._attr_icon = "mdi:thermometer"
-
-    @property
-    def device_class(self):
-        """Return the class of this device, from component DEVICE_CLASSES."""
-        return SensorDeviceClass.TEMPERATURE
-
-    @property
-    def native_unit_of_measurement(self):
-        """Return the class of this device, from component DEVICE_CLASSES."""
-        return UnitOfTemperature.CELSIUS
-
-    @property
-    def unique_id(self):
-        """Return a unique_id for this entity."""
-        return f"{self._mac_address}_temperature"
-
-    @property
-    def state(self):
-        """Return the state of the sensor."""
-        return self._state
-
-    def _handle_coordinator_update(self) -> None:
-        """Handle updated data from the coordinator."""
-        self._state = self.coordinator.get_temperature()
-        self.async_write_ha_state()
 
-class EdilkaminFan1Sensor(CoordinatorEntity,SensorEntity):
+class EdilkaminSensor(EdilkaminEntity, SensorEntity):
     """Representation of a Sensor."""
 
-    def __init__(self, coordinator)-> None:
-        """Initialize the sensor."""
-        super().__init__(coordinator)
-        self._state = None
-        self._mac_address = self.coordinator.get_mac_address()
-        self._attr_icon = "mdi:fan"
-        self._attr_name = "Fan 1"
-        self._attr_device_info = {"identifiers": {("edilkaminv2", self._mac_address)}}
-
-    @property
-    def device_class(self):
-        """Return the class of this device, from component DEVICE_CLASSES."""
-        return SensorDeviceClass.POWER
-
-    @property
-    def unique_id(self):
-        """Return a unique_id for this entity."""
-        return f"{self._mac_address}_fan1_sensor"
-
-    @property
-    def state(self):
-        """Return the state of the sensor."""
-        return self._state
-
-    def _handle_coordinator_update(self) -> None:
-        """Fetch new state data for the sensor."""
-        self._state = self.coordinator.get_fan_1_speed()
-        self.async_write_ha_state()
-
-class EdilkaminFan2Sensor(CoordinatorEntity,SensorEntity):
-    """Representation of a Sensor."""
+    entity_description: EdilkaminSensorEntityDescription
 
-    def __init__(self, coordinator)-> None:
+    def __init__(self, coordinator, description: EdilkaminSensorEntityDescription) -> None:
         """Initialize the sensor."""
         super().__init__(coordinator)
+        self.entity_description = description
         self._state = None
         self._mac_address = self.coordinator.get_mac_address()
-        self._attr_icon = "mdi:fan"
-        self._attr_name = "Fan 2"
-        self._attr_device_info = {"identifiers": {("edilkaminv2", self._mac_address)}}
-    @property
-    def device_class(self):
-        """Return the class of this device, from component DEVICE_CLASSES."""
-        return SensorDeviceClass.POWER
+        self._value = compile_accessor(description.field, description.convert)
+        self._snapshot_fields = description.attributes_fields | {description.field}
 
-    @property
-    def unique_id(self):
-        """Return a unique_id for this entity."""
-        return f"{self._mac_address}_fan2_sensor"
+        self._attr_unique_id = f"{self._mac_address}_{description.key}"
+        self._attr_device_info = {"identifiers": {("edilkaminv2", self._mac_address)}}
 
     @property
     def state(self):
         """Return the state of the sensor."""
         return self._state
 
-    def _handle_coordinator_update(self) -> None:
+    def _async_update_attrs(self) -> None:
         """Fetch new state data for the sensor."""
-        self._state = self.coordinator.get_fan_2_speed()
-        self.async_write_ha_state()      
-
-class EdilkaminAlarmSensor(CoordinatorEntity, SensorEntity):
-    """Representation of a Sensor."""
-
-    def __init__(self, coordinator) -> None:
-        """Initialize the sensor."""
-        super().__init__(coordinator)
-        self._state = None
-        self._mac_address = self.coordinator.get_mac_address()
-        self._attr_icon = "mdi:alert"
-        self._attributes: dict[str, Any] = {}
+        self._state = self._value(self.coordinator.data)
+        if self.entity_description.attributes_fn is not None:
+            self._attr_extra_state_attributes = self.entity_description.attributes_fn(
+                self.coordinator.data
+            )
 
-        self._attr_name = "Nb alarms"
-        self._attr_device_info = {"identifiers": {("edilkaminv2", self._mac_address)}}
-
-    @property
-    def device_class(self):
-        """Return the class of this device, from component DEVICE_CLASSES."""
-        return SensorDeviceClass.POWER
-
-    @property
-    def unique_id(self):
-        """Return a unique_id for this entity."""
-        return f"{self._mac_address}_nb_alarms_sensor"
-
-    @property
-    def state(self):
-        """Return the state of the sensor."""
-        return self._state
 
-    @property
-    def extra_state_attributes(self) -> dict[str, str]:
-        """Return attributes for the sensor."""
-        return self._attributes
+class EdilkaminAlarmsSensor(EdilkaminSensor):
+    """Number of alarms of the stove, with the last ones as attributes."""
 
-    def _handle_coordinator_update(self) -> None:
+    def _async_update_attrs(self) -> None:
         """Fetch new state data for the sensor."""
-        self._state = self.coordinator.get_nb_alarms()
-        alarms = self.coordinator.get_alarms()
+        super()._async_update_attrs()
+        # Built by the alarm log when its index moved, which is also when
+        # the nb_alarms field changes.
+        self._attr_extra_state_attributes = self.coordinator.alarm_log.attributes
 
-        errors = {
-            "errors": [],
-        }
 
-        for alarm in alarms:
-            data = {
-                "type": alarm["type"],
-                "timestamp": time.strftime(
-                    "%d-%m-%Y %H:%M:%S", time.localtime(alarm["timestamp"])
-                ),
-            }
-            errors["errors"].append(data)
-        self._attributes = errors
-        self.async_write_ha_state()
-        
-class EdilkaminActualPowerSensor(CoordinatorEntity, SensorEntity):
+class EdilkaminSignInsSensor(EdilkaminEntity, SensorEntity):
     """Representation of a Sensor."""
 
+    # Not read from the snapshot, the sign-ins are counted by the api.
+    _snapshot_fields = frozenset()
+    _write_on_every_poll = True
+
     def __init__(self, coordinator) -> None:
         """Initialize the sensor."""
         super().__init__(coordinator)
         self._state = None
         self._mac_address = self.coordinator.get_mac_address()
-        self._attr_name = "Actual power"
-        self._attr_device_info = {"identifiers": {("edilkaminv2", self._mac_address)}}
-        self._attr_icon = "mdi:flash"
 
-    @property
-    def device_class(self):
-        """Return the class of this device, from component DEVICE_CLASSES."""
-        return SensorDeviceClass.POWER
-
-    @property
-    def native_unit_of_measurement(self):
-        """Return the class of this device, from component DEVICE_CLASSES."""
-        return None
+        self._attr_name = "Sign-ins per hour"
+        self._attr_device_info = {"identifiers": {("edilkaminv2", self._mac_address)}}
+        self._attr_icon = "mdi:login"
+        self._attr_entity_category = EntityCategory.DIAGNOSTIC
+        self._attr_state_class = SensorStateClass.MEASUREMENT
 
     @property
     def unique_id(self):
         """Return a unique_id for this entity."""
-        return f"{self._mac_address}_actual_power"
+        return f"{self._mac_address}_sign_ins_per_hour"
 
     @property
     def state(self):
         """Return the state of the sensor."""
         return self._state
 
-    def _handle_coordinator_update(self) -> None:
-        """Fetch new state data for the sensor."""
-        self._state = self.coordinator.get_actual_power()
-        self.async_write_ha_state()
-
-
-class EdilkaminOperationalSensor(CoordinatorEntity, SensorEntity):
-    """Representation of a Sensor."""
-
-    def __init__(self, coordinator) -> None:
-        """Initialize the sensor."""
-        super().__init__(coordinator)
-        self._state = None
-        self._mac_address = self.coordinator.get_mac_address()
-        self._attr_icon = "mdi:eye"
-        self._attributes: dict[str, Any] = {}
-
-        self._attr_name = "Operational phase"
-        self._attr_options = list(OPERATIONAL_STATES.values())
-        self._attr_device_info = {"identifiers": {("edilkaminv2", self._mac_address)}}
-
-    @property
-    def device_class(self):
-        """Return the class of this device, from component DEVICE_CLASSES."""
-        return SensorDeviceClass.ENUM
-
-    @property
-    def unique_id(self):
-        """Return a unique_id for this entity."""
-        return f"{self._mac_address}_operational_phase_sensor"
-
-    def _handle_coordinator_update(self) -> None:
+    def _async_update_attrs(self) -> None:
         """Fetch new state data for the sensor."""
-        op_state = self.coordinator.get_operational_phase()
+        self._state = self.coordinator.get_sign_ins_last_hour()
 
-        if op_state in OPERATIONAL_STATES:
-            self._attr_native_value = OPERATIONAL_STATES[op_state]
-        else:
-            # Error operational code unknown, shows only the code
-            self._attr_native_value = OPERATIONAL_STATES[7]
 
-        additional_att = {"value": op_state}
-        self._attr_extra_state_attributes = additional_att
-        self.async_write_ha_state()
+class EdilkaminCircuitSensor(EdilkaminEntity, SensorEntity):
+    """State of the circuit breaker of the account."""
 
-
-class EdilkaminAutonomySensor(CoordinatorEntity, SensorEntity):
-    """Representation of a Sensor."""
+    # Not read from the snapshot, written on every update.
+    _snapshot_fields = None
 
     def __init__(self, coordinator) -> None:
         """Initialize the sensor."""
         super().__init__(coordinator)
-        self._state = None
         self._mac_address = self.coordinator.get_mac_address()
 
-        self._attr_name = "Autonomy"
+        self._attr_name = "Cloud connection"
+        self._attr_unique_id = f"{self._mac_address}_cloud_connection"
         self._attr_device_info = {"identifiers": {("edilkaminv2", self._mac_address)}}
-        self._attr_icon = "mdi:timer"
-
-        additional_att = {
-            "description": "Time remaining before the stove turns off if no pellets are added"
-        }
-        self._attr_extra_state_attributes = additional_att
+        self._attr_icon = "mdi:cloud-alert"
+        self._attr_entity_category = EntityCategory.DIAGNOSTIC
+        self._attr_device_class = SensorDeviceClass.ENUM
+        self._attr_options = [STATE_CLOSED, STATE_HALF_OPEN, STATE_OPEN]
 
     @property
-    def device_class(self):
-        """Return the class of this device, from component DEVICE_CLASSES."""
-        return SensorDeviceClass.DURATION
+    def available(self) -> bool:
+        """Return True, the sensor reports the failures of the cloud."""
+        return True
 
     @property
-    def native_unit_of_measurement(self):
-        """Return the class of this device, from component DEVICE_CLASSES."""
-        return "min"
+    def native_value(self) -> str:
+        """Return the state of the circuit, also known before the first poll."""
+        return self.coordinator.breaker.state
 
     @property
-    def unique_id(self):
-        """Return a unique_id for this entity."""
-        return f"{self._mac_address}_autonomy"
+    def extra_state_attributes(self) -> dict[str, Any]:
+        """Return the failures and the time left before the next attempt."""
+        breaker = self.coordinator.breaker
+        return {
+            "consecutive_failures": breaker.failures,
+            "last_error": breaker.last_error,
+            "retry_in": round(breaker.retry_in),
+        }
 
-    @property
-    def state(self):
-        """Return the state of the sensor."""
-        return self._state
 
-    def _handle_coordinator_update(self) -> None:
-        """Fetch new state data for the sensor."""
-        autonomy_second = self.coordinator.get_autonomy_second()
-        # Convert seconds to minutes
-        minutes, sec = divmod(autonomy_second, 60)
-        self._state = f"{minutes}:{sec}"
-        self.async_write_ha_state()
+class EdilkaminLastPollSensor(EdilkaminEntity, SensorEntity):
+    """
+    Time of the last successful poll, the age of the state shown.
 
-class EdilkaminPowerOnsSensor(CoordinatorEntity, SensorEntity):
-    """Representation of a Sensor."""
+    It is written after every poll, including the ones reporting the same
+    data, which do not notify the other entities.
+    """
+
+    # Not read from the snapshot.
+    _snapshot_fields = frozenset()
+    _write_on_every_poll = True
 
     def __init__(self, coordinator) -> None:
         """Initialize the sensor."""
         super().__init__(coordinator)
-        self._state = self.coordinator.get_power_ons()
         self._mac_address = self.coordinator.get_mac_address()
 
-        self._attr_name = "Power ons"
+        self._attr_name = "Last successful poll"
+        self._attr_unique_id = f"{self._mac_address}_last_successful_poll"
         self._attr_device_info = {"identifiers": {("edilkaminv2", self._mac_address)}}
-        self._attr_icon = "mdi:counter"
-        self._attr_state_class = SensorStateClass.MEASUREMENT
+        self._attr_icon = "mdi:clock-check-outline"
+        self._attr_entity_category = EntityCategory.DIAGNOSTIC
+        self._attr_device_class = SensorDeviceClass.TIMESTAMP
 
     @property
-    def unique_id(self):
-        """Return a unique_id for this entity."""
-        return f"{self._mac_address}_power_ons"
+    def available(self) -> bool:
+        """Return True, the sensor tells how old the state shown is."""
+        return True
 
     @property
-    def state(self):
-        """Return the state of the sensor."""
-        return self._state
+    def native_value(self) -> datetime | None:
+        """Return the time of the last successful poll."""
+        return self.coordinator.last_successful_poll
 
-    def _handle_coordinator_update(self) -> None:
-        """Fetch new state data for the sensor."""
-        self._state = self.coordinator.get_power_ons()
-        self.async_write_ha_state()
\ No newline at end of file
+    @property
+    def extra_state_attributes(self) -> dict[str, Any]:
+        """Return the polls failed since then."""
+        return {"failed_polls": self.coordinator.failed_polls}
@@ -0,0 +1,107 @@
+"""Snapshot of the state of an Edilkamin stove."""
+
+from __future__ import annotations
+
+from operator import attrgetter
+import typing
+
+
+# Stand-in for the sections missing from a response, never modified.
+_EMPTY: dict = {}
+
+
+class EdilkaminSnapshot(typing.NamedTuple):
+    """
+    Fields of a device_info response used by the entities.
+
+    The response is decoded once per poll, the entities read the fields
+    instead of walking the nested dict on every update.
+    """
+
+    temperature: float | None = None
+    target_temperature: float | None = None
+    fan_1_speed: int | None = None
+    fan_1_setpoint: int | None = None
+    fan_1_active: bool | None = None
+    fan_2_speed: int | None = None
+    fan_2_setpoint: int | None = None
+    fan_2_active: bool | None = None
+    nb_fans: int | None = None
+    nb_alarms: int | None = None
+    actual_power: int | None = None
+    power_setpoint: int | None = None
+    power: bool | None = None
+    pellet_in_reserve: bool | None = None
+    airkare: bool | None = None
+    relax: bool | None = None
+    chrono_mode: bool | None = None
+    operational_phase: int | None = None
+    autonomy_time: int | None = None
+    standby_mode: bool | None = None
+    standby_waiting_time: int | None = None
+    power_ons: int | None = None
+    auto: bool | None = None
+
+    @classmethod
+    def from_device_info(cls, info: dict | None) -> EdilkaminSnapshot:
+        """Decode a device_info response, missing entries are None."""
+        info = info or _EMPTY
+        status = info.get("status") or _EMPTY
+        nvm = info.get("nvm") or _EMPTY
+        state = status.get("state") or _EMPTY
+        flags = status.get("flags") or _EMPTY
+        fans = status.get("fans") or _EMPTY
+        flags2 = (status.get("pump") or _EMPTY).get("flags2") or _EMPTY
+        user_parameters = nvm.get("user_parameters") or _EMPTY
+        return cls(
+            temperature=(status.get("temperatures") or _EMPTY).get("enviroment"),
+            target_temperature=user_parameters.get("enviroment_1_temperature"),
+            fan_1_speed=fans.get("fan_1_speed"),
+            fan_1_setpoint=user_parameters.get("fan_1_ventilation"),
+            fan_1_active=flags2.get("fan_1_active"),
+            fan_2_speed=fans.get("fan_2_speed"),
+            fan_2_setpoint=user_parameters.get("fan_2_ventilation"),
+            fan_2_active=flags2.get("fan_2_active"),
+            nb_fans=(nvm.get("installer_parameters") or _EMPTY).get("fans_number"),
+            nb_alarms=(nvm.get("alarms_log") or _EMPTY).get("index"),
+            actual_power=state.get("actual_power"),
+            power_setpoint=user_parameters.get("manual_power"),
+            power=(status.get("commands") or _EMPTY).get("power"),
+            pellet_in_reserve=flags.get("is_pellet_in_reserve"),
+            airkare=flags.get("is_airkare_active"),
+            relax=flags.get("is_relax_active"),
+            chrono_mode=(nvm.get("chrono") or _EMPTY).get("is_active"),
+            operational_phase=state.get("operational_phase"),
+            autonomy_time=(status.get("pellet") or _EMPTY).get("autonomy_time"),
+            standby_mode=user_parameters.get("is_standby_active"),
+            standby_waiting_time=user_parameters.get("standby_waiting_time"),
+            power_ons=(nvm.get("total_counters") or _EMPTY).get("power_ons"),
+            auto=user_parameters.get("is_auto"),
+        )
+
+    def changed_fields(self, previous: EdilkaminSnapshot) -> frozenset[str]:
+        """Return the fields whose value differs from the `previous` snapshot."""
+        return frozenset(
+            field
+            for field, old, new in zip(self._fields, previous, self)
+            if old != new
+        )
+
+
+def compile_accessor(
+    field: str, convert: typing.Callable[[typing.Any], typing.Any] | None = None
+) -> typing.Callable[[EdilkaminSnapshot], typing.Any]:
+    """
+    Return a function reading `field` of a snapshot, converted by `convert`.
+
+    The accessor is built once per entity, missing values are not converted.
+    """
+    getter = attrgetter(field)
+    if convert is None:
+        return getter
+
+    def accessor(snapshot: EdilkaminSnapshot) -> typing.Any:
+        value = getter(snapshot)
+        return None if value is None else convert(value)
+
+    return accessor
@@ -1,14 +1,19 @@
 """Platform for sensor integration."""
 from __future__ import annotations
 
+from collections.abc import Awaitable, Callable
+from dataclasses import dataclass
 import logging
-from homeassistant.components.switch import SwitchEntity
+from typing import Any
+
+from homeassistant.components.switch import SwitchEntity, SwitchEntityDescription
 from homeassistant.core import HomeAssistant
 from homeassistant.exceptions import HomeAssistantError
-from homeassistant.helpers.update_coordinator import CoordinatorEntity
 
 
-from .const import DOMAIN
+from .coordinator import EdilkaminCoordinator
+from .entity import EdilkaminEntity
+from .snapshot import EdilkaminSnapshot, compile_accessor
 from custom_components.edilkaminv2.api.edilkamin_async_api import (
     EdilkaminAsyncApi,
     NotInRightState,
@@ -16,214 +21,143 @@ from custom_components.edilkaminv2.api.edilkamin_async_api import (
 
 _LOGGER = logging.getLogger(__name__)
 
+STANDBY_DESCRIPTION = "When the Stand-by function is active, in the automatic and chrono modes, the product switches off once the temperature set-point is reached and turns on again when the room temperature drops below the chosen value."
+
+
+def _standby_attributes(snapshot: EdilkaminSnapshot) -> dict[str, Any]:
+    """Return the standby waiting time as attributes."""
+    # standby_waiting_time --> temps d'attente standby
+    attributes = {"description": STANDBY_DESCRIPTION}
+    if snapshot.standby_waiting_time is not None:
+        standby_minutes, stand_by_sec = divmod(snapshot.standby_waiting_time, 60)
+        attributes["details"] = f"{standby_minutes}:{stand_by_sec} min"
+    return attributes
+
+
+def _fresh_is_auto(coordinator: EdilkaminCoordinator) -> bool | None:
+    """Return the polled auto mode, or None if it must be fetched again."""
+    snapshot = coordinator.get_fresh_snapshot()
+    return None if snapshot is None else snapshot.auto
+
+
+@dataclass(frozen=True, kw_only=True)
+class EdilkaminSwitchEntityDescription(SwitchEntityDescription):
+    """Describe an Edilkamin switch read from the snapshot."""
+
+    field: str
+    turn_on_fn: Callable[[EdilkaminCoordinator], Awaitable]
+    turn_off_fn: Callable[[EdilkaminCoordinator], Awaitable]
+    attributes_fn: Callable[[EdilkaminSnapshot], dict[str, Any]] | None = None
+    attributes_fields: frozenset[str] = frozenset()
+
+
+# The key of a description is the suffix of the unique_id of its switch.
+SWITCH_TYPES: tuple[EdilkaminSwitchEntityDescription, ...] = (
+    EdilkaminSwitchEntityDescription(
+        key="airekare_switch",
+        name="Airekare",
+        icon="mdi:air-filter",
+        field="airkare",
+        turn_on_fn=lambda coordinator: coordinator.api.enable_airkare(),
+        turn_off_fn=lambda coordinator: coordinator.api.disable_airkare(),
+    ),
+    # EdilkaminSwitchEntityDescription(
+    #     key="power_switch",
+    #     icon="mdi:power",
+    #     field="power",
+    #     turn_on_fn=lambda coordinator: coordinator.api.enable_power(),
+    #     turn_off_fn=lambda coordinator: coordinator.api.disable_power(),
+    # ),
+    EdilkaminSwitchEntityDescription(
+        key="relax_switch",
+        name="Relax mode",
+        icon="mdi:weather-night",
+        field="relax",
+        turn_on_fn=lambda coordinator: coordinator.api.enable_relax(),
+        turn_off_fn=lambda coordinator: coordinator.api.disable_relax(),
+    ),
+    EdilkaminSwitchEntityDescription(
+        key="chrono_mode_switch",
+        name="Chrono mode",
+        icon="mdi:calendar-clock",
+        field="chrono_mode",
+        turn_on_fn=lambda coordinator: coordinator.api.enable_chrono_mode(),
+        turn_off_fn=lambda coordinator: coordinator.api.disable_chrono_mode(),
+    ),
+    EdilkaminSwitchEntityDescription(
+        key="standby_mode_switch",
+        name="Stand by mode",
+        icon="mdi:pause-circle-outline",
+        field="standby_mode",
+        turn_on_fn=lambda coordinator: coordinator.api.enable_standby_mode(
+            _fresh_is_auto(coordinator)
+        ),
+        turn_off_fn=lambda coordinator: coordinator.api.disable_standby_mode(
+            _fresh_is_auto(coordinator)
+        ),
+        attributes_fn=_standby_attributes,
+        attributes_fields=frozenset({"standby_waiting_time"}),
+    ),
+)
+
 
 async def async_setup_entry(hass: HomeAssistant, config_entry, async_add_devices):
     """Add sensors for passed config_entry in HA."""
-    async_api = hass.data[DOMAIN][config_entry.entry_id]
-    coordinator = hass.data[DOMAIN]["coordinator"]
+    coordinator = config_entry.runtime_data
+    async_api = coordinator.api
 
     async_add_devices(
         [
-            EdilkaminAirekareSwitch(async_api, coordinator),
-            # EdilkaminPowerSwitch(async_api, coordinator),
-            EdilkaminRelaxSwitch(async_api, coordinator),
-            EdilkaminChronoModeSwitch(async_api, coordinator),
-            EdilkaminStandByModeSwitch(async_api, coordinator),
+            EdilkaminSwitch(async_api, coordinator, description)
+            for description in SWITCH_TYPES
         ]
     )
 
 
-class EdilkaminAirekareSwitch(CoordinatorEntity, SwitchEntity):
-    """Representation of a Sensor."""
-
-    def __init__(self, api: EdilkaminAsyncApi, coordinator) -> None:
-        """Initialize the sensor."""
-        super().__init__(coordinator)
-        self._state = None
-        self._api = api
-        self._mac_address = api.get_mac_address()
-        self._attr_icon = "mdi:air-filter"
-        self._attr_name = "Airekare"
-        self._attr_device_info = {"identifiers": {("edilkaminv2", self._mac_address)}}
-
-    @property
-    def is_on(self):
-        """Return True if the switch sensor is on."""
-        return self.coordinator.get_airkare_status()
-
-    @property
-    def unique_id(self):
-        """Return a unique_id for this entity."""
-        return f"{self._mac_address}_airekare_switch"
-
-    async def async_turn_on(self, **kwargs) -> None:
-        """Turn the entity on."""
-        await self._api.enable_airkare()
-        await self.coordinator.async_refresh()
-
-    async def async_turn_off(self, **kwargs):
-        """Turn the entity off."""
-        await self._api.disable_airkare()
-        await self.coordinator.async_refresh()
+class EdilkaminSwitch(EdilkaminEntity, SwitchEntity):
+    """Representation of a Switch."""
 
+    entity_description: EdilkaminSwitchEntityDescription
 
-
-# class EdilkaminPowerSwitch(CoordinatorEntity, SwitchEntity):
-#     """Representation of a Sensor."""
-
-#     def __init__(self, api: EdilkaminAsyncApi, coordinator) -> None:
-#         """Initialize the sensor."""
-#         super().__init__(coordinator)
-#         self._state = None
-#         self._api = api
-#         self._mac_address = self.coordinator.get_mac_address()
-
-#         self._attr_device_info = {"identifiers": {("edilkamin", self._mac_address)}}
-#         self._attr_icon = "mdi:power"
-
-#     @property
-#     def is_on(self):
-#         """Return True if the binary sensor is on."""
-#         return self.coordinator.get_power_status()
-
-#     @property
-#     def unique_id(self):
-#         """Return a unique_id for this entity."""
-#         return f"{self._mac_address}_power_switch"
-
-#     async def async_turn_on(self, **kwargs) -> None:
-#         """Turn the entity on."""
-#         await self._api.enable_power()
-#         await self.coordinator.async_refresh()
-
-#     async def async_turn_off(self, **kwargs):
-#         """Turn the entity off."""
-#         await self._api.disable_power()
-#         await self.coordinator.async_refresh()
-
-
-
-class EdilkaminRelaxSwitch(CoordinatorEntity, SwitchEntity):
-    """Representation of a Sensor."""
-
-    def __init__(self, api: EdilkaminAsyncApi, coordinator) -> None:
-        """Initialize the sensor."""
+    def __init__(
+        self,
+        api: EdilkaminAsyncApi,
+        coordinator,
+        description: EdilkaminSwitchEntityDescription,
+    ) -> None:
+        """Initialize the switch."""
         super().__init__(coordinator)
-        self._state = None
+        self.entity_description = description
         self._api = api
-        self._mac_address = self.coordinator.get_mac_address()
-        self._attr_icon = "mdi:weather-night"
-        self._attr_name = "Relax mode"
-        self._attr_device_info = {"identifiers": {("edilkaminv2", self._mac_address)}}
-
-    @property
-    def is_on(self):
-        """Return True if the binary sensor is on."""
-        return self.coordinator.get_relax_status()
-
-    @property
-    def unique_id(self):
-        """Return a unique_id for this entity."""
-        return f"{self._mac_address}_relax_switch"
-
-    async def async_turn_on(self, **kwargs) -> None:
-        """Turn the entity on."""
-        await self._api.enable_relax()
-        await self.coordinator.async_refresh()
-
-    async def async_turn_off(self, **kwargs):
-        """Turn the entity off."""
-        await self._api.disable_relax()
-        await self.coordinator.async_refresh()
-
-
-class EdilkaminChronoModeSwitch(CoordinatorEntity, SwitchEntity):
-    """Representation of a Sensor."""
+        self._mac_address = api.get_mac_address()
+        self._value = compile_accessor(description.field)
+        self._snapshot_fields = description.attributes_fields | {description.field}
 
-    def __init__(self, api: EdilkaminAsyncApi, coordinator) -> None:
-        """Initialize the sensor."""
-        super().__init__(coordinator)
-        self._state = None
-        self._api = api
-        self._mac_address = self.coordinator.get_mac_address()
-        self._attr_icon = "mdi:calendar-clock"
-        self._attr_name = "Chrono mode"
+        self._attr_unique_id = f"{self._mac_address}_{description.key}"
         self._attr_device_info = {"identifiers": {("edilkaminv2", self._mac_address)}}
 
-    @property
-    def is_on(self):
-        """Return True if the binary sensor is on."""
-        return self.coordinator.get_chrono_mode_status()
-
-    @property
-    def unique_id(self):
-        """Return a unique_id for this entity."""
-        return f"{self._mac_address}_chrono_mode_switch"
+    def _async_update_attrs(self) -> None:
+        """Fetch new state data for the switch."""
+        self._attr_is_on = self._value(self.coordinator.data)
+        if self.entity_description.attributes_fn is not None:
+            self._attr_extra_state_attributes = self.entity_description.attributes_fn(
+                self.coordinator.data
+            )
 
     async def async_turn_on(self, **kwargs) -> None:
         """Turn the entity on."""
-        await self._api.enable_chrono_mode()
-        await self.coordinator.async_refresh()
+        await self._async_send(self.entity_description.turn_on_fn)
 
     async def async_turn_off(self, **kwargs):
         """Turn the entity off."""
-        await self._api.disable_chrono_mode()
-        await self.coordinator.async_refresh()
-
-
-class EdilkaminStandByModeSwitch(CoordinatorEntity, SwitchEntity):
-    """Representation of a Sensor."""
-
-    def __init__(self, api: EdilkaminAsyncApi, coordinator) -> None:
-        """Initialize the sensor."""
-        super().__init__(coordinator)
-        self._state = None
-        self._api = api
-        self._mac_address = self.coordinator.get_mac_address()
-        self._attr_icon = "mdi:pause-circle-outline"
+        await self._async_send(self.entity_description.turn_off_fn)
 
-        self._attr_name = "Stand by mode"
-        self._attr_device_info = {"identifiers": {("edilkaminv2", self._mac_address)}}
-
-        # standby_waiting_time --> temps d'attente standby
-
-        standby_waiting_time_second = self.coordinator.get_standby_waiting_time()
-        standby_minutes, stand_by_sec = divmod(standby_waiting_time_second, 60)
-        standby_waiting_time = f"{standby_minutes}:{stand_by_sec} min"
-
-        additional_att = {
-            "description": "When the Stand-by function is active, in the automatic and chrono modes, the product switches off once the temperature set-point is reached and turns on again when the room temperature drops below the chosen value.",
-            "details": standby_waiting_time,
-        }
-        self._attr_extra_state_attributes = additional_att
-
-    @property
-    def is_on(self):
-        """Return True if the binary sensor is on."""
-        return self.coordinator.get_standby_mode()
-
-    @property
-    def unique_id(self):
-        """Return a unique_id for this entity."""
-        return f"{self._mac_address}_standby_mode_switch"
-
-    async def async_turn_on(self, **kwargs) -> None:
-        """Turn the entity on."""
+    async def _async_send(
+        self, command: Callable[[EdilkaminCoordinator], Awaitable]
+    ) -> None:
+        """Send a command, the stove may refuse it in its current state."""
         try:
-            await self._api.enable_standby_mode()
-            await self.coordinator.async_refresh()
+            await command(self.coordinator)
         except NotInRightState as e:
             _LOGGER.warning(e)
-            self._attr_is_on = False
-            await self.coordinator.async_refresh()
             raise HomeAssistantError(e) from e
-
-    async def async_turn_off(self, **kwargs):
-        """Turn the entity off."""
-        try:
-            await self._api.disable_standby_mode()
-            await self.coordinator.async_refresh()
-        except NotInRightState as e:
-            _LOGGER.warning(e)
-            self._attr_is_on = True
-            await self.coordinator.async_refresh()
\ No newline at end of file
@@ -0,0 +1,216 @@
+"""Fixtures of the Edilkamin tests."""
+import asyncio
+import base64
+import copy
+import json
+import time
+from types import SimpleNamespace
+
+import pytest
+from pytest_homeassistant_custom_component.common import MockConfigEntry
+
+from custom_components.edilkaminv2 import const
+from custom_components.edilkaminv2.api import (
+    command_queue,
+    session as session_module,
+    token_manager as token_manager_module,
+    transport as transport_module,
+)
+from custom_components.edilkaminv2.api.edilkamin_async_api import EdilkaminAsyncApi
+from custom_components.edilkaminv2.api.token_manager import TokenManager
+
+MAC_ADDRESS = "AA:BB:CC:DD:EE:FF"
+OTHER_MAC_ADDRESS = "11:22:33:44:55:66"
+DEVICE_INFO = {
+    "status": {
+        "commands": {"power": True},
+        "temperatures": {"enviroment": 20.5},
+        "fans": {"fan_1_speed": 3, "fan_2_speed": 2},
+        "flags": {
+            "is_pellet_in_reserve": False,
+            "is_airkare_active": False,
+            "is_relax_active": True,
+        },
+        "pump": {"flags2": {"fan_1_active": True, "fan_2_active": False}},
+        "pellet": {"autonomy_time": 7200},
+        "state": {"actual_power": 3, "operational_phase": 2},
+    },
+    "nvm": {
+        "user_parameters": {
+            "enviroment_1_temperature": 21.0,
+            "fan_1_ventilation": 3,
+            "fan_2_ventilation": 2,
+            "manual_power": 3,
+            "is_auto": False,
+            "is_standby_active": False,
+            "standby_waiting_time": 600,
+        },
+        "installer_parameters": {"fans_number": 2},
+        "chrono": {"is_active": False},
+        "total_counters": {"power_ons": 412},
+        "alarms_log": {"index": 0, "alarms": []},
+    },
+}
+# Lifetime, in seconds, of the tokens handed out by the fake sign-in.
+TOKEN_LIFETIME = 3600
+
+
+def _make_token(expires_at: float, number: int) -> str:
+    """Return an unsigned JWT expiring at `expires_at`."""
+    claims = json.dumps({"exp": expires_at, "n": number}).encode()
+    return "header." + base64.urlsafe_b64encode(claims).decode().rstrip("=") + ".sig"
+
+
+class FakeExecutor:
+    """Run the calls in the event loop, after letting the other tasks run."""
+
+    def __init__(self) -> None:
+        """Initialize the class."""
+        self.is_shutdown = False
+
+    async def async_run(self, func, *args):
+        """Run `func` and return its result, drop it once shut down."""
+        if self.is_shutdown:
+            raise RuntimeError("cannot schedule new futures after shutdown")
+        await asyncio.sleep(0)
+        if self.is_shutdown:
+            # The pool cancels the calls still waiting for a thread.
+            raise asyncio.CancelledError
+        return func(*args)
+
+    def shutdown(self) -> None:
+        """Refuse the next calls, as the pool does."""
+        self.is_shutdown = True
+
+
+class FakeCloud:
+    """Record the commands, and raise the errors queued for their name."""
+
+    def __init__(self) -> None:
+        """Initialize the class."""
+        self.commands: list[tuple[str, dict]] = []
+        self.errors: dict[str, list[Exception]] = {}
+        self.info = copy.deepcopy(DEVICE_INFO)
+        self.polled: list[str] = []
+
+    @property
+    def polls(self) -> int:
+        """Return the number of device_info calls."""
+        return len(self.polled)
+
+    def device_info(
+        self, base_url: str, token: str, mac_address: str, timeout: float
+    ) -> dict:
+        """Return the device_info of the stove, or raise the next error queued."""
+        self.polled.append(mac_address)
+        if errors := self.errors.get("device_info"):
+            raise errors.pop(0)
+        return copy.deepcopy(self.info)
+
+    def mqtt_command(
+        self,
+        base_url: str,
+        token: str,
+        mac_address: str,
+        payload: dict,
+        timeout: float,
+    ) -> str:
+        """Record the command, and raise the next error queued for it."""
+        self.commands.append((token, payload))
+        if errors := self.errors.get(payload["name"]):
+            raise errors.pop(0)
+        return "Command executed successfully"
+
+
+@pytest.fixture(autouse=True)
+def auto_enable_custom_integrations(enable_custom_integrations):
+    """Enable the loading of the integration by Home Assistant."""
+    yield
+
+
+def _add_config_entry(hass, mac_address: str) -> MockConfigEntry:
+    """Add the config entry of a stove of the account to Home Assistant."""
+    entry = MockConfigEntry(
+        domain=const.DOMAIN,
+        data={
+            const.MAC_ADDRESS: mac_address,
+            const.USERNAME: "username",
+            const.PASSWORD: "password",
+        },
+        unique_id=mac_address,
+        version=2,
+    )
+    entry.add_to_hass(hass)
+    return entry
+
+
+@pytest.fixture
+def config_entry(hass) -> MockConfigEntry:
+    """Return the config entry of a stove, added to Home Assistant."""
+    return _add_config_entry(hass, MAC_ADDRESS)
+
+
+@pytest.fixture
+def other_config_entry(hass) -> MockConfigEntry:
+    """Return the config entry of a second stove of the same account."""
+    return _add_config_entry(hass, OTHER_MAC_ADDRESS)
+
+
+@pytest.fixture
+def sign_ins(monkeypatch) -> list:
+    """Replace the sign-in to the cloud, and return the tokens it handed out."""
+    tokens = []
+
+    def sign_in(username: str, password: str) -> str:
+        tokens.append(_make_token(time.time() + TOKEN_LIFETIME, len(tokens)))
+        return tokens[-1]
+
+    monkeypatch.setattr(token_manager_module, "sign_in", sign_in)
+    return tokens
+
+
+@pytest.fixture
+async def token_manager(hass, sign_ins):
+    """Return a token manager signing in with the fake sign-in."""
+    manager = TokenManager(hass, "username", "password", FakeExecutor())
+    yield manager
+    manager.async_shutdown()
+
+
+@pytest.fixture
+def timers(monkeypatch) -> list[SimpleNamespace]:
+    """Record the flushes scheduled by the command queues, for the test to run them."""
+    timers = []
+
+    def call_later(hass, delay: float, action):
+        timer = SimpleNamespace(delay=delay, action=action, cancelled=False)
+        timers.append(timer)
+
+        def cancel() -> None:
+            timer.cancelled = True
+
+        return cancel
+
+    monkeypatch.setattr(command_queue, "async_call_later", call_later)
+    return timers
+
+
+@pytest.fixture
+def cloud(monkeypatch) -> FakeCloud:
+    """Replace the requests of the executor transport by a fake cloud."""
+    cloud = FakeCloud()
+    monkeypatch.setattr(session_module, "EdilkaminExecutor", FakeExecutor)
+    monkeypatch.setattr(transport_module, "_device_info", cloud.device_info)
+    monkeypatch.setattr(transport_module, "_mqtt_command", cloud.mqtt_command)
+    return cloud
+
+
+@pytest.fixture
+async def api(hass, sign_ins, cloud):
+    """Return an api talking to the fake cloud."""
+    api = EdilkaminAsyncApi(
+        MAC_ADDRESS, "username", "password", hass, command_delay=1
+    )
+    yield api
+    await api.async_shutdown()
+    await hass.async_block_till_done()
@@ -0,0 +1,105 @@
+"""Test the stoves of an Edilkamin account polled together."""
+import asyncio
+
+import pytest
+
+from custom_components.edilkaminv2.account import ACCOUNTS, EdilkaminAccount
+from custom_components.edilkaminv2.api.edilkamin_async_api import EdilkaminAsyncApi
+from custom_components.edilkaminv2.api.session import EdilkaminSession
+from custom_components.edilkaminv2.const import DOMAIN
+from custom_components.edilkaminv2.coordinator import EdilkaminCoordinator
+
+from .conftest import MAC_ADDRESS, OTHER_MAC_ADDRESS
+
+
+@pytest.fixture
+async def account(hass, sign_ins, cloud):
+    """Return an account signing in to the fake cloud."""
+    account = EdilkaminAccount(
+        hass, "username", EdilkaminSession(hass, "username", "password")
+    )
+    yield account
+    account.session.async_shutdown()
+
+
+@pytest.fixture
+async def stoves(hass, account) -> list[EdilkaminCoordinator]:
+    """Return the coordinators of two stoves of the account."""
+    coordinators = []
+    for mac_address in (MAC_ADDRESS, OTHER_MAC_ADDRESS):
+        api = EdilkaminAsyncApi(
+            mac_address, "username", "password", hass, session=account.session
+        )
+        coordinator = EdilkaminCoordinator(hass, api, account=account)
+        account.async_add_coordinator(coordinator)
+        coordinators.append(coordinator)
+    yield coordinators
+    for coordinator in coordinators:
+        await coordinator.api.async_shutdown()
+        await coordinator.async_shutdown()
+
+
+def _record_account_info(monkeypatch, coordinator: EdilkaminCoordinator) -> list:
+    """Record the polls handed to a coordinator by the account."""
+    received = []
+    set_account_info = coordinator.async_set_account_info
+
+    def record(info: dict) -> None:
+        received.append(info)
+        set_account_info(info)
+
+    monkeypatch.setattr(coordinator, "async_set_account_info", record)
+    return received
+
+
+async def test_poll_fetches_the_stoves_due(hass, monkeypatch, stoves, cloud, sign_ins):
+    """Test the poll of a stove hands their data to the other stoves due."""
+    first, second = stoves
+    handed_to_second = _record_account_info(monkeypatch, second)
+
+    await first.async_refresh()
+
+    assert sorted(cloud.polled) == sorted([MAC_ADDRESS, OTHER_MAC_ADDRESS])
+    assert len(handed_to_second) == 1
+    assert second.data == first.data
+    # The stoves share the token.
+    assert len(sign_ins) == 1
+
+    # The second stove was just polled, its next poll fetches it alone.
+    await first.async_refresh()
+    assert cloud.polled[2:] == [MAC_ADDRESS]
+    assert len(handed_to_second) == 1
+
+
+async def test_waiting_stoves_get_their_result(hass, monkeypatch, stoves, cloud):
+    """Test the stoves polling at the same time share one cycle."""
+    first, second = stoves
+    handed = [_record_account_info(monkeypatch, stove) for stove in stoves]
+
+    await asyncio.gather(first.async_refresh(), second.async_refresh())
+
+    assert sorted(cloud.polled) == sorted([MAC_ADDRESS, OTHER_MAC_ADDRESS])
+    # Each stove waited for the cycle, and took its own result.
+    assert handed == [[], []]
+    assert first.last_update_success
+    assert second.last_update_success
+
+
+async def test_last_stove_releases_the_account(
+    hass, config_entry, other_config_entry, sign_ins, cloud
+):
+    """Test the entries of an account share it until the last one unloads."""
+    assert await hass.config_entries.async_setup(config_entry.entry_id)
+    await hass.async_block_till_done()
+
+    account = hass.data[DOMAIN][ACCOUNTS]["username"]
+    for entry in (config_entry, other_config_entry):
+        assert entry.runtime_data.account is account
+    assert len(sign_ins) == 1
+
+    assert await hass.config_entries.async_unload(config_entry.entry_id)
+    assert hass.data[DOMAIN][ACCOUNTS] == {"username": account}
+
+    assert await hass.config_entries.async_unload(other_config_entry.entry_id)
+    await hass.async_block_till_done()
+    assert hass.data[DOMAIN][ACCOUNTS] == {}
@@ -0,0 +1,61 @@
+"""Test the alarm history of the Edilkamin stoves."""
+from datetime import datetime, timezone
+
+from custom_components.edilkaminv2.alarm_history import AlarmHistory
+
+MAC_ADDRESS = "AA:BB:CC:DD:EE:FF"
+OTHER_MAC_ADDRESS = "00:11:22:33:44:55"
+
+
+async def test_query_alarms(tmp_path):
+    """Test the stored alarms are queried by type, time and stove."""
+    history = AlarmHistory(None, str(tmp_path / "alarms.db"))
+    await history.async_store(
+        MAC_ADDRESS,
+        [
+            (0, {"type": 3, "timestamp": 1700000000}),
+            (1, {"type": 5, "timestamp": 1700000100}),
+            (2, {"type": 3, "timestamp": 1700000200}),
+        ],
+    )
+    await history.async_store(
+        OTHER_MAC_ADDRESS, [(0, {"type": 3, "timestamp": 1700000300})]
+    )
+    # An alarm seen again by a later poll is stored once.
+    await history.async_store(
+        MAC_ADDRESS, [(2, {"type": 3, "timestamp": 1700000200})]
+    )
+
+    alarms = await history.async_query(alarm_type=3)
+    assert [(alarm["mac_address"], alarm["index"]) for alarm in alarms] == [
+        ("001122334455", 0),
+        ("aabbccddeeff", 2),
+        ("aabbccddeeff", 0),
+    ]
+    assert alarms[0]["timestamp"] == "2023-11-14T22:18:20+00:00"
+
+    alarms = await history.async_query(
+        since=datetime.fromtimestamp(1700000100, timezone.utc),
+        until=datetime.fromtimestamp(1700000300, timezone.utc),
+    )
+    assert [alarm["index"] for alarm in alarms] == [2, 1]
+
+    alarms = await history.async_query(mac_address=OTHER_MAC_ADDRESS, limit=1)
+    assert [alarm["mac_address"] for alarm in alarms] == ["001122334455"]
+
+    await history.async_close()
+
+
+async def test_close_waits_for_the_pending_writes(hass, tmp_path):
+    """Test the alarms added before closing are stored, the later ones dropped."""
+    path = str(tmp_path / "alarms.db")
+    history = AlarmHistory(hass, path)
+    history.async_add(MAC_ADDRESS, [(0, {"type": 3, "timestamp": 1700000000})])
+    await history.async_close()
+    history.async_add(MAC_ADDRESS, [(1, {"type": 3, "timestamp": 1700000100})])
+    await hass.async_block_till_done()
+
+    history = AlarmHistory(hass, path)
+    alarms = await history.async_query()
+    assert [alarm["index"] for alarm in alarms] == [0]
+    await history.async_close()
@@ -0,0 +1,38 @@
+"""Test the alarm log of an Edilkamin stove."""
+from custom_components.edilkaminv2.alarms import AlarmLog, alarm_entries
+
+
+def _alarms_log(index: int, size: int = 4) -> dict:
+    """Return an alarms_log where alarm i has type i, written in slot i % size."""
+    alarms = [{"type": 0, "timestamp": 0}] * size
+    for i in range(index):
+        alarms[i % size] = {"type": i, "timestamp": 1700000000 + i}
+    return {"index": index, "alarms": alarms}
+
+
+def test_entries_wrap_around_the_log():
+    """Test the entries are read in order, past the end of the circular log."""
+    assert [i for i, _alarm in alarm_entries(_alarms_log(2))] == [0, 1]
+    entries = alarm_entries(_alarms_log(6), since=3)
+    assert [(i, alarm["type"]) for i, alarm in entries] == [(3, 3), (4, 4), (5, 5)]
+    # Alarms 0 and 1 were overwritten.
+    assert [i for i, _alarm in alarm_entries(_alarms_log(6))] == [2, 3, 4, 5]
+
+
+def test_only_added_alarms_are_returned():
+    """Test the first update reads the whole log, and the next ones the added alarms."""
+    log = AlarmLog(maxlen=3)
+
+    assert [i for i, _alarm in log.update(_alarms_log(2))] == [0, 1]
+    assert log.restarted
+    assert [alarm["type"] for alarm in log.attributes["errors"]] == [0, 1]
+
+    attributes = log.attributes
+    assert log.update(_alarms_log(2)) == []
+    assert log.attributes is attributes
+
+    new = log.update(_alarms_log(4))
+    assert not log.restarted
+    assert [i for i, _alarm in new] == [2, 3]
+    # The ring buffer keeps the last alarms.
+    assert [alarm["type"] for alarm in log.attributes["errors"]] == [1, 2, 3]
@@ -0,0 +1,65 @@
+"""Test the circuit breaker of an Edilkamin account."""
+import pytest
+
+from custom_components.edilkaminv2.api import circuit_breaker
+from custom_components.edilkaminv2.api.circuit_breaker import (
+    ERROR_AUTH,
+    STATE_CLOSED,
+    STATE_HALF_OPEN,
+    STATE_OPEN,
+    CircuitBreaker,
+)
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    """Control the time of the breaker, and draw the longest jitter."""
+    now = [1000.0]
+    monkeypatch.setattr(circuit_breaker.time, "monotonic", lambda: now[0])
+    monkeypatch.setattr(circuit_breaker.random, "uniform", lambda low, high: high)
+    return now
+
+
+def test_transient_errors_back_off_exponentially(clock):
+    """Test the circuit opens after the threshold, and doubles its pause."""
+    breaker = CircuitBreaker(failure_threshold=3, transient_backoff=30)
+
+    for _ in range(2):
+        breaker.record_failure(auth_error=False)
+        assert breaker.allow_request()
+    breaker.record_failure(auth_error=False)
+    assert breaker.state == STATE_OPEN
+    assert breaker.retry_in == 30
+    assert not breaker.allow_request()
+
+    # A single probe is let through once the pause is over.
+    clock[0] += 30
+    assert breaker.allow_request()
+    assert breaker.state == STATE_HALF_OPEN
+    assert not breaker.allow_request()
+
+    breaker.record_failure(auth_error=False)
+    assert breaker.state == STATE_OPEN
+    assert breaker.retry_in == 60
+
+    clock[0] += 60
+    assert breaker.allow_request()
+    breaker.record_success()
+    assert breaker.state == STATE_CLOSED
+    assert breaker.failures == 0
+    assert breaker.retry_in == 0
+
+
+def test_auth_error_opens_at_once(clock):
+    """Test an auth error opens the circuit for the longer auth pause."""
+    breaker = CircuitBreaker(auth_backoff=300, max_backoff=400)
+
+    breaker.record_failure(auth_error=True)
+    assert breaker.state == STATE_OPEN
+    assert breaker.last_error == ERROR_AUTH
+    assert breaker.retry_in == 300
+
+    clock[0] += 300
+    assert breaker.allow_request()
+    breaker.record_failure(auth_error=True)
+    assert breaker.retry_in == 400
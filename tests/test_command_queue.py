@@ -0,0 +1,63 @@
+"""Test the queue coalescing the commands of an Edilkamin stove."""
+import pytest
+
+from custom_components.edilkaminv2.api.command_queue import CommandQueue
+
+DELAY = 2
+
+
+@pytest.fixture
+def sent() -> list:
+    """Return the batches sent by the queue."""
+    return []
+
+
+@pytest.fixture
+async def queue(hass, sent, timers):
+    """Return a queue recording the batches it sends."""
+
+    async def send(payloads: list[dict]) -> None:
+        sent.append(payloads)
+
+    queue = CommandQueue(hass, send, DELAY)
+    yield queue
+    await queue.async_shutdown()
+
+
+async def test_last_value_of_each_command_is_sent(hass, queue, sent, timers):
+    """Test the commands are coalesced per name, and each one restarts the delay."""
+    queue.async_enqueue({"name": "fan_1_speed", "value": 1})
+    queue.async_enqueue({"name": "power", "value": 1})
+    queue.async_enqueue({"name": "fan_1_speed", "value": 3})
+
+    assert [timer.cancelled for timer in timers] == [True, True, False]
+    assert timers[-1].delay == DELAY
+    assert sent == []
+
+    timers[-1].action(None)
+    await hass.async_block_till_done()
+    assert sent == [
+        [{"name": "power", "value": 1}, {"name": "fan_1_speed", "value": 3}]
+    ]
+
+
+async def test_pending_commands_are_sent_on_unload(hass, queue, sent, timers):
+    """Test the pending commands are sent at once when the queue shuts down."""
+    queue.async_enqueue({"name": "power", "value": 1})
+
+    await queue.async_shutdown()
+
+    assert sent == [[{"name": "power", "value": 1}]]
+    assert timers[0].cancelled
+
+
+async def test_direct_command_drops_the_queued_one(hass, api, cloud, timers):
+    """Test a command sent at once supersedes the queued one with the same name."""
+    await api.send_command({"name": "fan_1_speed", "value": 3}, coalesce=True)
+    await api.execute_command({"name": "fan_1_speed", "value": 4})
+
+    timers[0].action(None)
+    await hass.async_block_till_done()
+    assert [payload for _token, payload in cloud.commands] == [
+        {"name": "fan_1_speed", "value": 4}
+    ]
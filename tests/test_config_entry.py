@@ -0,0 +1,168 @@
+"""Test the setup of Edilkamin config entries."""
+import asyncio
+import copy
+from datetime import timedelta
+
+from homeassistant.config_entries import ConfigEntryState
+from homeassistant.const import ATTR_ASSUMED_STATE
+from homeassistant.helpers import entity_registry as er
+from pytest_homeassistant_custom_component.common import async_fire_time_changed
+
+from custom_components.edilkaminv2.account import ACCOUNTS
+from custom_components.edilkaminv2.alarm_history import (
+    ALARM_HISTORY,
+    SERVICE_QUERY_ALARMS,
+)
+from custom_components.edilkaminv2.api.transport import ExecutorTransport
+from custom_components.edilkaminv2.const import (
+    DOMAIN,
+    MAC_ADDRESS,
+    STORAGE_KEY,
+    STORAGE_SAVE_DELAY,
+    STORAGE_VERSION,
+)
+
+from .conftest import DEVICE_INFO
+
+
+async def test_coordinator_and_entities_share_the_api(
+    hass, config_entry, sign_ins, cloud
+):
+    """Test the entry builds one api, so the stove signs in once."""
+    assert await hass.config_entries.async_setup(config_entry.entry_id)
+    await hass.async_block_till_done()
+
+    # The polls of the coordinator and the entities reuse the token.
+    assert len(sign_ins) == 1
+
+    assert await hass.config_entries.async_unload(config_entry.entry_id)
+    await hass.async_block_till_done()
+
+
+async def test_each_stove_has_its_coordinator(
+    hass, config_entry, other_config_entry, sign_ins, cloud
+):
+    """Test two stoves are polled by their own coordinator."""
+    # Setting up the integration sets up both entries.
+    assert await hass.config_entries.async_setup(config_entry.entry_id)
+    await hass.async_block_till_done()
+
+    entity_registry = er.async_get(hass)
+    for entry in (config_entry, other_config_entry):
+        coordinator = entry.runtime_data
+        assert coordinator.get_mac_address() == entry.data[MAC_ADDRESS]
+        entities = er.async_entries_for_config_entry(entity_registry, entry.entry_id)
+        assert entities
+        assert all(
+            entity.unique_id.startswith(entry.data[MAC_ADDRESS]) for entity in entities
+        )
+
+    for entry in (config_entry, other_config_entry):
+        assert await hass.config_entries.async_unload(entry.entry_id)
+    await hass.async_block_till_done()
+
+
+async def test_unload_sends_the_queued_commands(hass, config_entry, sign_ins, cloud):
+    """Test the commands still queued are sent before the account is released."""
+    assert await hass.config_entries.async_setup(config_entry.entry_id)
+    await hass.async_block_till_done()
+    api = config_entry.runtime_data.api
+    await api.send_command({"name": "fan_1_speed", "value": 3}, coalesce=True)
+
+    assert await hass.config_entries.async_unload(config_entry.entry_id)
+    await hass.async_block_till_done()
+
+    assert [payload for _token, payload in cloud.commands] == [
+        {"name": "fan_1_speed", "value": 3}
+    ]
+    assert api.session.executor.is_shutdown
+
+
+async def test_setup_waits_for_the_first_poll_without_stored_data(
+    hass, freezer, hass_storage, config_entry, sign_ins, cloud
+):
+    """Test a first install polls the stove before the entities come up."""
+    assert await hass.config_entries.async_setup(config_entry.entry_id)
+
+    coordinator = config_entry.runtime_data
+    assert cloud.polls == 1
+    assert not coordinator.stale
+    state = hass.states.get("sensor.temperature")
+    assert state.state == "20.5"
+    assert ATTR_ASSUMED_STATE not in state.attributes
+
+    # The poll is stored for the next run.
+    freezer.tick(timedelta(seconds=STORAGE_SAVE_DELAY + 1))
+    async_fire_time_changed(hass)
+    await hass.async_block_till_done()
+    key = STORAGE_KEY.format(entry_id=config_entry.entry_id)
+    assert hass_storage[key]["data"] == {"device_info": DEVICE_INFO}
+
+    assert await hass.config_entries.async_unload(config_entry.entry_id)
+    await hass.async_block_till_done()
+
+
+async def test_setup_starts_from_the_stored_data(
+    hass, monkeypatch, hass_storage, config_entry, sign_ins, cloud
+):
+    """Test the stored data is shown as assumed until the background poll."""
+    stored = copy.deepcopy(DEVICE_INFO)
+    stored["status"]["temperatures"]["enviroment"] = 18.0
+    hass_storage[STORAGE_KEY.format(entry_id=config_entry.entry_id)] = {
+        "version": STORAGE_VERSION,
+        "minor_version": 1,
+        "key": STORAGE_KEY.format(entry_id=config_entry.entry_id),
+        "data": {"device_info": stored},
+    }
+    # Hold the first poll, as a slow cloud would.
+    polled = asyncio.Event()
+    device_info = ExecutorTransport.device_info
+
+    async def slow_device_info(self, token: str, mac_address: str) -> dict:
+        await polled.wait()
+        return await device_info(self, token, mac_address)
+
+    monkeypatch.setattr(ExecutorTransport, "device_info", slow_device_info)
+
+    assert await hass.config_entries.async_setup(config_entry.entry_id)
+
+    coordinator = config_entry.runtime_data
+    assert coordinator.stale
+    state = hass.states.get("sensor.temperature")
+    assert state.state == "18.0"
+    assert state.attributes[ATTR_ASSUMED_STATE] is True
+
+    polled.set()
+    await hass.async_block_till_done(wait_background_tasks=True)
+
+    assert not coordinator.stale
+    state = hass.states.get("sensor.temperature")
+    assert state.state == "20.5"
+    assert ATTR_ASSUMED_STATE not in state.attributes
+    # The entities whose fields did not change are no longer assumed either.
+    assert ATTR_ASSUMED_STATE not in hass.states.get("switch.relax_mode").attributes
+
+    assert await hass.config_entries.async_unload(config_entry.entry_id)
+    await hass.async_block_till_done()
+
+
+async def test_failed_setup_releases_the_shared_data(
+    hass, hass_storage, config_entry, sign_ins, cloud
+):
+    """Test a setup failing after the account and alarm history were taken."""
+    # A store written by a newer version cannot be loaded.
+    key = STORAGE_KEY.format(entry_id=config_entry.entry_id)
+    hass_storage[key] = {
+        "version": STORAGE_VERSION + 1,
+        "minor_version": 1,
+        "key": key,
+        "data": {"device_info": DEVICE_INFO},
+    }
+
+    assert not await hass.config_entries.async_setup(config_entry.entry_id)
+    await hass.async_block_till_done()
+
+    assert config_entry.state is ConfigEntryState.SETUP_ERROR
+    assert hass.data[DOMAIN][ACCOUNTS] == {}
+    assert ALARM_HISTORY not in hass.data[DOMAIN]
+    assert not hass.services.has_service(DOMAIN, SERVICE_QUERY_ALARMS)
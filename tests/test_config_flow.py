@@ -0,0 +1,22 @@
+"""Test the options of an Edilkamin config entry."""
+from homeassistant.data_entry_flow import FlowResultType
+
+from custom_components.edilkaminv2.const import (
+    CONF_TRANSPORT,
+    DEFAULT_TRANSPORT,
+    TRANSPORT_AIOHTTP,
+)
+
+
+async def test_options_flow_selects_the_transport(hass, config_entry):
+    """Test the options form defaults to the executor and stores the choice."""
+    result = await hass.config_entries.options.async_init(config_entry.entry_id)
+    assert result["type"] is FlowResultType.FORM
+    assert result["data_schema"]({})[CONF_TRANSPORT] == DEFAULT_TRANSPORT
+
+    result = await hass.config_entries.options.async_configure(
+        result["flow_id"], user_input={CONF_TRANSPORT: TRANSPORT_AIOHTTP}
+    )
+
+    assert result["type"] is FlowResultType.CREATE_ENTRY
+    assert config_entry.options[CONF_TRANSPORT] == TRANSPORT_AIOHTTP
@@ -0,0 +1,319 @@
+"""Test the coordinator of an Edilkamin stove."""
+import copy
+from datetime import timedelta
+
+from homeassistant.helpers.storage import Store
+import pytest
+from pytest_homeassistant_custom_component.common import (
+    async_capture_events,
+    async_fire_time_changed,
+)
+
+from custom_components.edilkaminv2.confirmation import (
+    CONFIRM_INTERVAL,
+    CONFIRM_TIMEOUT,
+    STATUS_CONFIRMED,
+    STATUS_FAILED,
+    STATUS_PENDING,
+)
+from custom_components.edilkaminv2.const import (
+    CONF_SCAN_INTERVAL_OFF,
+    DEFAULT_UNAVAILABLE_AGE,
+    EVENT_ALARM,
+    STORAGE_VERSION,
+)
+from custom_components.edilkaminv2.coordinator import (
+    COMMAND_FAST_POLL_PERIOD,
+    EdilkaminCoordinator,
+)
+
+from .conftest import DEVICE_INFO
+
+
+async def _wait(hass, freezer, seconds: float) -> None:
+    """Move the clock forward and run the calls scheduled meanwhile."""
+    freezer.tick(timedelta(seconds=seconds))
+    async_fire_time_changed(hass)
+    await hass.async_block_till_done()
+
+
+@pytest.fixture
+async def coordinator(hass, api):
+    """Return a coordinator which polled the fake cloud once."""
+    coordinator = EdilkaminCoordinator(hass, api)
+    await coordinator.async_refresh()
+    yield coordinator
+    await coordinator.async_shutdown()
+
+
+async def test_command_is_applied_until_the_cloud_reports_it(
+    hass, freezer, coordinator, cloud
+):
+    """Test an accepted command is shown at once, and confirmed by a re-poll."""
+    await coordinator.api.disable_power()
+
+    assert coordinator.get_power_status() is False
+    assert coordinator.command_status == {"power": STATUS_PENDING}
+    assert cloud.polls == 1
+
+    # The cloud did not report the command yet.
+    await _wait(hass, freezer, CONFIRM_INTERVAL)
+    assert cloud.polls == 2
+    assert coordinator.get_power_status() is False
+
+    cloud.info["status"]["commands"]["power"] = False
+    await _wait(hass, freezer, CONFIRM_INTERVAL)
+    assert coordinator.command_status == {"power": STATUS_CONFIRMED}
+    assert coordinator.get_power_status() is False
+
+    # Nothing left to confirm.
+    await _wait(hass, freezer, CONFIRM_INTERVAL)
+    assert cloud.polls == 3
+
+
+async def test_confirmation_poll_is_processed(hass, freezer, coordinator, cloud):
+    """Test an alarm first seen by a confirmation poll fires its event once."""
+    events = async_capture_events(hass, EVENT_ALARM)
+    coordinator.async_apply_commands([{"name": "power", "value": False}])
+
+    cloud.info["status"]["commands"]["power"] = False
+    cloud.info["nvm"]["alarms_log"] = {
+        "index": 1,
+        "alarms": [{"type": i, "timestamp": 1700000000 + i} for i in range(4)],
+    }
+    await _wait(hass, freezer, CONFIRM_INTERVAL)
+
+    assert coordinator.command_status == {"power": STATUS_CONFIRMED}
+    assert coordinator.get_power_status() is False
+    assert [event.data["index"] for event in events] == [0]
+
+    # The next poll reports the same data as the confirmation poll.
+    unchanged_polls = coordinator.unchanged_polls
+    await coordinator.async_refresh()
+    assert coordinator.unchanged_polls == unchanged_polls + 1
+    assert len(events) == 1
+
+
+async def test_unconfirmed_command_fails_until_the_next_poll(
+    hass, freezer, coordinator, cloud
+):
+    """Test a command the cloud never reported is failed, then forgotten."""
+    await coordinator.api.disable_power()
+
+    await _wait(hass, freezer, CONFIRM_TIMEOUT)
+    assert coordinator.command_status == {"power": STATUS_FAILED}
+    assert coordinator.command_failed
+    # The polled value is shown again.
+    assert coordinator.get_power_status() is True
+
+    await coordinator.async_refresh()
+    assert coordinator.command_status == {}
+    assert not coordinator.command_failed
+
+
+@pytest.mark.parametrize(
+    ("phase", "interval"), [(0, 300), (1, 5), (2, 15), (3, 5), (4, 10), (5, 15)]
+)
+async def test_update_interval_follows_the_phase(coordinator, cloud, phase, interval):
+    """Test the stove is polled slowly while off, and fast during transitions."""
+    cloud.info["status"]["state"]["operational_phase"] = phase
+
+    await coordinator.async_refresh()
+
+    assert coordinator.update_interval == timedelta(seconds=interval)
+
+
+async def test_update_interval_option(hass, api, cloud):
+    """Test the interval of a phase can be changed in the options."""
+    cloud.info["status"]["state"]["operational_phase"] = 0
+    coordinator = EdilkaminCoordinator(
+        hass, api, scan_intervals={CONF_SCAN_INTERVAL_OFF: 600}
+    )
+
+    await coordinator.async_refresh()
+
+    assert coordinator.update_interval == timedelta(seconds=600)
+    await coordinator.async_shutdown()
+
+
+async def test_command_polls_fast_for_a_while(hass, freezer, coordinator, cloud):
+    """Test a command switches to the fastest interval, until the period ends."""
+    cloud.info["status"]["state"]["operational_phase"] = 0
+    await coordinator.async_refresh()
+
+    await coordinator.api.enable_relax()
+    assert coordinator.update_interval == timedelta(seconds=5)
+
+    freezer.tick(timedelta(seconds=COMMAND_FAST_POLL_PERIOD))
+    await coordinator.async_refresh()
+    assert coordinator.update_interval == timedelta(seconds=300)
+
+
+async def test_check_does_not_poll_fast(coordinator, cloud):
+    """Test the check command keeps the interval of the phase."""
+    cloud.info["status"]["state"]["operational_phase"] = 0
+    await coordinator.async_refresh()
+
+    await coordinator.api.check()
+
+    assert [payload for _token, payload in cloud.commands] == [
+        {"name": "check", "value": False}
+    ]
+    assert coordinator.update_interval == timedelta(seconds=300)
+
+
+def _record_updates(coordinator: EdilkaminCoordinator) -> list[bool]:
+    """Record the availability the entities are notified of."""
+    updates = []
+    coordinator.async_add_listener(lambda: updates.append(coordinator.data_available))
+    return updates
+
+
+async def test_failed_polls_keep_the_data_for_a_while(coordinator, cloud):
+    """Test the data stays available until too many polls failed in a row."""
+    updates = _record_updates(coordinator)
+    cloud.errors["device_info"] = [RuntimeError("Cloud down")] * 3
+
+    await coordinator.async_refresh()
+    await coordinator.async_refresh()
+    assert not coordinator.last_update_success
+    assert coordinator.failed_polls == 2
+    assert coordinator.data_available
+    assert coordinator.get_temperature() == 20.5
+
+    await coordinator.async_refresh()
+    assert not coordinator.data_available
+    # The failed poll notifies the entities, the next one only when they
+    # become unavailable.
+    assert updates == [True, False]
+
+
+async def test_old_data_becomes_unavailable(hass, freezer, api, cloud):
+    """Test the data stops being available once it is older than the limit."""
+    coordinator = EdilkaminCoordinator(hass, api, unavailable_failures=100)
+    await coordinator.async_refresh()
+    updates = _record_updates(coordinator)
+    cloud.errors["device_info"] = [RuntimeError("Cloud down")] * 100
+    await coordinator.async_refresh()
+
+    await _wait(hass, freezer, DEFAULT_UNAVAILABLE_AGE - 10)
+    assert coordinator.data_available
+
+    await _wait(hass, freezer, 10)
+    assert not coordinator.data_available
+    assert updates[-1] is False
+    await coordinator.async_shutdown()
+
+
+async def test_successful_poll_ends_the_grace_period(
+    hass, freezer, coordinator, cloud
+):
+    """Test a successful poll resets the failures and cancels the age timer."""
+    cloud.errors["device_info"] = [RuntimeError("Cloud down")] * 2
+    await coordinator.async_refresh()
+    await coordinator.async_refresh()
+    assert coordinator._unsub_grace is not None
+
+    await coordinator.async_refresh()
+    assert coordinator.last_update_success
+    assert coordinator.failed_polls == 0
+    assert coordinator._unsub_grace is None
+
+    # The count starts again, a single failure keeps the data available.
+    cloud.errors["device_info"] = [RuntimeError("Cloud down")]
+    await coordinator.async_refresh()
+    assert coordinator.data_available
+
+
+async def test_poll_listeners_are_called_on_unchanged_polls(coordinator):
+    """Test the poll listeners are called even when the entities are not notified."""
+    polls = []
+    remove_listener = coordinator.async_add_poll_listener(
+        lambda: polls.append(coordinator.last_successful_poll)
+    )
+    unchanged_polls = coordinator.unchanged_polls
+
+    await coordinator.async_refresh()
+    await coordinator.async_refresh()
+    assert coordinator.unchanged_polls == unchanged_polls + 2
+    assert len(polls) == 2
+
+    remove_listener()
+    await coordinator.async_refresh()
+    assert len(polls) == 2
+
+
+async def test_failed_queued_command_is_reverted(hass, coordinator, cloud, timers):
+    """Test a failed queued command has the entities read the polled data again."""
+    updates = []
+    coordinator.async_add_listener(lambda: updates.append(coordinator.changed_fields))
+    cloud.errors["fan_1_speed"] = [RuntimeError("Command refused")]
+    await coordinator.api.send_command(
+        {"name": "fan_1_speed", "value": 3}, coalesce=True
+    )
+
+    timers[-1].action(None)
+    await hass.async_block_till_done(wait_background_tasks=True)
+
+    assert coordinator.command_status == {"fan_1_speed": STATUS_FAILED}
+    assert coordinator.command_failed
+    assert "fan_1_setpoint" in updates[-1]
+
+
+async def test_account_poll_ends_the_stored_data(hass, hass_storage, api, cloud):
+    """Test a poll handed by the account clears the stale data once."""
+    hass_storage["edilkaminv2.test"] = {
+        "version": STORAGE_VERSION,
+        "minor_version": 1,
+        "key": "edilkaminv2.test",
+        "data": {"device_info": DEVICE_INFO},
+    }
+    coordinator = EdilkaminCoordinator(
+        hass, api, store=Store(hass, STORAGE_VERSION, "edilkaminv2.test")
+    )
+    assert await coordinator.async_load_stored_data()
+    updates = []
+    coordinator.async_add_listener(lambda: updates.append(coordinator.stale))
+
+    coordinator.async_set_account_info(copy.deepcopy(DEVICE_INFO))
+    assert updates == [False]
+
+    # The next update only notifies the entities of its own changes.
+    cloud.errors["device_info"] = [RuntimeError("Cloud down")]
+    await coordinator.async_refresh()
+    assert updates == [False, False]
+    await coordinator.async_shutdown()
+
+
+async def test_poll_notifies_the_entities_once(hass, hass_storage, api, cloud):
+    """Test a poll changing the data and the status notifies the entities once."""
+    stored = copy.deepcopy(DEVICE_INFO)
+    stored["status"]["temperatures"]["enviroment"] = 18.0
+    hass_storage["edilkaminv2.test"] = {
+        "version": STORAGE_VERSION,
+        "minor_version": 1,
+        "key": "edilkaminv2.test",
+        "data": {"device_info": stored},
+    }
+    coordinator = EdilkaminCoordinator(
+        hass,
+        api,
+        store=Store(hass, STORAGE_VERSION, "edilkaminv2.test"),
+        unavailable_failures=2,
+    )
+    await coordinator.async_load_stored_data()
+    updates = _record_updates(coordinator)
+
+    # The first poll ends the stale data and changes the temperature.
+    await coordinator.async_refresh()
+    assert updates == [True]
+
+    cloud.errors["device_info"] = [RuntimeError("Cloud down")] * 2
+    await coordinator.async_refresh()
+    await coordinator.async_refresh()
+    assert updates == [True, True, False]
+
+    # The poll succeeds again and the data is available again.
+    await coordinator.async_refresh()
+    assert updates == [True, True, False, True]
+    await coordinator.async_shutdown()
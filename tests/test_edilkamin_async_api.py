@@ -0,0 +1,86 @@
+"""Test the Edilkamin api."""
+import asyncio
+
+from custom_components.edilkaminv2.api import edilkamin_async_api
+from custom_components.edilkaminv2.api.edilkamin_async_api import (
+    COMMAND_FAILED,
+    COMMAND_SENT,
+    COMMAND_SKIPPED,
+)
+
+
+async def test_getters_share_a_recent_snapshot(api, cloud):
+    """Test the getters read one device_info until it is older than the TTL."""
+    assert await asyncio.gather(
+        api.get_temperature(), api.get_power_status(), api.get_relax_status()
+    ) == [20.5, True, True]
+    assert await api.get_airkare_status() is False
+    assert cloud.polls == 1
+
+    # The coordinator always polls the cloud.
+    await api.get_info(use_cache=False)
+    assert cloud.polls == 2
+
+
+async def test_snapshot_expires(api, cloud, monkeypatch):
+    """Test a snapshot older than the TTL is fetched again."""
+    await api.get_temperature()
+    monkeypatch.setattr(edilkamin_async_api, "INFO_CACHE_TTL", 0)
+
+    await api.get_temperature()
+    assert cloud.polls == 2
+
+
+async def test_command_drops_the_snapshot(api, cloud):
+    """Test a getter called after a command reads the new state."""
+    await api.get_power_status()
+    await api.execute_command({"name": "power", "value": 0})
+
+    await api.get_power_status()
+    assert cloud.polls == 2
+
+
+async def test_batch_stops_at_the_first_failure(api, cloud, sign_ins):
+    """Test the commands after a failed one are skipped, not sent."""
+    accepted = []
+    api.async_add_command_listener(accepted.append)
+    error = RuntimeError("Command refused")
+    cloud.errors["auto_mode"] = [error]
+    payloads = [
+        {"name": "power", "value": 1},
+        {"name": "auto_mode", "value": False},
+        {"name": "power_level", "value": 3},
+    ]
+
+    results = await api.execute_commands(payloads)
+
+    assert [result.status for result in results] == [
+        COMMAND_SENT,
+        COMMAND_FAILED,
+        COMMAND_SKIPPED,
+    ]
+    assert [result.payload for result in results] == payloads
+    assert results[1].error is error
+    # The commands sent share the token.
+    assert cloud.commands == [
+        (sign_ins[0], payloads[0]),
+        (sign_ins[0], payloads[1]),
+    ]
+    assert accepted == [[payloads[0]]]
+
+
+async def test_queued_commands_do_not_stop_at_a_failure(hass, api, cloud, timers):
+    """Test the queued commands are all sent, and the failed ones reported."""
+    accepted, failed = [], []
+    api.async_add_command_listener(accepted.append)
+    api.async_add_failed_command_listener(failed.append)
+    cloud.errors["fan_1_speed"] = [RuntimeError("Command refused")]
+    await api.send_command({"name": "fan_1_speed", "value": 3}, coalesce=True)
+    await api.send_command({"name": "power_level", "value": 2}, coalesce=True)
+
+    timers[-1].action(None)
+    await hass.async_block_till_done(wait_background_tasks=True)
+
+    assert len(cloud.commands) == 2
+    assert accepted == [[{"name": "power_level", "value": 2}]]
+    assert failed == [[{"name": "fan_1_speed", "value": 3}]]
@@ -0,0 +1,194 @@
+"""Test the entities of an Edilkamin stove."""
+from datetime import timedelta
+
+from homeassistant.exceptions import HomeAssistantError
+from homeassistant.helpers import entity_platform, entity_registry as er
+import pytest
+
+from custom_components.edilkaminv2.const import DEFAULT_STATE_MAX_AGE, DOMAIN
+from custom_components.edilkaminv2.entity import EdilkaminEntity
+
+from .conftest import MAC_ADDRESS
+
+STANDBY_DESCRIPTION = (
+    "When the Stand-by function is active, in the automatic and chrono modes, "
+    "the product switches off once the temperature set-point is reached and "
+    "turns on again when the room temperature drops below the chosen value."
+)
+# Entities described in tables, with the entity_id, state and attributes the
+# classes they replaced gave them for DEVICE_INFO.
+TABLE_ENTITIES = {
+    "actual_power": ("sensor.actual_power", "3", {}),
+    "autonomy": (
+        "sensor.autonomy",
+        "120:0",
+        {
+            "description": "Time remaining before the stove turns off if no "
+            "pellets are added"
+        },
+    ),
+    "fan1_sensor": ("sensor.fan_1", "3", {}),
+    "fan2_sensor": ("sensor.fan_2", "2", {}),
+    "nb_alarms_sensor": ("sensor.nb_alarms", "0", {"errors": []}),
+    "operational_phase_sensor": ("sensor.operational_phase", "On", {"value": 2}),
+    "power_ons": ("sensor.power_ons", "412", {}),
+    "temperature": ("sensor.temperature", "20.5", {}),
+    "airekare_switch": ("switch.airekare", "off", {}),
+    "chrono_mode_switch": ("switch.chrono_mode", "off", {}),
+    "relax_switch": ("switch.relax_mode", "on", {}),
+    "standby_mode_switch": (
+        "switch.stand_by_mode",
+        "off",
+        {"description": STANDBY_DESCRIPTION, "details": "10:0 min"},
+    ),
+    "tank_binary_sensor": ("binary_sensor.tank", "off", {}),
+}
+
+
+class _RecordingSnapshot:
+    """Snapshot recording the fields read from it."""
+
+    def __init__(self, snapshot) -> None:
+        """Initialize the class."""
+        self._snapshot = snapshot
+        self.read: set[str] = set()
+
+    def __getattr__(self, name: str):
+        """Record the field and return its value."""
+        self.read.add(name)
+        return getattr(self._snapshot, name)
+
+
+@pytest.fixture
+async def coordinator(hass, config_entry, sign_ins, cloud):
+    """Set up the entry, and return its coordinator."""
+    assert await hass.config_entries.async_setup(config_entry.entry_id)
+    await hass.async_block_till_done()
+    yield config_entry.runtime_data
+    assert await hass.config_entries.async_unload(config_entry.entry_id)
+    await hass.async_block_till_done()
+
+
+def _entity_id(hass, domain: str, key: str) -> str:
+    """Return the entity_id of the entity with this unique_id suffix."""
+    return er.async_get(hass).async_get_entity_id(domain, DOMAIN, f"{MAC_ADDRESS}_{key}")
+
+
+async def _poll(hass, freezer, coordinator) -> None:
+    """Poll the stove a second later, and write the states."""
+    freezer.tick(timedelta(seconds=1))
+    await coordinator.async_refresh()
+    await hass.async_block_till_done()
+
+
+async def test_unchanged_fields_skip_the_write(hass, freezer, coordinator, cloud):
+    """Test only the entities whose fields changed write their state."""
+    temperature = _entity_id(hass, "sensor", "temperature")
+    power_level = _entity_id(hass, "fan", "power_level_1")
+    before = {
+        entity_id: hass.states.get(entity_id)
+        for entity_id in (temperature, power_level)
+    }
+
+    await _poll(hass, freezer, coordinator)
+    for entity_id, state in before.items():
+        assert hass.states.get(entity_id).last_reported == state.last_reported
+
+    cloud.info["status"]["temperatures"]["enviroment"] = 21.5
+    await _poll(hass, freezer, coordinator)
+
+    assert hass.states.get(temperature).state == "21.5"
+    assert hass.states.get(temperature).last_reported > before[temperature].last_reported
+    assert (
+        hass.states.get(power_level).last_reported
+        == before[power_level].last_reported
+    )
+
+
+async def test_entities_read_only_their_fields(hass, coordinator):
+    """Test the fields declared by each entity cover the fields it reads."""
+    snapshot = coordinator.data
+    for platform in entity_platform.async_get_platforms(hass, DOMAIN):
+        for entity in platform.entities.values():
+            if (
+                not isinstance(entity, EdilkaminEntity)
+                or entity._snapshot_fields is None
+            ):
+                continue
+            recording = _RecordingSnapshot(snapshot)
+            coordinator._snapshot = coordinator.data = recording
+
+            entity._async_update_attrs()
+
+            assert recording.read <= entity._snapshot_fields, entity.entity_id
+    coordinator._snapshot = coordinator.data = snapshot
+
+
+async def test_table_entities_match_the_previous_ones(hass, coordinator):
+    """Test the described entities keep their unique_id, entity_id and state."""
+    for key, (entity_id, value, attributes) in TABLE_ENTITIES.items():
+        domain = entity_id.split(".")[0]
+        assert _entity_id(hass, domain, key) == entity_id
+
+        state = hass.states.get(entity_id)
+        assert state.state == value, entity_id
+        assert attributes.items() <= state.attributes.items(), entity_id
+
+
+async def _turn_on_standby(hass) -> None:
+    """Turn the standby mode switch on."""
+    await hass.services.async_call(
+        "switch", "turn_on", {"entity_id": "switch.stand_by_mode"}, blocking=True
+    )
+
+
+async def test_standby_is_checked_against_the_polled_state(
+    hass, coordinator, cloud
+):
+    """Test the standby switch uses the auto mode of the last poll."""
+    polls = cloud.polls
+    with pytest.raises(HomeAssistantError):
+        await _turn_on_standby(hass)
+    assert cloud.commands == []
+
+    cloud.info["nvm"]["user_parameters"]["is_auto"] = True
+    await coordinator.async_refresh()
+    await _turn_on_standby(hass)
+
+    assert cloud.polls == polls + 1
+    assert [payload for _token, payload in cloud.commands] == [
+        {"name": "standby_mode", "value": True}
+    ]
+
+
+async def test_standby_fetches_an_old_state(hass, freezer, coordinator, cloud):
+    """Test the standby switch fetches the stove when the last poll is too old."""
+    cloud.info["nvm"]["user_parameters"]["is_auto"] = True
+    polls = cloud.polls
+    freezer.tick(timedelta(seconds=DEFAULT_STATE_MAX_AGE + 1))
+
+    await _turn_on_standby(hass)
+
+    assert cloud.polls > polls
+    assert len(cloud.commands) == 1
+
+
+async def test_check_sensor_clears_a_failed_command(
+    hass, freezer, coordinator, cloud, timers
+):
+    """Test a failed queued command is a problem until the next successful poll."""
+    check = _entity_id(hass, "binary_sensor", "check_binary_sensor")
+    assert hass.states.get(check).state == "off"
+
+    cloud.errors["fan_1_speed"] = [RuntimeError("Command refused")]
+    await coordinator.api.send_command(
+        {"name": "fan_1_speed", "value": 3}, coalesce=True
+    )
+    timers[-1].action(None)
+    await hass.async_block_till_done(wait_background_tasks=True)
+    assert hass.states.get(check).state == "on"
+
+    # The poll reports the same data, the sensor still turns off.
+    await _poll(hass, freezer, coordinator)
+    assert not coordinator.command_failed
+    assert hass.states.get(check).state == "off"
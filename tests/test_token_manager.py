@@ -0,0 +1,71 @@
+"""Test the token of an Edilkamin account."""
+import asyncio
+
+from homeassistant.util import dt as dt_util
+import pytest
+from pytest_homeassistant_custom_component.common import async_fire_time_changed
+import requests
+
+from custom_components.edilkaminv2.api.token_manager import (
+    TOKEN_EXPIRY_MARGIN,
+    TOKEN_REFRESH_AHEAD,
+)
+
+
+def _http_error(status: int) -> requests.HTTPError:
+    """Return the error raised by requests for an HTTP status."""
+    response = requests.Response()
+    response.status_code = status
+    return requests.HTTPError(f"{status} error", response=response)
+
+
+async def test_concurrent_callers_share_the_sign_in(token_manager, sign_ins):
+    """Test the callers waiting for a token share a single sign-in."""
+    tokens = await asyncio.gather(
+        *(token_manager.async_get_token() for _ in range(3))
+    )
+
+    assert len(sign_ins) == 1
+    assert tokens == sign_ins * 3
+    # The cached token is handed out until it expires.
+    assert await token_manager.async_get_token() == sign_ins[0]
+    assert token_manager.sign_in_count == 1
+
+
+async def test_token_is_refreshed_before_expiry(hass, token_manager, sign_ins):
+    """Test the token is refreshed before it stops being handed out."""
+    await token_manager.async_get_token()
+    refresh_at = token_manager.expires_at - TOKEN_EXPIRY_MARGIN - TOKEN_REFRESH_AHEAD
+
+    async_fire_time_changed(hass, dt_util.utc_from_timestamp(refresh_at - 10))
+    await hass.async_block_till_done()
+    assert len(sign_ins) == 1
+
+    async_fire_time_changed(hass, dt_util.utc_from_timestamp(refresh_at))
+    await hass.async_block_till_done()
+    assert len(sign_ins) == 2
+    assert await token_manager.async_get_token() == sign_ins[1]
+
+
+@pytest.mark.parametrize("status", [401, 403])
+async def test_rejected_token_signs_in_again(api, cloud, sign_ins, status):
+    """Test a command whose token is rejected is sent again with a new token."""
+    await api.get_token()
+    cloud.errors["power"] = [_http_error(status)]
+
+    await api.execute_command({"name": "power", "value": 1})
+
+    assert len(sign_ins) == 2
+    assert [token for token, _payload in cloud.commands] == sign_ins
+    assert api.sign_ins_last_hour == 2
+
+
+async def test_other_errors_are_not_retried(api, cloud, sign_ins):
+    """Test a command failing for another reason keeps the token."""
+    cloud.errors["power"] = [_http_error(500)]
+
+    with pytest.raises(requests.HTTPError):
+        await api.execute_command({"name": "power", "value": 1})
+
+    assert len(sign_ins) == 1
+    assert len(cloud.commands) == 1
@@ -0,0 +1,152 @@
+"""Test the Edilkamin transports against a local HTTP server."""
+import asyncio
+from pathlib import Path
+import subprocess
+import sys
+
+import aiohttp
+from aiohttp import web
+from aiohttp.test_utils import TestServer
+import pytest
+
+from custom_components.edilkaminv2.api.edilkamin_async_api import is_auth_error
+from custom_components.edilkaminv2.api import transport
+from custom_components.edilkaminv2.api.executor import EdilkaminExecutor
+from custom_components.edilkaminv2.api.transport import (
+    AiohttpTransport,
+    ExecutorTransport,
+)
+
+MAC_ADDRESS = "AA:BB:CC:DD:EE:FF"
+DEVICE_INFO = {"status": {"temperatures": {"enviroment": 20.5}}}
+
+
+def _create_app(received: list) -> web.Application:
+    """Create a stand-in for the Edilkamin cloud."""
+
+    async def device_info(request: web.Request) -> web.Response:
+        received.append((request.method, request.headers["Authorization"], None))
+        if request.headers["Authorization"] != "Bearer token":
+            return web.json_response({"message": "Unauthorized"}, status=401)
+        return web.json_response(DEVICE_INFO)
+
+    async def mqtt_command(request: web.Request) -> web.Response:
+        body = await request.json()
+        received.append((request.method, request.headers["Authorization"], body))
+        return web.json_response("Command 0123456789abcdef executed successfully")
+
+    async def slow_device_info(request: web.Request) -> web.Response:
+        await asyncio.sleep(0.5)
+        return web.json_response(DEVICE_INFO)
+
+    app = web.Application()
+    app.router.add_get("/device/aabbccddeeff/info", device_info)
+    app.router.add_get("/device/001122334455/info", slow_device_info)
+    app.router.add_put("/mqtt/command", mqtt_command)
+    return app
+
+
+@pytest.fixture
+def received() -> list:
+    """Return the requests received by the server."""
+    return []
+
+
+@pytest.fixture
+async def server(received: list, socket_enabled):
+    """Start the stand-in for the Edilkamin cloud, with the sockets enabled."""
+    async with TestServer(_create_app(received)) as server:
+        yield server
+
+
+@pytest.fixture
+async def session():
+    """Return a client session resolving from the executor, aiodns keeps a thread."""
+    connector = aiohttp.TCPConnector(resolver=aiohttp.ThreadedResolver())
+    async with aiohttp.ClientSession(connector=connector) as session:
+        yield session
+
+
+async def test_device_info_and_command(server, session, received):
+    """Test the poll and the command share the session of the transport."""
+    transport = AiohttpTransport(session, base_url=str(server.make_url("/")))
+
+    assert await transport.device_info("token", MAC_ADDRESS) == DEVICE_INFO
+    await transport.mqtt_command("token", MAC_ADDRESS, {"name": "power", "value": 1})
+
+    assert received == [
+        ("GET", "Bearer token", None),
+        (
+            "PUT",
+            "Bearer token",
+            {"mac_address": "aabbccddeeff", "name": "power", "value": 1},
+        ),
+    ]
+
+
+async def test_rejected_token_is_an_auth_error(server, session):
+    """Test a rejected token raises an error recognized as an auth error."""
+    transport = AiohttpTransport(session, base_url=str(server.make_url("/")))
+
+    with pytest.raises(aiohttp.ClientResponseError) as err:
+        await transport.device_info("expired", MAC_ADDRESS)
+
+    assert is_auth_error(err.value)
+
+
+async def test_executor_transport(server, received):
+    """Test the executor transport sends the same requests from its threads."""
+    executor = EdilkaminExecutor()
+    transport = ExecutorTransport(executor, base_url=str(server.make_url("/")))
+
+    assert await transport.device_info("token", MAC_ADDRESS) == DEVICE_INFO
+    await transport.mqtt_command("token", MAC_ADDRESS, {"name": "power", "value": 1})
+    executor.shutdown()
+
+    assert received == [
+        ("GET", "Bearer token", None),
+        (
+            "PUT",
+            "Bearer token",
+            {"mac_address": "aabbccddeeff", "name": "power", "value": 1},
+        ),
+    ]
+    assert executor.in_flight == 0
+
+
+async def test_executor_counts_orphaned_calls(server):
+    """Test a call left running after a timeout is counted until it ends."""
+    executor = EdilkaminExecutor()
+    transport = ExecutorTransport(executor, base_url=str(server.make_url("/")))
+
+    with pytest.raises(TimeoutError):
+        async with asyncio.timeout(0.1):
+            await transport.device_info("token", "00:11:22:33:44:55")
+    assert executor.orphaned == 1
+    assert executor.in_flight == 1
+
+    while executor.orphaned:
+        await asyncio.sleep(0.05)
+    executor.shutdown()
+
+    assert executor.orphaned_total == 1
+    assert executor.in_flight == 0
+
+
+def test_edilkamin_is_imported_on_first_use():
+    """Test loading the integration leaves the edilkamin library unimported."""
+    code = (
+        "import sys\n"
+        "import custom_components.edilkaminv2.api.edilkamin_async_api\n"
+        "import custom_components.edilkaminv2.coordinator\n"
+        "print('edilkamin' in sys.modules)\n"
+    )
+    result = subprocess.run(
+        [sys.executable, "-c", code],
+        capture_output=True,
+        check=True,
+        cwd=Path(transport.__file__).parents[3],
+        text=True,
+    )
+
+    assert result.stdout.strip() == "False"